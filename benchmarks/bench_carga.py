@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de carga de datos en RedSocialService
+
+Genera una red aleatoria en formato JSON y compara:
+  - la carga anterior: un add_node con atributos por usuario y una llamada
+    validada a crear_conexion por cada conexion guardada
+  - la carga masiva actual (cargar_datos -> cargar_masivo)
+
+Uso:
+    python benchmarks/bench_carga.py [ARISTAS ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+from services.data_manager import DataManager
+from services.red_social_service import RedSocialService
+
+TAMANOS = [100_000, 500_000]   # cantidad de aristas
+GRADO_MEDIO = 10
+INTERESES = [f"interes_{i}" for i in range(50)]
+
+
+def generar_red(directorio: str, aristas: int) -> None:
+    rng = random.Random(aristas)
+    n = max(2, 2 * aristas // GRADO_MEDIO)
+    vecinos = {i: [] for i in range(1, n + 1)}
+    conexiones = []
+    while len(conexiones) < aristas:
+        a, b = rng.randint(1, n), rng.randint(1, n)
+        if a != b:
+            conexiones.append({"origen": a, "destino": b})
+            vecinos[a].append(b)
+            vecinos[b].append(a)
+    usuarios = [
+        {"id": i, "nombre": f"Usuario {i}", "edad": rng.randint(18, 70),
+         "email": f"u{i}@example.com", "intereses": rng.sample(INTERESES, 3),
+         "amigos": vecinos[i]}
+        for i in range(1, n + 1)
+    ]
+    DataManager(directorio).guardar_datos(usuarios, conexiones)
+
+
+def carga_anterior(servicio: RedSocialService) -> None:
+    """Camino de carga previo: usuario a usuario y conexion a conexion"""
+    usuarios_data, conexiones_data = servicio.data_manager.cargar_datos()
+    for user_data in usuarios_data:
+        usuario = Usuario.from_dict(user_data)
+        servicio.usuarios[usuario.id] = usuario
+        servicio.grafo.add_node(usuario.id, **usuario.to_dict())
+        usuario.vincular_adyacencia(servicio.grafo.adj[usuario.id])
+        servicio._indexar_intereses(usuario)
+    for conexion in conexiones_data:
+        if conexion['origen'] in servicio.usuarios and conexion['destino'] in servicio.usuarios:
+            servicio.crear_conexion(conexion['origen'], conexion['destino'])
+
+
+def medir(aristas: int) -> None:
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_red(directorio, aristas)
+        data_manager = DataManager(directorio)
+
+        inicio = time.perf_counter()
+        data_manager.cargar_datos()
+        t_parseo = time.perf_counter() - inicio
+
+        servicio = RedSocialService(data_manager)
+        inicio = time.perf_counter()
+        carga_anterior(servicio)
+        t_anterior = time.perf_counter() - inicio
+
+        servicio = RedSocialService(data_manager)
+        inicio = time.perf_counter()
+        servicio.cargar_datos()
+        t_masiva = time.perf_counter() - inicio
+
+        print(f"aristas={servicio.grafo.number_of_edges():>9,} usuarios={len(servicio.usuarios):>8,} | "
+              f"parseo JSON: {t_parseo:6.2f} s | carga anterior: {t_anterior:6.2f} s | "
+              f"carga masiva: {t_masiva:6.2f} s | sin parseo: "
+              f"{t_anterior - t_parseo:6.2f} s -> {t_masiva - t_parseo:6.2f} s")
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los detectores de comunidades
+
+Genera una red de comunidades densas unidas por pocas aristas y compara la
+modularidad voraz de networkx (el metodo anterior) con Louvain y con la
+propagacion de etiquetas: tiempo, cantidad de comunidades y modularidad.
+Despues agrega unas pocas conexiones al azar y mide la nueva deteccion en
+caliente (desde la particion anterior) contra una desde cero.
+
+Uso:
+    python benchmarks/bench_comunidades.py [NODOS ...]
+"""
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.detector_comunidades import (DeteccionLouvain, DeteccionModularidadVoraz,
+                                           DeteccionPropagacionEtiquetas, community_louvain)
+
+TAMANOS = [2_000, 10_000, 50_000]   # cantidad de nodos
+TAMANO_COMUNIDAD = 100
+EDICIONES = 20                      # conexiones nuevas antes de la deteccion en caliente
+MAXIMO_VORAZ = 10_000               # la modularidad voraz no se mide por encima
+
+
+def generar_red(nodos: int) -> nx.Graph:
+    comunidades = max(2, nodos // TAMANO_COMUNIDAD)
+    return nx.planted_partition_graph(comunidades, TAMANO_COMUNIDAD, 0.08, 2.0 / nodos, seed=nodos)
+
+
+def detectar(detector, grafo: nx.Graph, version: int):
+    inicio = time.perf_counter()
+    comunidades = detector.detectar(grafo, version)
+    return comunidades, time.perf_counter() - inicio
+
+
+def informar(nombre: str, grafo: nx.Graph, comunidades, segundos: float, referencia: float = None) -> None:
+    modularidad = nx.community.modularity(grafo, comunidades)
+    relacion = f" ({referencia / segundos:6.1f}x)" if referencia else ""
+    print(f"  {nombre:<30}: {segundos:7.2f} s{relacion} | {len(comunidades):>6} comunidades | "
+          f"modularidad {modularidad:.4f}")
+
+
+def medir(nodos: int) -> None:
+    grafo = generar_red(nodos)
+    print(f"nodos={len(grafo):>7,} aristas={grafo.number_of_edges():>8,}")
+
+    t_voraz = None
+    if len(grafo) <= MAXIMO_VORAZ:
+        comunidades, t_voraz = detectar(DeteccionModularidadVoraz(), grafo, 1)
+        informar("modularidad voraz (nx)", grafo, comunidades, t_voraz)
+
+    detectores = [("propagacion", DeteccionPropagacionEtiquetas(semilla=0))]
+    if community_louvain is not None:
+        detectores.insert(0, ("louvain", DeteccionLouvain(semilla=0)))
+    else:
+        print("  (python-louvain no instalado: se omite Louvain)")
+
+    # Mismas conexiones nuevas para todos los detectores
+    rng = np.random.default_rng(nodos)
+    nuevas = [tuple(par) for par in rng.integers(0, len(grafo), size=(EDICIONES, 2)).tolist()
+              if par[0] != par[1]]
+    editado = grafo.copy()
+    editado.add_edges_from(nuevas)
+
+    for nombre, detector in detectores:
+        comunidades, t_frio = detectar(detector, grafo, 1)
+        informar(f"{nombre}", grafo, comunidades, t_frio, t_voraz)
+        comunidades, t_caliente = detectar(detector, editado, 2)
+        informar(f"{nombre} en caliente (+{len(nuevas)})", editado, comunidades, t_caliente, t_frio)
+        detector.reiniciar()
+        comunidades, t_cero = detectar(detector, editado, 2)
+        informar(f"{nombre} desde cero (+{len(nuevas)})", editado, comunidades, t_cero, t_frio)
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de las conexiones automaticas de RedSocialService
+
+Compara el recorrido completo de usuarios (implementacion anterior) con el
+indice invertido interes -> usuarios al dar de alta nuevos usuarios.
+
+Uso:
+    python benchmarks/bench_conexiones_automaticas.py [N ...]
+"""
+import os
+import random
+import sys
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+from services.red_social_service import RedSocialService
+
+TAMANOS = [10_000, 100_000, 1_000_000]
+VOCABULARIO = 20_000       # Intereses distintos en la red
+INTERESES_POR_USUARIO = 3
+ALTAS = 20                 # Usuarios nuevos medidos por tamano
+
+
+def generar_intereses(rng: random.Random):
+    return [f"interes_{rng.randrange(VOCABULARIO)}" for _ in range(INTERESES_POR_USUARIO)]
+
+
+def poblar(servicio: RedSocialService, n: int, rng: random.Random) -> None:
+    """Dar de alta n usuarios sin conexiones automaticas"""
+    for usuario_id in range(1, n + 1):
+        usuario = Usuario(usuario_id, f"Usuario {usuario_id}", rng.randint(18, 70),
+                          intereses=generar_intereses(rng))
+        servicio.usuarios[usuario_id] = usuario
+        servicio.grafo.add_node(usuario_id)
+        usuario.vincular_adyacencia(servicio.grafo.adj[usuario_id])
+        servicio._indexar_intereses(usuario)
+    servicio._siguiente_id = n + 1
+
+
+def candidatos_recorrido_completo(servicio: RedSocialService, usuario: Usuario):
+    """Busqueda de candidatos tal y como se hacia antes del indice"""
+    return [
+        otro.id for otro in servicio.usuarios.values()
+        if (otro.id != usuario.id and
+            not servicio.grafo.has_edge(usuario.id, otro.id) and
+            usuario.tiene_interes_comun(otro))
+    ]
+
+
+def medir(n: int) -> None:
+    rng = random.Random(n)
+    servicio = RedSocialService()
+    poblar(servicio, n, rng)
+    nuevos = [generar_intereses(rng) for _ in range(ALTAS)]
+
+    # Recorrido completo: solo busqueda de candidatos (sin crear aristas)
+    inicio = time.perf_counter()
+    for intereses in nuevos:
+        candidatos_recorrido_completo(servicio, Usuario(0, "nuevo", intereses=intereses))
+    t_recorrido = (time.perf_counter() - inicio) / ALTAS
+
+    # Indice invertido: alta completa incluyendo creacion de aristas
+    inicio = time.perf_counter()
+    total_conexiones = 0
+    for intereses in nuevos:
+        _, conexiones = servicio.agregar_usuario("nuevo", intereses=intereses)
+        total_conexiones += conexiones
+    t_indice = (time.perf_counter() - inicio) / ALTAS
+
+    print(f"N={n:>9,} | recorrido completo: {t_recorrido * 1000:10.2f} ms/alta | "
+          f"indice: {t_indice * 1000:8.3f} ms/alta | "
+          f"conexiones/alta: {total_conexiones / ALTAS:6.1f} | "
+          f"mejora: x{t_recorrido / t_indice:,.0f}")
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del formato compacto de DataManager
+
+Guarda la misma red en el formato JSON actual y en el formato compacto
+(adyacencia delta + varint, sin listas de amigos) con gzip y lzma, y
+compara tamano en disco, tiempo de escritura y tiempo de carga completa en
+RedSocialService.
+
+Uso:
+    python benchmarks/bench_formato_compacto.py [ARISTAS ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from bench_carga import generar_red
+from services.data_manager import DataManager
+from services.red_social_service import RedSocialService
+
+TAMANOS = [100_000, 500_000]   # cantidad de aristas
+FORMATOS = [None, 'gzip', 'lzma']
+
+
+def tamano_en_disco(data_manager: DataManager) -> int:
+    return sum(os.path.getsize(archivo)
+               for archivo in (data_manager.archivo_usuarios, data_manager.archivo_conexiones)
+               if os.path.exists(archivo))
+
+
+def medir(aristas: int) -> None:
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_red(directorio, aristas)
+        usuarios, conexiones = DataManager(directorio).cargar_datos()
+        print(f"aristas={aristas:,} usuarios={len(usuarios):,}")
+
+        referencia = None
+        for compresion in FORMATOS:
+            destino = os.path.join(directorio, compresion or 'json')
+            os.makedirs(destino)
+            data_manager = DataManager(destino, compresion=compresion)
+
+            inicio = time.perf_counter()
+            data_manager.guardar_datos(usuarios, conexiones)
+            t_escritura = time.perf_counter() - inicio
+            tamano = tamano_en_disco(data_manager)
+            referencia = referencia or tamano
+
+            servicio = RedSocialService(data_manager)
+            inicio = time.perf_counter()
+            servicio.cargar_datos()
+            t_carga = time.perf_counter() - inicio
+
+            print(f"  {compresion or 'json':>5} | tamano: {tamano / 2**20:8.2f} MiB "
+                  f"(x{referencia / tamano:5.1f} menor) | escritura: {t_escritura:6.2f} s | "
+                  f"carga: {t_carga:6.2f} s | conexiones: {servicio.grafo.number_of_edges():,}")
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del importador de listas de aristas
+
+Genera una lista de aristas en formato SNAP (ids externos dispersos, con
+duplicados en ambos sentidos) y la importa con ImportadorRed, comparando con
+la via anterior de agregar cada conexion con crear_conexion. Reporta
+rendimiento en aristas/s y MB/s.
+
+Uso:
+    python benchmarks/bench_importador.py [ARISTAS ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.data_manager import DataManager
+from services.importador import ImportadorRed
+from services.red_social_service import RedSocialService
+
+TAMANOS = [1_000_000, 5_000_000]   # cantidad de lineas de aristas
+GRADO_MEDIO = 10
+LIMITE_ANTERIOR = 1_000_000
+
+
+def generar_lista(ruta: str, aristas: int) -> None:
+    rng = random.Random(aristas)
+    n = max(2, aristas * 2 // GRADO_MEDIO)
+    with open(ruta, 'w') as f:
+        f.write("# Lista de aristas sintetica\n# FromNodeId\tToNodeId\n")
+        for _ in range(aristas):
+            f.write(f"{rng.randint(1, n) * 7919}\t{rng.randint(1, n) * 7919}\n")
+
+
+def carga_anterior(ruta: str) -> float:
+    """agregar_usuario (sin intereses, sin conexiones automaticas) y crear_conexion por linea"""
+    servicio = RedSocialService(DataManager(os.path.dirname(ruta)))
+    ids = {}
+    inicio = time.perf_counter()
+    with open(ruta) as f:
+        for linea in f:
+            if linea.startswith('#'):
+                continue
+            extremos = []
+            for externo in linea.split():
+                if externo not in ids:
+                    ids[externo] = servicio.agregar_usuario(externo)[0].id
+                extremos.append(ids[externo])
+            if extremos[0] != extremos[1]:
+                servicio.crear_conexion(*extremos)
+    return time.perf_counter() - inicio
+
+
+def medir(aristas: int) -> None:
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'aristas.txt')
+        generar_lista(ruta, aristas)
+        print(f"lineas={aristas:,} archivo={os.path.getsize(ruta) / 2**20:.1f} MiB")
+
+        servicio = RedSocialService(DataManager(directorio))
+        importador = ImportadorRed(servicio)
+        importador.importar_aristas(ruta)
+        resumen = importador.confirmar()
+        print(f"  importador | {resumen['segundos']:6.2f} s | {resumen['aristas_por_segundo']:12,.0f} aristas/s | "
+              f"{resumen['mb_por_segundo']:6.1f} MB/s | usuarios: {resumen['usuarios']:,} | "
+              f"conexiones: {resumen['conexiones']:,} | duplicadas: {resumen['duplicadas']:,}")
+
+        if aristas <= LIMITE_ANTERIOR:
+            t = carga_anterior(ruta)
+            print(f"  anterior   | {t:6.2f} s | {aristas / t:12,.0f} aristas/s")
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la intermediacion (betweenness) por muestreo de fuentes
+
+Genera una red de comunidades conectadas por pocas aristas puente, calcula
+la intermediacion exacta (todas las fuentes) y la compara con la estimada
+con distintas cantidades de fuentes: tiempo, error absoluto maximo y medio,
+y cuantos de los 10 mejores intermediarios exactos aparecen en el top 10
+estimado. Tambien mide nx.betweenness_centrality con la muestra mas chica.
+Se mide con workers=1 para comparar el costo por fuente.
+
+Uso:
+    python benchmarks/bench_intermediacion.py [NODOS ...]
+"""
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.centralidad_intermediacion import calcular_intermediacion
+from services.matriz_adyacencia import MatrizAdyacencia
+
+TAMANOS = [2_000, 10_000]   # cantidad de nodos
+MUESTRAS = [16, 64, 256, 1024]
+TAMANO_COMUNIDAD = 100
+TOP = 10
+
+
+def generar_red(nodos: int) -> nx.Graph:
+    comunidades = max(2, nodos // TAMANO_COMUNIDAD)
+    # Comunidades densas y pocas aristas entre ellas: los puentes concentran la intermediacion
+    return nx.planted_partition_graph(comunidades, TAMANO_COMUNIDAD, 0.08, 0.5 / nodos, seed=nodos)
+
+
+def medir(nodos: int) -> None:
+    grafo = generar_red(nodos)
+    matriz = MatrizAdyacencia().actualizar(grafo)
+    print(f"nodos={len(grafo):>7,} aristas={grafo.number_of_edges():>8,}")
+
+    inicio = time.perf_counter()
+    exacta = calcular_intermediacion(matriz, workers=1)
+    t_exacta = time.perf_counter() - inicio
+    top_exacto = set(np.argsort(-exacta)[:TOP].tolist())
+    print(f"  exacta             : {t_exacta:7.2f} s")
+
+    for muestras in MUESTRAS:
+        if muestras >= len(grafo):
+            continue
+        inicio = time.perf_counter()
+        estimada = calcular_intermediacion(matriz, muestras=muestras, workers=1, semilla=muestras)
+        t_estimada = time.perf_counter() - inicio
+        error = np.abs(estimada - exacta)
+        aciertos = len(top_exacto & set(np.argsort(-estimada)[:TOP].tolist()))
+        print(f"  muestras={muestras:>5}     : {t_estimada:7.2f} s ({t_exacta / t_estimada:5.1f}x) | "
+              f"error max {error.max():.2e} medio {error.mean():.2e} | top {TOP}: {aciertos}/{TOP}")
+
+    inicio = time.perf_counter()
+    nx.betweenness_centrality(grafo, k=MUESTRAS[0], seed=0)
+    print(f"  networkx k={MUESTRAS[0]:<5}   : {time.perf_counter() - inicio:7.2f} s")
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memoria por usuario del modelo Usuario
+
+Compara el dataclass original (listas de intereses por usuario y set nuevo
+en cada intereses_set) con el modelo compacto con __slots__ e intereses
+internados. Tambien mide el coste de tiene_interes_comun en ambos.
+
+Uso:
+    python benchmarks/bench_memoria_usuario.py [N]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Set
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+
+N_POR_DEFECTO = 1_000_000
+VOCABULARIO = [f"interes_{i}" for i in range(60)]
+
+
+@dataclass
+class UsuarioDataclass:
+    """Copia del modelo anterior, solo para comparar"""
+    id: int
+    nombre: str
+    edad: int = 0
+    email: str = ""
+    intereses: List[str] = None
+    amigos: List[int] = None
+
+    def __post_init__(self):
+        if self.intereses is None:
+            self.intereses = []
+        if self.amigos is None:
+            self.amigos = []
+        self.intereses = [interes.lower() for interes in self.intereses]
+
+    @property
+    def intereses_set(self) -> Set[str]:
+        return set(self.intereses)
+
+    def tiene_interes_comun(self, otro_usuario) -> bool:
+        return bool(self.intereses_set.intersection(otro_usuario.intereses_set))
+
+
+def generar_registros(n: int):
+    rng = random.Random(42)
+    for usuario_id in range(n):
+        # Se construyen strings nuevos como los que produciria json.load
+        intereses = [str(rng.choice(VOCABULARIO)).upper() for _ in range(rng.randint(1, 4))]
+        yield usuario_id, f"Usuario {usuario_id}", rng.randint(18, 70), f"u{usuario_id}@example.com", intereses
+
+
+def medir_memoria(clase, n: int):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    usuarios = [clase(i, nombre, edad, email, intereses)
+                for i, nombre, edad, email, intereses in generar_registros(n)]
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return usuarios, usado
+
+
+def medir_comparaciones(usuarios, repeticiones: int = 200_000) -> float:
+    rng = random.Random(7)
+    pares = [(rng.choice(usuarios), rng.choice(usuarios)) for _ in range(repeticiones)]
+    inicio = time.perf_counter()
+    for a, b in pares:
+        a.tiene_interes_comun(b)
+    return (time.perf_counter() - inicio) / repeticiones * 1e9
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_POR_DEFECTO
+    print(f"Usuarios: {n:,}")
+    for nombre, clase in (("dataclass anterior", UsuarioDataclass), ("Usuario compacto", Usuario)):
+        usuarios, usado = medir_memoria(clase, n)
+        ns = medir_comparaciones(usuarios)
+        print(f"{nombre:>20}: {usado / n:7.1f} bytes/usuario | "
+              f"total {usado / 2**20:8.1f} MiB | tiene_interes_comun {ns:6.0f} ns")
+        del usuarios
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del modo de perfiles diferidos de RedSocialService
+
+Guarda una red en un snapshot binario y la carga de dos formas:
+  - completa: todos los Usuario en memoria
+  - perfiles diferidos: solo ids y conexiones, perfiles via cache LRU
+Compara memoria retenida tras la carga (tracemalloc), tiempo de carga y
+tiempo de consultas puntuales con obtener_usuario. La carga se mide con
+tracemalloc activo, asi que sus tiempos solo sirven para comparar modos.
+
+Uso:
+    python benchmarks/bench_perfiles_diferidos.py [USUARIOS ...]
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.red_social_service import RedSocialService
+from services.snapshot_binario import RepositorioSnapshot
+
+TAMANOS = [200_000, 1_000_000]   # cantidad de usuarios
+GRADO_MEDIO = 6
+INTERESES = [f"interes_{i}" for i in range(60)]
+CONSULTAS = 10_000
+
+
+def generar_snapshot(directorio: str, n: int) -> None:
+    rng = random.Random(n)
+    usuarios = [
+        {"id": i, "nombre": f"Usuario {i}", "edad": rng.randint(18, 70),
+         "email": f"usuario{i}@example.com", "intereses": rng.sample(INTERESES, rng.randint(1, 4)),
+         "amigos": []}
+        for i in range(1, n + 1)
+    ]
+    conexiones = [{"origen": rng.randint(1, n), "destino": rng.randint(1, n)}
+                  for _ in range(n * GRADO_MEDIO // 2)]
+    RepositorioSnapshot(directorio).guardar_datos(usuarios, conexiones)
+
+
+def medir_modo(directorio: str, n: int, diferidos: bool) -> None:
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    servicio = RedSocialService(RepositorioSnapshot(directorio), perfiles_diferidos=diferidos)
+    servicio.cargar_datos()
+    t_carga = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(1)
+    objetivos = [rng.randint(1, n) for _ in range(CONSULTAS)]
+    inicio = time.perf_counter()
+    for usuario_id in objetivos:
+        servicio.obtener_usuario(usuario_id).nombre
+    t_consulta = (time.perf_counter() - inicio) / CONSULTAS
+
+    modo = "diferidos" if diferidos else "completos"
+    print(f"  {modo:>9} | memoria: {memoria / 2**20:8.1f} MiB | carga: {t_carga:6.2f} s | "
+          f"obtener_usuario: {t_consulta * 1e6:7.1f} us")
+
+
+def medir(n: int) -> None:
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_snapshot(directorio, n)
+        print(f"usuarios={n:,}")
+        medir_modo(directorio, n, diferidos=False)
+        medir_modo(directorio, n, diferidos=True)
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
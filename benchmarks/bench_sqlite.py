@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del repositorio SQLite frente a los archivos JSON
+
+Para cada tamano mide, con ambos backends:
+  - escritura completa de la red
+  - carga completa en RedSocialService
+  - consulta puntual de un usuario (JSON: recorrer el archivo hasta encontrarlo)
+  - consulta de usuarios por interes
+  - guardado tras 100 cambios (JSON reescribe todo, SQLite solo lo modificado)
+
+Uso:
+    python benchmarks/bench_sqlite.py [USUARIOS ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.data_manager import DataManager
+from services.repositorio_sqlite import RepositorioSQLite
+from services.red_social_service import RedSocialService
+
+TAMANOS = [100_000, 1_000_000]   # cantidad de usuarios
+GRADO_MEDIO = 4
+INTERESES = [f"interes_{i}" for i in range(50)]
+CONSULTAS = 20
+CAMBIOS = 100
+
+
+def generar_red(n: int):
+    rng = random.Random(n)
+    usuarios = [
+        {"id": i, "nombre": f"Usuario {i}", "edad": rng.randint(18, 70),
+         "email": f"u{i}@example.com", "intereses": rng.sample(INTERESES, 3),
+         "amigos": []}
+        for i in range(1, n + 1)
+    ]
+    conexiones = []
+    while len(conexiones) < n * GRADO_MEDIO // 2:
+        a, b = rng.randint(1, n), rng.randint(1, n)
+        if a != b:
+            conexiones.append({"origen": a, "destino": b})
+    return usuarios, conexiones
+
+
+def cronometrar(funcion, repeticiones: int = 1) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def buscar_en_json(data_manager: DataManager, usuario_id: int):
+    return next(u for u in data_manager.iterar_usuarios() if u['id'] == usuario_id)
+
+
+def aplicar_cambios(servicio: RedSocialService, rng: random.Random) -> None:
+    ids = list(servicio.usuarios)
+    for _ in range(CAMBIOS // 2):
+        servicio.crear_conexion(*rng.sample(ids, 2))
+    for i in range(CAMBIOS // 2):
+        servicio.usuarios[ids[i]].edad += 1
+        servicio._marcar_modificados((ids[i],))
+
+
+def medir(n: int) -> None:
+    usuarios, conexiones = generar_red(n)
+    rng = random.Random(1)
+    objetivos = [rng.randint(1, n) for _ in range(CONSULTAS)]
+    with tempfile.TemporaryDirectory() as directorio:
+        backends = (
+            ("JSON", DataManager(directorio)),
+            ("SQLite", RepositorioSQLite(os.path.join(directorio, 'red.db'))),
+        )
+        print(f"usuarios={n:,} conexiones={len(conexiones):,}")
+        for nombre, repositorio in backends:
+            t_escritura = cronometrar(lambda: repositorio.guardar_datos(usuarios, conexiones))
+
+            servicio = RedSocialService(repositorio)
+            t_carga = cronometrar(servicio.cargar_datos)
+
+            if isinstance(repositorio, RepositorioSQLite):
+                consultas = iter(objetivos)
+                t_puntual = cronometrar(lambda: repositorio.obtener_usuario(next(consultas)), CONSULTAS)
+                t_interes = cronometrar(lambda: repositorio.usuarios_con_interes("interes_7"), CONSULTAS)
+            else:
+                # Sin indices: cada consulta recorre el archivo
+                consultas = iter(objetivos[:3])
+                t_puntual = cronometrar(lambda: buscar_en_json(repositorio, next(consultas)), 3)
+                t_interes = cronometrar(lambda: [u['id'] for u in repositorio.iterar_usuarios()
+                                                 if "interes_7" in u['intereses']])
+
+            aplicar_cambios(servicio, random.Random(2))
+            t_cambios = cronometrar(servicio.guardar_datos)
+
+            print(f"  {nombre:>6} | escritura: {t_escritura:7.2f} s | carga: {t_carga:7.2f} s | "
+                  f"usuario por id: {t_puntual * 1000:9.2f} ms | por interes: {t_interes * 1000:9.2f} ms | "
+                  f"guardar {CAMBIOS} cambios: {t_cambios * 1000:9.1f} ms")
+            if isinstance(repositorio, RepositorioSQLite):
+                repositorio.cerrar()
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or TAMANOS
+    for tamano in tamanos:
+        medir(tamano)
@@ -3,49 +3,150 @@
 """
 Modelo para representar un usuario en la red social
 """
-from dataclasses import dataclass
-from typing import List, Set
+import sys
+from typing import Dict, FrozenSet, Iterable, KeysView, List, Mapping, Set, Tuple
+
+# Tabla global de intereses: cada interes distinto recibe un id entero y los
+# conjuntos de ids iguales se comparten entre usuarios en lugar de duplicarse.
+# Los ids no se reasignan nunca (otros usuarios y caches los guardan), asi que
+# esa tabla crece con el vocabulario de intereses, no con los usuarios. Las
+# tablas de conjuntos se depuran con depurar_conjuntos_intereses().
+_ids_por_interes: Dict[str, int] = {}
+_nombres_interes: List[str] = []
+_conjuntos_canonicos: Dict[FrozenSet[int], FrozenSet[int]] = {}
+_conjuntos_nombres: Dict[FrozenSet[int], FrozenSet[str]] = {}
+
+def _internar_intereses(intereses) -> Tuple[Tuple[str, ...], FrozenSet[int]]:
+    """Normalizar intereses y devolver su tupla y el conjunto compartido de ids"""
+    tupla = tuple(sys.intern(interes.lower()) for interes in intereses)
+    ids = []
+    for interes in tupla:
+        interes_id = _ids_por_interes.get(interes)
+        if interes_id is None:
+            interes_id = len(_nombres_interes)
+            _ids_por_interes[interes] = interes_id
+            _nombres_interes.append(interes)
+        ids.append(interes_id)
+    conjunto = frozenset(ids)
+    return tupla, _conjuntos_canonicos.setdefault(conjunto, conjunto)
+
+def cantidad_conjuntos_intereses() -> int:
+    """Cantidad de conjuntos de intereses distintos registrados"""
+    return len(_conjuntos_canonicos)
+
+def depurar_conjuntos_intereses(usuarios: Iterable['Usuario']) -> int:
+    """
+    Conservar en las tablas de conjuntos solo los de usuarios (los que siguen en uso)
+    Un usuario no incluido conserva su conjunto; solo deja de compartirse
+    con los que se creen despues.
+    Retorna: cantidad de conjuntos descartados
+    """
+    en_uso: Dict[FrozenSet[int], FrozenSet[int]] = {}
+    for usuario in usuarios:
+        conjunto = usuario._ids_intereses
+        en_uso.setdefault(conjunto, _conjuntos_canonicos.get(conjunto, conjunto))
+    descartados = len(_conjuntos_canonicos.keys() - en_uso.keys())
+    _conjuntos_canonicos.clear()
+    _conjuntos_canonicos.update(en_uso)
+    for conjunto in [conjunto for conjunto in _conjuntos_nombres if conjunto not in en_uso]:
+        del _conjuntos_nombres[conjunto]
+    return descartados
+
+def nombre_interes(interes_id: int) -> str:
+    """Obtener el nombre de un interes a partir de su id"""
+    return _nombres_interes[interes_id]
+
+def id_interes(interes: str) -> int:
+    """Obtener el id de un interes (-1 si ningun usuario lo tiene)"""
+    return _ids_por_interes.get(interes.lower(), -1)
 
-@dataclass
 class Usuario:
     """Modelo de datos para un usuario"""
-    id: int
-    nombre: str
-    edad: int = 0
-    email: str = ""
-    intereses: List[str] = None
-    amigos: List[int] = None
-    
-    def __post_init__(self):
-        if self.intereses is None:
-            self.intereses = []
-        if self.amigos is None:
-            self.amigos = []
+    
+    __slots__ = ('id', 'nombre', 'edad', 'email', '_intereses', '_ids_intereses', '_amigos')
+    
+    def __init__(self, id: int, nombre: str, edad: int = 0, email: str = "",
+                 intereses: List[str] = None, amigos: List[int] = None):
+        self.id = id
+        self.nombre = nombre
+        self.edad = edad
+        self.email = email
         # Normalizar intereses a minusculas
-        self.intereses = [interes.lower() for interes in self.intereses]
+        self._intereses, self._ids_intereses = _internar_intereses(intereses or ())
+        # Amistades: dict propio (ordenado, pertenencia O(1)) o la adyacencia del grafo
+        self._amigos: Mapping[int, object] = dict.fromkeys(amigos or ())
+    
+    @property
+    def intereses(self) -> List[str]:
+        """Intereses en su orden original"""
+        return list(self._intereses)
+    
+    @intereses.setter
+    def intereses(self, intereses: List[str]) -> None:
+        self._intereses, self._ids_intereses = _internar_intereses(intereses or ())
     
     @property
-    def intereses_set(self) -> Set[str]:
+    def num_intereses(self) -> int:
+        """Cantidad de intereses (incluyendo repetidos, como len(intereses))"""
+        return len(self._intereses)
+    
+    @property
+    def ids_intereses(self) -> FrozenSet[int]:
+        """Conjunto compartido con los ids de los intereses"""
+        return self._ids_intereses
+    
+    @property
+    def intereses_set(self) -> FrozenSet[str]:
         """Retorna intereses como conjunto para operaciones de interseccion"""
-        return set(self.intereses)
+        nombres = _conjuntos_nombres.get(self._ids_intereses)
+        if nombres is None:
+            nombres = frozenset(_nombres_interes[i] for i in self._ids_intereses)
+            _conjuntos_nombres[self._ids_intereses] = nombres
+        return nombres
+    
+    @property
+    def amigos(self) -> KeysView:
+        """Ids de los amigos (pertenencia O(1), en orden de conexion)"""
+        return self._amigos.keys()
+    
+    @amigos.setter
+    def amigos(self, amigos: Iterable[int]) -> None:
+        self._amigos = dict.fromkeys(amigos or ())
+    
+    @property
+    def vinculado_a_grafo(self) -> bool:
+        """Indica si las amistades se leen directamente de la adyacencia del grafo"""
+        return not isinstance(self._amigos, dict)
+    
+    def vincular_adyacencia(self, adyacencia: Mapping[int, object]) -> None:
+        """Usar la adyacencia del grafo (p. ej. grafo.adj[id]) como unica fuente de amistades"""
+        self._amigos = adyacencia
+    
+    def desvincular_adyacencia(self) -> None:
+        """Copiar las amistades actuales y dejar de depender del grafo"""
+        self._amigos = dict.fromkeys(self._amigos)
     
     def agregar_amigo(self, usuario_id: int):
         """Agregar un amigo evitando duplicados"""
-        if usuario_id not in self.amigos:
-            self.amigos.append(usuario_id)
+        self._amistades_editables()[usuario_id] = None
     
     def remover_amigo(self, usuario_id: int):
         """Remover un amigo"""
-        if usuario_id in self.amigos:
-            self.amigos.remove(usuario_id)
+        self._amistades_editables().pop(usuario_id, None)
+    
+    def _amistades_editables(self) -> Dict[int, None]:
+        if self.vinculado_a_grafo:
+            raise TypeError("Las amistades de un usuario vinculado al grafo se modifican "
+                            "con las conexiones del grafo")
+        return self._amigos
     
     def tiene_interes_comun(self, otro_usuario: 'Usuario') -> bool:
         """Verificar si tiene intereses comunes con otro usuario"""
-        return bool(self.intereses_set.intersection(otro_usuario.intereses_set))
+        return not self._ids_intereses.isdisjoint(otro_usuario._ids_intereses)
     
     def intereses_comunes(self, otro_usuario: 'Usuario') -> Set[str]:
         """Obtener intereses comunes con otro usuario"""
-        return self.intereses_set.intersection(otro_usuario.intereses_set)
+        return {_nombres_interes[i] for i in self._ids_intereses & otro_usuario._ids_intereses}
     
     def to_dict(self) -> dict:
         """Convertir a diccionario para serializacion"""
@@ -54,8 +155,8 @@ class Usuario:
             "nombre": self.nombre,
             "edad": self.edad,
             "email": self.email,
-            "intereses": self.intereses,
-            "amigos": self.amigos
+            "intereses": list(self._intereses),
+            "amigos": list(self._amigos)
         }
     
     @classmethod
@@ -69,3 +170,20 @@ class Usuario:
             intereses=data.get("intereses", []),
             amigos=data.get("amigos", [])
         )
+    
+    def __reduce__(self):
+        # Los ids de intereses son propios de cada proceso: se vuelven a internar
+        return (Usuario, (self.id, self.nombre, self.edad, self.email,
+                          list(self._intereses), list(self._amigos)))
+    
+    def __eq__(self, otro) -> bool:
+        if otro.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.id, self.nombre, self.edad, self.email, self._intereses, list(self._amigos)) ==
+                (otro.id, otro.nombre, otro.edad, otro.email, otro._intereses, list(otro._amigos)))
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"Usuario(id={self.id!r}, nombre={self.nombre!r}, edad={self.edad!r}, "
+                f"email={self.email!r}, intereses={list(self._intereses)!r}, amigos={list(self._amigos)!r})")
@@ -4,14 +4,47 @@
 Analizador de metricas y propiedades de la red social
 """
 import networkx as nx
-from typing import Dict, List
+import numpy as np
+from typing import Dict, List, Optional
 from models.usuario import Usuario
+from services.estadisticas_incrementales import EstadisticasIncrementales
+from services.detector_comunidades import DetectorComunidades, crear_detector_por_defecto
+from services.matriz_adyacencia import MatrizAdyacencia
+from services.motor_centralidad import MotorCentralidad, posiciones_mejores
+from services.centralidad_cercania import calcular_cercania
+from services.centralidad_intermediacion import calcular_intermediacion, MUESTRAS_INTERMEDIACION
 
 class AnalizadorRed:
     """Analiza metricas y propiedades de la red social"""
     
+    def __init__(self, adyacencia: Optional[MatrizAdyacencia] = None):
+        # Conteos y componentes que el servicio actualiza con cada cambio del grafo
+        self.estadisticas = EstadisticasIncrementales()
+        # Centralidades sobre la adyacencia CSR (la del servicio si se comparte),
+        # recalculadas solo si cambia la version
+        self.motor = MotorCentralidad(adyacencia)
+        # Algoritmo de comunidades; conserva la ultima particion para arrancar en caliente
+        self.detector: DetectorComunidades = crear_detector_por_defecto()
+    
+    def cambiar_detector(self, detector: DetectorComunidades) -> None:
+        """Cambiar el algoritmo de deteccion de comunidades"""
+        self.detector = detector
+    
+    def obtener_estadisticas(self) -> Dict:
+        """Estadisticas generales mantenidas incrementalmente (O(1))"""
+        return self.estadisticas.resumen()
+    
+    def recalcular_estadisticas(self, grafo: nx.Graph) -> bool:
+        """
+        Reconstruir desde cero las estadisticas mantenidas
+        Retorna: True si coincidian con las del grafo
+        """
+        coincidian = self.estadisticas.coincide_con(grafo)
+        self.estadisticas.reconstruir(grafo)
+        return coincidian
+    
     def calcular_estadisticas_generales(self, grafo: nx.Graph) -> Dict:
-        """Calcular estadisticas generales de la red"""
+        """Calcular estadisticas generales de la red recorriendo el grafo completo"""
         num_nodos = grafo.number_of_nodes()
         num_aristas = grafo.number_of_edges()
         
@@ -39,55 +72,85 @@ class AnalizadorRed:
             'es_conectado': es_conectado
         }
     
-    def calcular_centralidad(self, grafo: nx.Graph, usuarios: Dict[int, Usuario]) -> Dict:
-        """Calcular metricas de centralidad"""
+    def calcular_centralidad(self, grafo: nx.Graph, usuarios: Dict[int, Usuario],
+                             version: Optional[int] = None, muestras_cercania: Optional[int] = None,
+                             workers: Optional[int] = None, cantidad: int = 5) -> Dict:
+        """
+        Calcular metricas de centralidad (los cantidad usuarios mejores de cada una)
+        La cercania se calcula tambien con el grafo no conexo (cada usuario en
+        su componente); muestras_cercania la aproxima con esa cantidad de
+        pivotes por componente y error_cercania estima su error en saltos.
+        PageRank, vector propio y Katz se calculan sobre la adyacencia CSR,
+        que solo se reconstruye si cambia la version.
+        """
         if not grafo.nodes:
-            return {'grado': [], 'cercania': []}
+            return {'grado': [], 'cercania': [], 'error_cercania': None,
+                    'pagerank': [], 'vector_propio': [], 'katz': []}
+        
+        matriz = self.motor.actualizar(grafo, version)
         
-        # Centralidad de grado
-        centralidad_grado = nx.degree_centrality(grafo)
-        top_grado = sorted(centralidad_grado.items(), 
-                          key=lambda x: x[1], reverse=True)[:5]
+        # Centralidad de cercania (Wasserman-Faust, valida con varias componentes)
+        centralidad_cercania, error_cercania = calcular_cercania(
+            matriz, muestras=muestras_cercania, workers=workers)
         
-        grado_resultado = [
+        resultado = {
+            'grado': self._mejores(self.motor.grado(), matriz, usuarios, cantidad),
+            'cercania': self._mejores(centralidad_cercania, matriz, usuarios, cantidad),
+            'error_cercania': error_cercania
+        }
+        
+        # Centralidades espectrales (vacias si la iteracion no converge)
+        for nombre, calcular in (('pagerank', self.motor.pagerank),
+                                 ('vector_propio', self.motor.vector_propio),
+                                 ('katz', self.motor.katz)):
+            try:
+                resultado[nombre] = self._mejores(calcular(), matriz, usuarios, cantidad)
+            except nx.PowerIterationFailedConvergence:
+                resultado[nombre] = []
+        return resultado
+    
+    def calcular_intermediacion(self, grafo: nx.Graph, usuarios: Dict[int, Usuario],
+                                version: Optional[int] = None,
+                                muestras: Optional[int] = MUESTRAS_INTERMEDIACION,
+                                workers: Optional[int] = None,
+                                semilla: Optional[int] = None, cantidad: int = 5) -> List[Dict]:
+        """
+        Usuarios con mayor intermediacion (intermediarios entre comunidades)
+        Se estima con muestras fuentes al azar (None: exacta, O(N * M)).
+        Retorna: los cantidad mejores, con la misma estructura que calcular_centralidad
+        """
+        if not grafo.nodes:
+            return []
+        matriz = self.motor.actualizar(grafo, version)
+        intermediacion = calcular_intermediacion(matriz, muestras=muestras,
+                                                 workers=workers, semilla=semilla)
+        return self._mejores(intermediacion, matriz, usuarios, cantidad)
+    
+    def _mejores(self, valores: np.ndarray, matriz: MatrizAdyacencia,
+                 usuarios: Dict[int, Usuario], cantidad: int = 5) -> List[Dict]:
+        """Los usuarios con mayores valores de una centralidad por posicion"""
+        mejores = posiciones_mejores(valores, cantidad)
+        return [
             {
                 'usuario': usuarios[node_id].nombre,
                 'id': node_id,
-                'centralidad': centralidad
+                'centralidad': float(valores[posicion])
             }
-            for node_id, centralidad in top_grado
+            for posicion, node_id in zip(mejores.tolist(), matriz.ids[mejores].tolist())
         ]
-        
-        # Centralidad de cercania (solo si el grafo esta conectado)
-        cercania_resultado = []
-        if nx.is_connected(grafo):
-            centralidad_cercania = nx.closeness_centrality(grafo)
-            top_cercania = sorted(centralidad_cercania.items(), 
-                                key=lambda x: x[1], reverse=True)[:5]
-            
-            cercania_resultado = [
-                {
-                    'usuario': usuarios[node_id].nombre,
-                    'id': node_id,
-                    'centralidad': centralidad
-                }
-                for node_id, centralidad in top_cercania
-            ]
-        
-        return {
-            'grado': grado_resultado,
-            'cercania': cercania_resultado
-        }
     
-    def detectar_comunidades(self, grafo: nx.Graph, 
-                           usuarios: Dict[int, Usuario]) -> List[List[Usuario]]:
-        """Detectar comunidades en la red"""
+    def detectar_comunidades(self, grafo: nx.Graph, usuarios: Dict[int, Usuario],
+                             version: Optional[int] = None) -> List[List[Usuario]]:
+        """
+        Detectar comunidades en la red con el detector configurado
+        Con la misma version se reutiliza la ultima particion; con una nueva
+        el detector parte de ella si admite arranque en caliente.
+        """
         if not grafo.nodes:
             return []
         
         try:
-            import networkx.algorithms.community as nx_comm
-            comunidades = list(nx_comm.greedy_modularity_communities(grafo))
+            comunidades = self.detector.detectar(grafo, version, self.motor.matriz)
             
             resultado = []
             for comunidad in comunidades:
@@ -95,7 +158,7 @@ class AnalizadorRed:
                 resultado.append(usuarios_comunidad)
             
             return resultado
-            
+        
         except Exception:
             # Fallback: usar componentes conectados
             componentes = list(nx.connected_components(grafo))
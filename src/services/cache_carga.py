@@ -0,0 +1,116 @@
+﻿# -*- coding: utf-8 -*-
+# cache_carga.py
+"""
+Cache binaria del estado cargado, validada con la huella de los archivos de datos
+"""
+import hashlib
+import os
+import pickle
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+FORMATO_CACHE = 2
+TAMANO_LECTURA = 1 << 20
+
+# (ruta, tamano, mtime_ns) o (ruta, None, None) si el archivo no existe
+Metadatos = Tuple[str, Optional[int], Optional[int]]
+
+class CacheCarga:
+    """
+    Guarda el estado ya construido del servicio (grafo y columnas de usuarios)
+    con pickle protocolo 5 y lo restaura si los archivos de datos no cambiaron
+    La huella de cada archivo es su tamano, mtime y hash SHA-1; el hash solo
+    se calcula si tamano y mtime coinciden. El archivo tiene dos objetos
+    pickle: una cabecera pequena con la huella y el estado, que solo se lee
+    si la huella coincide.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        # Resultado de la ultima restauracion: acierto, segundos, ahorro estimado
+        self.ultima_carga: Optional[Dict] = None
+
+    def restaurar(self, servicio) -> bool:
+        """Restaurar el estado en el servicio si la cache es valida. Retorna: True si acerto"""
+        inicio = time.perf_counter()
+        archivos = servicio.data_manager.archivos_datos()
+        acierto = False
+        segundos_parseo = None
+        if archivos:
+            try:
+                with open(self.ruta, 'rb') as f:
+                    cabecera = pickle.load(f)
+                    if (cabecera.get('formato') == FORMATO_CACHE and
+                            self._coincide(cabecera['huella'], archivos)):
+                        servicio._restaurar_estado_carga(pickle.load(f))
+                        segundos_parseo = cabecera['segundos_parseo']
+                        acierto = True
+            except FileNotFoundError:
+                pass
+            except (OSError, EOFError, pickle.UnpicklingError, KeyError, AttributeError) as e:
+                print(f"Cache de carga descartada: {e}")
+
+        segundos = time.perf_counter() - inicio
+        self.ultima_carga = {
+            'acierto': acierto,
+            'segundos': segundos,
+            'segundos_parseo': segundos_parseo,
+            'ahorro': max(0.0, segundos_parseo - segundos) if acierto else 0.0
+        }
+        return acierto
+
+    def guardar(self, servicio, segundos_parseo: float) -> bool:
+        """Escribir la cache con el estado recien cargado del servicio"""
+        archivos = servicio.data_manager.archivos_datos()
+        if not archivos:
+            return False
+        try:
+            cabecera = {
+                'formato': FORMATO_CACHE,
+                'huella': huella(archivos),
+                'segundos_parseo': segundos_parseo
+            }
+            with open(self.ruta + '.tmp', 'wb') as f:
+                pickle.dump(cabecera, f, protocol=5)
+                pickle.dump(servicio._estado_carga(), f, protocol=5)
+            os.replace(self.ruta + '.tmp', self.ruta)
+            return True
+        except OSError as e:
+            print(f"Error al guardar la cache de carga: {e}")
+            return False
+
+    def invalidar(self) -> None:
+        """Eliminar la cache"""
+        try:
+            os.remove(self.ruta)
+        except FileNotFoundError:
+            pass
+
+    def _coincide(self, guardada: List[Tuple], archivos: Sequence[str]) -> bool:
+        if [entrada[:3] for entrada in guardada] != [_metadatos(archivo) for archivo in archivos]:
+            return False
+        return [entrada[3] for entrada in guardada] == [_hash(archivo) for archivo in archivos]
+
+def huella(archivos: Sequence[str]) -> List[Tuple]:
+    """(ruta, tamano, mtime_ns, sha1) de cada archivo"""
+    return [_metadatos(archivo) + (_hash(archivo),) for archivo in archivos]
+
+def _metadatos(archivo: str) -> Metadatos:
+    try:
+        estado = os.stat(archivo)
+    except FileNotFoundError:
+        return (archivo, None, None)
+    return (archivo, estado.st_size, estado.st_mtime_ns)
+
+def _hash(archivo: str) -> Optional[str]:
+    resumen = hashlib.sha1()
+    try:
+        with open(archivo, 'rb') as f:
+            while True:
+                bloque = f.read(TAMANO_LECTURA)
+                if not bloque:
+                    break
+                resumen.update(bloque)
+    except FileNotFoundError:
+        return None
+    return resumen.hexdigest()
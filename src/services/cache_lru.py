@@ -0,0 +1,79 @@
+﻿# -*- coding: utf-8 -*-
+# cache_lru.py
+"""
+Cache LRU acotada con contadores de aciertos y fallos
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List
+
+class CacheLRU:
+    """Cache que descarta la entrada usada hace mas tiempo al superar su capacidad"""
+
+    def __init__(self, capacidad: int = 1024):
+        if capacidad < 0:
+            raise ValueError("La capacidad de la cache no puede ser negativa")
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def obtener(self, clave: Hashable, defecto: Any = None) -> Any:
+        """Obtener una entrada marcandola como usada recientemente"""
+        try:
+            valor = self._entradas[clave]
+        except KeyError:
+            self.fallos += 1
+            return defecto
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return valor
+
+    def guardar(self, clave: Hashable, valor: Any) -> None:
+        """Guardar una entrada, expulsando las menos recientes si no cabe"""
+        if self.capacidad == 0:
+            return
+        self._entradas[clave] = valor
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+    def invalidar(self, claves: Iterable[Hashable]) -> int:
+        """Eliminar las entradas indicadas. Retorna: cantidad eliminada"""
+        eliminadas = 0
+        for clave in claves:
+            if self._entradas.pop(clave, None) is not None:
+                eliminadas += 1
+        return eliminadas
+
+    def valores(self) -> List[Any]:
+        """Valores en cache, del menos al mas reciente (no cuentan como consultas)"""
+        return list(self._entradas.values())
+
+    def limpiar(self) -> None:
+        """Eliminar todas las entradas (los contadores se conservan)"""
+        self._entradas.clear()
+
+    def redimensionar(self, capacidad: int) -> None:
+        """Cambiar la capacidad descartando lo que sobre"""
+        if capacidad < 0:
+            raise ValueError("La capacidad de la cache no puede ser negativa")
+        self.capacidad = capacidad
+        while len(self._entradas) > capacidad:
+            self._entradas.popitem(last=False)
+
+    def estadisticas(self) -> Dict:
+        """Obtener tamano y contadores de la cache"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'capacidad': self.capacidad,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0
+        }
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._entradas
+
+    def __len__(self) -> int:
+        return len(self._entradas)
@@ -0,0 +1,153 @@
+﻿# -*- coding: utf-8 -*-
+# centralidad_cercania.py
+"""
+Centralidad de cercania (closeness) exacta o por muestreo, con las busquedas
+repartidas entre un pool de procesos
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from services.matriz_adyacencia import MatrizAdyacencia
+
+# Por debajo de esta cantidad de nodos el pool cuesta mas de lo que ahorra
+MINIMO_NODOS_PARALELO = 20_000
+# Cada tarea devuelve un array de N sumas: pocas tareas grandes por worker
+TAREAS_POR_WORKER = 4
+
+# (posiciones fuente, bit de cada una): hasta 64 bits por lote
+Lote = Tuple[np.ndarray, np.ndarray]
+
+# Estado de cada proceso worker, se construye una sola vez en el inicializador
+_estado_worker: Dict = {}
+
+
+def _inicializar_worker(indptr: np.ndarray, indices: np.ndarray) -> None:
+    """Reconstruir la adyacencia CSR dentro del worker"""
+    _estado_worker['matriz'] = MatrizAdyacencia.desde_csr(indptr, indices)
+
+
+def _procesar_lotes(lotes: List[Lote]) -> Tuple[np.ndarray, np.ndarray]:
+    return _acumular(_estado_worker['matriz'], lotes)
+
+
+def _acumular(matriz: MatrizAdyacencia, lotes: List[Lote]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sumar las distancias de varios lotes. Retorna: (sumas, sumas de cuadrados) por nodo"""
+    sumas = np.zeros(len(matriz), dtype=np.int64)
+    cuadrados = np.zeros(len(matriz), dtype=np.int64)
+    for fuentes, bits in lotes:
+        parciales, cuadrados_lote = matriz.distancias_acumuladas(fuentes, bits)
+        sumas += parciales
+        cuadrados += cuadrados_lote
+    return sumas, cuadrados
+
+
+def calcular_cercania(matriz: MatrizAdyacencia, muestras: Optional[int] = None,
+                      confianza: float = 0.95, workers: Optional[int] = None,
+                      semilla: Optional[int] = None,
+                      progreso: Optional[Callable[[int, int], None]] = None
+                      ) -> Tuple[np.ndarray, Optional[float]]:
+    """
+    Cercania de cada posicion de la matriz con la normalizacion de
+    Wasserman-Faust (la de networkx): (r / suma de distancias) * (r / (N - 1)),
+    con r los nodos alcanzables. Con grafos no conexos cada nodo se mide en
+    su componente.
+
+    Las fuentes van en lotes de 64 (un bit cada una) y, como las busquedas
+    de componentes distintas no se cruzan, todas las componentes comparten
+    los mismos lotes. Los lotes se reparten entre workers procesos (1 para
+    no usar pool; grafos chicos se calculan siempre en el proceso actual).
+
+    muestras: en las componentes de mas de muestras nodos solo se busca
+    desde esa cantidad de pivotes al azar (Eppstein-Wang) y la suma de
+    distancias de cada nodo se escala por tamano / muestras.
+    progreso(fuentes procesadas, total de fuentes)
+    Retorna: (cercania por posicion, error estimado). El error es None si el
+    calculo es exacto; si no, es la semiamplitud del intervalo de confianza
+    (aproximacion normal con la varianza muestral de las distancias de cada
+    nodo a los pivotes) de la distancia media, en saltos, la mayor entre los
+    nodos muestreados. Vale para cada nodo, no para todos a la vez.
+    Una cota de peor caso (Hoeffding con el diametro y union sobre los N
+    nodos) seria diametro * sqrt(ln(2N / (1 - confianza)) / (2 * muestras)):
+    varios saltos con los tamanos de muestra habituales, sin utilidad practica.
+    """
+    if muestras is not None and muestras < 2:
+        raise ValueError("muestras debe ser al menos 2")
+    if not 0 < confianza < 1:
+        raise ValueError("confianza debe estar entre 0 y 1")
+    n = len(matriz)
+    cercania = np.zeros(n, dtype=np.float64)
+    if n < 2:
+        return cercania, None
+
+    # Tamano de la componente de cada nodo y fuentes que le corresponden
+    etiquetas = matriz.componentes()
+    tamanos = np.bincount(etiquetas, minlength=n)[etiquetas]
+    fuentes_componente = tamanos if muestras is None else np.minimum(tamanos, muestras)
+
+    # Nodos agrupados por componente (al azar dentro de cada una al muestrear):
+    # el rango dentro de la componente decide si es fuente y con que lote y bit
+    if muestras is None:
+        orden = np.argsort(etiquetas, kind='stable')
+    else:
+        orden = np.lexsort((np.random.default_rng(semilla).random(n), etiquetas))
+    inicios = np.flatnonzero(np.r_[True, etiquetas[orden][1:] != etiquetas[orden][:-1]])
+    rangos = np.arange(n) - np.repeat(inicios, np.diff(np.r_[inicios, n]))
+    elegidas = (rangos < fuentes_componente[orden]) & (tamanos[orden] > 1)
+    fuentes, rangos = orden[elegidas], rangos[elegidas]
+    por_lote = np.argsort(rangos // 64, kind='stable')
+    fuentes, rangos = fuentes[por_lote], rangos[por_lote]
+    cortes = np.flatnonzero(np.diff(rangos // 64)) + 1
+    lotes = list(zip(np.split(fuentes, cortes), np.split(rangos % 64, cortes)))
+
+    workers = workers or os.cpu_count() or 1
+    if n < MINIMO_NODOS_PARALELO:
+        workers = 1
+    cantidad_tareas = min(len(lotes), workers * TAREAS_POR_WORKER) or 1
+    tareas = [lotes[indice::cantidad_tareas] for indice in range(cantidad_tareas)]
+
+    sumas = np.zeros(n, dtype=np.int64)
+    cuadrados = np.zeros(n, dtype=np.int64)
+    procesadas = 0
+
+    def incorporar(tarea: List[Lote], resultado: Tuple[np.ndarray, np.ndarray]) -> None:
+        nonlocal procesadas
+        np.add(sumas, resultado[0], out=sumas)
+        np.add(cuadrados, resultado[1], out=cuadrados)
+        procesadas += sum(fuentes_lote.size for fuentes_lote, _ in tarea)
+        if progreso:
+            progreso(procesadas, fuentes.size)
+
+    if workers == 1 or len(tareas) < 2:
+        # Sin pool: mismo codigo en el proceso actual
+        for tarea in tareas:
+            incorporar(tarea, _acumular(matriz, tarea))
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_inicializar_worker,
+                                 initargs=(matriz.indptr, matriz.indices)) as pool:
+            for tarea, resultado in zip(tareas, pool.map(_procesar_lotes, tareas)):
+                incorporar(tarea, resultado)
+
+    # Suma de distancias de cada nodo a toda su componente (escalada si se muestreo)
+    estimadas = sumas * (tamanos / np.maximum(fuentes_componente, 1))
+    alcanzables = tamanos - 1
+    con_distancia = estimadas > 0
+    cercania[con_distancia] = (alcanzables[con_distancia] / estimadas[con_distancia] *
+                               (alcanzables[con_distancia] / (n - 1)))
+
+    muestreadas = tamanos > fuentes_componente
+    if not muestreadas.any():
+        return cercania, None
+    # Varianza muestral de las distancias de cada nodo a sus k pivotes, con la
+    # correccion por poblacion finita (los pivotes se eligen sin reemplazo)
+    k = fuentes_componente[muestreadas].astype(np.float64)
+    tamanos_muestreados = tamanos[muestreadas]
+    medias = sumas[muestreadas] / k
+    varianzas = np.maximum(cuadrados[muestreadas] / k - medias * medias, 0) * k / (k - 1)
+    errores_estandar = np.sqrt(varianzas / k * (1 - k / tamanos_muestreados))
+    z = NormalDist().inv_cdf((1 + confianza) / 2)
+    # Error de la media sobre toda la componente llevado a la media sobre el resto
+    error = float((z * errores_estandar * tamanos_muestreados / (tamanos_muestreados - 1)).max())
+    return cercania, error
@@ -0,0 +1,136 @@
+﻿# -*- coding: utf-8 -*-
+# centralidad_intermediacion.py
+"""
+Centralidad de intermediacion (betweenness) de Brandes con muestreo de
+fuentes y pool de procesos
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from services.matriz_adyacencia import MatrizAdyacencia
+
+# Por debajo de esta cantidad de nodos el pool cuesta mas de lo que ahorra
+MINIMO_NODOS_PARALELO = 20_000
+# Cada tarea devuelve un array de N dependencias: pocas tareas grandes por worker
+TAREAS_POR_WORKER = 4
+# Fuentes muestreadas por defecto en el analizador
+MUESTRAS_INTERMEDIACION = 256
+
+# Estado de cada proceso worker, se construye una sola vez en el inicializador
+_estado_worker: Dict = {}
+
+
+def _inicializar_worker(indptr: np.ndarray, indices: np.ndarray) -> None:
+    """Reconstruir la adyacencia CSR dentro del worker"""
+    _estado_worker['matriz'] = MatrizAdyacencia.desde_csr(indptr, indices)
+
+
+def _procesar_fuentes(fuentes: np.ndarray) -> np.ndarray:
+    return _acumular(_estado_worker['matriz'], fuentes)
+
+
+def _acumular(matriz: MatrizAdyacencia, fuentes: np.ndarray) -> np.ndarray:
+    """Suma de las dependencias de varias fuentes"""
+    total = np.zeros(len(matriz), dtype=np.float64)
+    for fuente in fuentes.tolist():
+        total += _dependencias(matriz, fuente)
+    return total
+
+
+def _dependencias(matriz: MatrizAdyacencia, fuente: int) -> np.ndarray:
+    """
+    Dependencias de una fuente segun Brandes: BFS por niveles contando caminos
+    minimos (sigma) y acumulacion hacia atras sobre las aristas de cada nivel
+    Cada nivel se procesa en bloque, con coste proporcional a sus aristas.
+    """
+    n = len(matriz)
+    distancias = np.full(n, -1, dtype=np.int64)
+    distancias[fuente] = 0
+    sigma = np.zeros(n, dtype=np.float64)
+    sigma[fuente] = 1.0
+    # Aristas (origen, destino) que avanzan del nivel anterior a cada nivel
+    niveles = []
+    frontera = np.array([fuente], dtype=np.int64)
+    # Marca de los nodos del nivel siguiente (evita ordenar con np.unique)
+    en_frontera = np.zeros(n, dtype=bool)
+    nivel = 0
+    while frontera.size:
+        nivel += 1
+        origenes, destinos = matriz.aristas_desde(frontera)
+        distancias[destinos[distancias[destinos] < 0]] = nivel
+        avanzan = distancias[destinos] == nivel
+        origenes, destinos = origenes[avanzan], destinos[avanzan]
+        np.add.at(sigma, destinos, sigma[origenes])
+        niveles.append((origenes, destinos))
+        en_frontera[destinos] = True
+        frontera = np.flatnonzero(en_frontera)
+        en_frontera[frontera] = False
+
+    dependencias = np.zeros(n, dtype=np.float64)
+    for origenes, destinos in reversed(niveles):
+        np.add.at(dependencias, origenes,
+                  sigma[origenes] / sigma[destinos] * (1.0 + dependencias[destinos]))
+    dependencias[fuente] = 0.0
+    return dependencias
+
+
+def calcular_intermediacion(matriz: MatrizAdyacencia, muestras: Optional[int] = None,
+                            workers: Optional[int] = None, semilla: Optional[int] = None,
+                            progreso: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+    """
+    Intermediacion normalizada de cada posicion de la matriz, con la misma
+    escala que nx.betweenness_centrality (sin extremos)
+
+    muestras: cantidad de fuentes (pivotes) elegidas al azar; la suma de sus
+    dependencias se escala para estimar la de todas las fuentes (el
+    estimador insesgado de networkx con k). None usa todas las fuentes, que
+    cuesta O(N * M).
+    Las fuentes se reparten entre workers procesos (1 para no usar pool;
+    grafos chicos se calculan siempre en el proceso actual).
+    progreso(fuentes procesadas, total de fuentes)
+    """
+    if muestras is not None and muestras < 2:
+        raise ValueError("muestras debe ser al menos 2")
+    n = len(matriz)
+    if n < 3:
+        return np.zeros(n, dtype=np.float64)
+    if muestras is None or muestras >= n:
+        fuentes = np.arange(n, dtype=np.int64)
+    else:
+        fuentes = np.sort(np.random.default_rng(semilla).choice(n, size=muestras, replace=False))
+
+    workers = workers or os.cpu_count() or 1
+    if n < MINIMO_NODOS_PARALELO:
+        workers = 1
+    cantidad_tareas = min(fuentes.size, workers * TAREAS_POR_WORKER)
+    tareas: List[np.ndarray] = np.array_split(fuentes, cantidad_tareas)
+
+    dependencias = np.zeros(n, dtype=np.float64)
+    procesadas = 0
+
+    def incorporar(tarea: np.ndarray, resultado: np.ndarray) -> None:
+        nonlocal procesadas
+        np.add(dependencias, resultado, out=dependencias)
+        procesadas += tarea.size
+        if progreso:
+            progreso(procesadas, fuentes.size)
+
+    if workers == 1:
+        # Sin pool: mismo codigo en el proceso actual
+        for tarea in tareas:
+            incorporar(tarea, _acumular(matriz, tarea))
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_inicializar_worker,
+                                 initargs=(matriz.indptr, matriz.indices)) as pool:
+            for tarea, resultado in zip(tareas, pool.map(_procesar_fuentes, tareas)):
+                incorporar(tarea, resultado)
+
+    # Pares (s, t) posibles que pasan por cada nodo: las fuentes no cuentan a si mismas
+    pares = n - 2
+    if fuentes.size == n:
+        return dependencias / ((n - 1) * pares)
+    escala = np.full(n, 1.0 / (fuentes.size * pares))
+    escala[fuentes] = 1.0 / ((fuentes.size - 1) * pares)
+    return dependencias * escala
@@ -0,0 +1,102 @@
+﻿# -*- coding: utf-8 -*-
+# codificacion_aristas.py
+"""
+Codificacion compacta de conexiones: listas de adyacencia ordenadas con
+diferencias sucesivas (delta) y enteros de longitud variable (varint)
+"""
+import struct
+from typing import Tuple
+import numpy as np
+
+# Identifica el formato y su version al comienzo de los datos
+CABECERA = b'RSA1'
+
+def codificar_aristas(origenes: np.ndarray, destinos: np.ndarray) -> bytes:
+    """
+    Codificar conexiones no dirigidas (sin duplicados ni bucles)
+    Cada conexion se guarda una vez como (menor, mayor) dentro de la lista
+    del menor; se escriben tres secuencias de varints: saltos entre usuarios
+    con lista, largo de cada lista y saltos entre vecinos consecutivos.
+    """
+    origenes = np.asarray(origenes, dtype=np.int64)
+    destinos = np.asarray(destinos, dtype=np.int64)
+    validas = origenes != destinos
+    menores = np.minimum(origenes[validas], destinos[validas])
+    mayores = np.maximum(origenes[validas], destinos[validas])
+    if menores.size and menores.min() < 0:
+        raise ValueError("Los ids de usuario deben ser no negativos")
+
+    # Ordenar por (menor, mayor) y descartar duplicados
+    orden = np.lexsort((mayores, menores))
+    menores, mayores = menores[orden], mayores[orden]
+    distintas = np.ones(menores.size, dtype=bool)
+    distintas[1:] = (menores[1:] != menores[:-1]) | (mayores[1:] != mayores[:-1])
+    menores, mayores = menores[distintas], mayores[distintas]
+
+    filas, inicios, cantidades = np.unique(menores, return_index=True, return_counts=True)
+    saltos_filas = np.diff(filas, prepend=0)
+    # El primer vecino de cada lista se mide desde el propio usuario
+    saltos_vecinos = np.diff(mayores, prepend=0)
+    saltos_vecinos[inicios] = mayores[inicios] - filas
+
+    secuencias = [_codificar_varint(valores) for valores in (saltos_filas, cantidades, saltos_vecinos)]
+    largos = struct.pack('<3Q', *(len(secuencia) for secuencia in secuencias))
+    return CABECERA + largos + b''.join(secuencias)
+
+def decodificar_aristas(datos: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Inversa de codificar_aristas: retorna (origenes, destinos) con origen < destino"""
+    if not datos:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if datos[:len(CABECERA)] != CABECERA:
+        raise ValueError("Formato de conexiones no reconocido")
+    posicion = len(CABECERA)
+    largos = struct.unpack_from('<3Q', datos, posicion)
+    posicion += struct.calcsize('<3Q')
+    secuencias = []
+    for largo in largos:
+        secuencias.append(_decodificar_varint(np.frombuffer(datos, dtype=np.uint8,
+                                                            count=largo, offset=posicion)))
+        posicion += largo
+    saltos_filas, cantidades, saltos_vecinos = secuencias
+
+    filas = np.cumsum(saltos_filas)
+    origenes = np.repeat(filas, cantidades)
+    # Suma acumulada de los saltos reiniciada al comienzo de cada lista
+    acumulado = np.cumsum(saltos_vecinos)
+    finales = np.cumsum(cantidades) - 1
+    base = np.zeros(len(cantidades), dtype=np.int64)
+    base[1:] = acumulado[finales[:-1]]
+    destinos = acumulado - np.repeat(base, cantidades) + origenes
+    return origenes, destinos
+
+def _codificar_varint(valores: np.ndarray) -> bytes:
+    """Enteros no negativos a varint (7 bits por byte, el bit alto indica continuacion)"""
+    valores = np.asarray(valores, dtype=np.uint64)
+    if not valores.size:
+        return b''
+    bytes_por_valor = np.ones(valores.size, dtype=np.int64)
+    for k in range(1, 10):
+        bytes_por_valor += valores >= np.uint64(1 << (7 * k))
+    inicios = np.zeros(valores.size, dtype=np.int64)
+    np.cumsum(bytes_por_valor[:-1], out=inicios[1:])
+    salida = np.zeros(int(bytes_por_valor.sum()), dtype=np.uint8)
+    for k in range(int(bytes_por_valor.max())):
+        presentes = bytes_por_valor > k
+        grupo = (valores[presentes] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        continua = (bytes_por_valor[presentes] > k + 1).astype(np.uint64) << np.uint64(7)
+        salida[inicios[presentes] + k] = (grupo | continua).astype(np.uint8)
+    return salida.tobytes()
+
+def _decodificar_varint(datos: np.ndarray) -> np.ndarray:
+    """Secuencia de varints a int64"""
+    if not datos.size:
+        return np.zeros(0, dtype=np.int64)
+    finales = datos < 0x80
+    # Indice del valor al que pertenece cada byte y su posicion dentro de el
+    valor_de_byte = np.zeros(datos.size, dtype=np.int64)
+    np.cumsum(finales[:-1], out=valor_de_byte[1:])
+    inicios = np.zeros(int(finales.sum()), dtype=np.int64)
+    inicios[1:] = np.flatnonzero(finales)[:-1] + 1
+    desplazamiento = (np.arange(datos.size) - inicios[valor_de_byte]) * 7
+    partes = (datos & 0x7F).astype(np.uint64) << desplazamiento.astype(np.uint64)
+    return np.add.reduceat(partes, inicios).astype(np.int64)
@@ -3,14 +3,161 @@
 """
 Manejo de persistencia de datos - Implementa Repository Pattern
 """
+import gzip
+import io
 import json
+import lzma
 import os
-from typing import List, Dict, Tuple
+import re
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from typing import List, Dict, Hashable, Tuple, Iterator, Iterable, Optional
+import numpy as np
+from services.codificacion_aristas import codificar_aristas, decodificar_aristas
 
-class DataManager:
-    """Maneja la persistencia de datos en archivos JSON"""
+# Tamano de los bloques leidos por el lector incremental
+TAMANO_BLOQUE = 1 << 16
+# Tamano maximo de un registro: uno mayor (o invalido) aborta la lectura
+MAXIMO_REGISTRO = 1 << 24
+# Usuarios por bloque en iterar_bloques
+USUARIOS_POR_BLOQUE = 10_000
+
+# Serializa la confirmacion de un guardado y el reemplazo de los temporales
+# entre hilos (el escritor en segundo plano y las lecturas de la interfaz)
+_candado_guardado = threading.RLock()
+
+# Formato compacto: compresion -> (extension, funcion para abrir)
+COMPRESIONES = {
+    'gzip': ('.gz', gzip.open),
+    'lzma': ('.xz', lzma.open),
+}
+
+class RepositorioRed(ABC):
+    """Interfaz comun de los backends de persistencia de la red"""
+    
+    # True solo en los RepositorioIncremental, que implementan guardar_cambios
+    admite_cambios_incrementales = False
+    # obtener_usuario usa un indice (no recorre todos los usuarios): requisito
+    # de los perfiles diferidos, que leen un perfil por cada acceso
+    admite_lectura_por_id = False
+    
+    @abstractmethod
+    def iterar_usuarios(self) -> Iterator[Dict]:
+        """Generar los usuarios guardados como diccionarios (formato de Usuario.to_dict)"""
+        pass
+    
+    @abstractmethod
+    def iterar_conexiones(self) -> Iterator[Dict]:
+        """Generar las conexiones guardadas como {"origen": id, "destino": id}"""
+        pass
+    
+    @abstractmethod
+    def guardar_datos(self, usuarios: List[Dict], conexiones: List[Dict]) -> bool:
+        """Reemplazar los datos guardados"""
+        pass
+    
+    def archivos_datos(self) -> List[str]:
+        """Archivos de los que se leen los datos (vacio: no admite cache de carga)"""
+        return []
+    
+    def cargar_datos(self) -> Tuple[List[Dict], List[Dict]]:
+        """Cargar usuarios y conexiones como listas"""
+        return list(self.iterar_usuarios()), list(self.iterar_conexiones())
+    
+    def particiones(self) -> Dict[str, Hashable]:
+        """
+        Firma de cada particion de los datos, para detectar cambios en disco
+        La implementacion base es una sola particion ('') firmada con tamano y
+        mtime de archivos_datos(); sin archivos conocidos la firma es None y
+        cada comparacion la trata como modificada.
+        """
+        archivos = self.archivos_datos()
+        return {'': firma_archivos(archivos) if archivos else None}
+    
+    def rango_particion(self, clave: str) -> Optional[Tuple[int, int]]:
+        """
+        Rango [inicio, fin) de ids de usuario de una particion (None: todos)
+        Una conexion pertenece a la particion de su extremo menor.
+        """
+        return None
     
-    def __init__(self, directorio: str = None):
+    def leer_particion(self, clave: str) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        """Usuarios y conexiones (origenes, destinos) de una particion"""
+        usuarios, origenes, destinos = [], [], []
+        for registros, bloque_origen, bloque_destino in self.iterar_bloques():
+            usuarios.extend(registros)
+            origenes.append(bloque_origen)
+            destinos.append(bloque_destino)
+        return usuarios, np.concatenate(origenes), np.concatenate(destinos)
+    
+    def iterar_bloques(self) -> Iterator[Tuple[List[Dict], np.ndarray, np.ndarray]]:
+        """
+        Generar la red por bloques (usuarios, origenes, destinos) para cargarla
+        La implementacion base entrega los usuarios de iterar_usuarios por tandas
+        y las conexiones de cargar_aristas en el ultimo bloque.
+        """
+        vacio = np.zeros(0, dtype=np.int64)
+        bloque = []
+        for usuario in self.iterar_usuarios():
+            bloque.append(usuario)
+            if len(bloque) == USUARIOS_POR_BLOQUE:
+                yield bloque, vacio, vacio
+                bloque = []
+        origenes, destinos = self.cargar_aristas()
+        yield bloque, origenes, destinos
+    
+    def cargar_topologia(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Cargar solo los ids de usuario y las conexiones, sin crear perfiles
+        Retorna: (ids, origenes, destinos) como arrays int64
+        """
+        ids, amigos_origen, amigos_destino = array('q'), array('q'), array('q')
+        origenes, destinos = [], []
+        for registros, bloque_origen, bloque_destino in self.iterar_bloques():
+            for registro in registros:
+                amigos = registro.get('amigos') or ()
+                ids.append(registro['id'])
+                amigos_origen.extend([registro['id']] * len(amigos))
+                amigos_destino.extend(amigos)
+            origenes.append(bloque_origen)
+            destinos.append(bloque_destino)
+        origenes.append(np.frombuffer(amigos_origen, dtype=np.int64))
+        destinos.append(np.frombuffer(amigos_destino, dtype=np.int64))
+        return np.frombuffer(ids, dtype=np.int64), np.concatenate(origenes), np.concatenate(destinos)
+    
+    def obtener_usuario(self, usuario_id: int) -> Optional[Dict]:
+        """Leer un unico usuario por id (los backends con indice lo hacen sin recorrer todo)"""
+        return next((u for u in self.iterar_usuarios() if u['id'] == usuario_id), None)
+    
+    def cargar_aristas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cargar las conexiones como dos arrays int64 (origenes, destinos)"""
+        origenes, destinos = array('q'), array('q')
+        for conexion in self.iterar_conexiones():
+            origenes.append(conexion['origen'])
+            destinos.append(conexion['destino'])
+        return np.frombuffer(origenes, dtype=np.int64), np.frombuffer(destinos, dtype=np.int64)
+
+class RepositorioIncremental(RepositorioRed):
+    """Backend que puede escribir solo los usuarios y conexiones modificados"""
+    
+    admite_cambios_incrementales = True
+    
+    @abstractmethod
+    def guardar_cambios(self, usuarios: List[Dict], usuarios_eliminados: Iterable[int],
+                        conexiones: Iterable[Tuple[int, int]],
+                        conexiones_eliminadas: Iterable[Tuple[int, int]]) -> bool:
+        """Escribir usuarios y conexiones modificados y borrar los eliminados"""
+        pass
+
+class DataManager(RepositorioRed):
+    """
+    Maneja la persistencia de datos en archivos JSON
+    Con compresion ('gzip' o 'lzma') usa el formato compacto: usuarios sin
+    lista de amigos y conexiones como adyacencia delta + varint comprimida.
+    """
+    
+    def __init__(self, directorio: str = None, compresion: str = None):
         # Get the project root directory (3 levels up from services folder)
         if directorio is None:
             current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,8 +165,23 @@ class DataManager:
             self.directorio = os.path.join(project_root, 'data')
         else:
             self.directorio = directorio
-        self.archivo_usuarios = os.path.join(self.directorio, 'usuarios.json')
-        self.archivo_conexiones = os.path.join(self.directorio, 'conexiones.json')
+        if compresion is not None and compresion not in COMPRESIONES:
+            raise ValueError(f"Compresion no soportada: {compresion}")
+        self.compresion = compresion
+        if compresion is None:
+            self.archivo_usuarios = os.path.join(self.directorio, 'usuarios.json')
+            self.archivo_conexiones = os.path.join(self.directorio, 'conexiones.json')
+        else:
+            extension = COMPRESIONES[compresion][0]
+            self.archivo_usuarios = os.path.join(self.directorio, 'usuarios.json' + extension)
+            self.archivo_conexiones = os.path.join(self.directorio, 'conexiones.bin' + extension)
+        # Existe mientras se reemplazan los archivos: marca un guardado confirmado
+        self.archivo_marcador = os.path.join(self.directorio, 'guardado.pendiente')
+    
+    def archivos_datos(self) -> List[str]:
+        # Un guardado confirmado pero sin completar cambia los archivos al leerlos
+        self._completar_guardado()
+        return [self.archivo_usuarios, self.archivo_conexiones]
     
     def cargar_datos(self) -> Tuple[List[Dict], List[Dict]]:
         """Cargar usuarios y conexiones desde archivos JSON"""
@@ -27,11 +189,51 @@ class DataManager:
         conexiones = self._cargar_conexiones()
         return usuarios, conexiones
     
+    def iterar_usuarios(self) -> Iterator[Dict]:
+        """Leer usuarios uno a uno sin cargar el archivo completo"""
+        return self._iterar_registros(self.archivo_usuarios, 'usuarios')
+    
+    def iterar_conexiones(self) -> Iterator[Dict]:
+        """Leer conexiones una a una sin cargar el archivo completo"""
+        if self.compresion is not None:
+            return ({"origen": origen, "destino": destino}
+                    for origen, destino in zip(*(a.tolist() for a in self.cargar_aristas())))
+        return self._iterar_registros(self.archivo_conexiones, 'conexiones')
+    
+    def cargar_aristas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cargar las conexiones como dos arrays int64 (origenes, destinos)"""
+        if self.compresion is None:
+            return super().cargar_aristas()
+        self._completar_guardado()
+        try:
+            with COMPRESIONES[self.compresion][1](self.archivo_conexiones, 'rb') as f:
+                return decodificar_aristas(f.read())
+        except FileNotFoundError:
+            return decodificar_aristas(b'')
+    
     def guardar_datos(self, usuarios: List[Dict], conexiones: List[Dict]) -> bool:
-        """Guardar usuarios y conexiones en archivos JSON"""
+        """
+        Guardar usuarios y conexiones en archivos JSON
+        Ambos archivos se escriben primero como temporales; el marcador confirma
+        el guardado y, si el reemplazo se interrumpe, la siguiente lectura lo
+        completa. Nunca quedan un archivo nuevo y el otro viejo.
+        """
         try:
+            if self.compresion is not None:
+                # Los amigos se derivan de las conexiones: se guardan solo ahi
+                conexiones = conexiones + [
+                    {"origen": usuario['id'], "destino": amigo}
+                    for usuario in usuarios for amigo in usuario.get('amigos', ())
+                ]
+                usuarios = [{clave: valor for clave, valor in usuario.items() if clave != 'amigos'}
+                            for usuario in usuarios]
             self._guardar_usuarios(usuarios)
             self._guardar_conexiones(conexiones)
+            with _candado_guardado:
+                with open(self.archivo_marcador, 'w', encoding='utf-8') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._completar_guardado()
             return True
         except Exception as e:
             print(f"Error al guardar datos: {e}")
@@ -39,36 +241,62 @@ class DataManager:
     
     def _cargar_usuarios(self) -> List[Dict]:
         """Cargar usuarios desde archivo JSON"""
-        try:
-            with open(self.archivo_usuarios, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('usuarios', [])
-        except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            print(f"Error al leer {self.archivo_usuarios}")
-            return []
+        return list(self.iterar_usuarios())
     
     def _cargar_conexiones(self) -> List[Dict]:
         """Cargar conexiones desde archivo JSON"""
+        return list(self.iterar_conexiones())
+    
+    def _iterar_registros(self, archivo: str, clave: str) -> Iterator[Dict]:
+        """
+        Recorrer el array 'clave' de un archivo {"clave": [...]} elemento a elemento
+        Solo mantiene en memoria un bloque del archivo y el registro actual.
+        """
+        self._completar_guardado()
+        abrir = open if self.compresion is None else COMPRESIONES[self.compresion][1]
         try:
-            with open(self.archivo_conexiones, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('conexiones', [])
+            with abrir(archivo, 'rt', encoding='utf-8') as f:
+                yield from _leer_array_json(f, clave)
         except FileNotFoundError:
-            return []
-        except json.JSONDecodeError:
-            print(f"Error al leer {self.archivo_conexiones}")
-            return []
+            return
+        except (json.JSONDecodeError, EOFError, OSError, lzma.LZMAError) as e:
+            # Los registros ya generados no bastan: la carga se descarta completa
+            raise ValueError(f"Error al leer {archivo}: {e}") from e
+    
+    def _completar_guardado(self) -> None:
+        """
+        Reemplazar los archivos por los temporales de un guardado confirmado
+        El candado evita que dos hilos completen el mismo guardado a la vez
+        (y que uno lea mientras el otro reemplaza); cada paso tolera ademas
+        que otro proceso lo haya hecho antes.
+        """
+        with _candado_guardado:
+            if not os.path.exists(self.archivo_marcador):
+                return
+            for archivo in (self.archivo_usuarios, self.archivo_conexiones):
+                try:
+                    os.replace(archivo + '.tmp', archivo)
+                except FileNotFoundError:
+                    pass
+            try:
+                os.remove(self.archivo_marcador)
+            except FileNotFoundError:
+                pass
     
     def _guardar_usuarios(self, usuarios: List[Dict]) -> None:
-        """Guardar usuarios en archivo JSON"""
+        """Guardar usuarios en el temporal del archivo JSON"""
         data = {"usuarios": usuarios}
-        with open(self.archivo_usuarios, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        _escribir_json(self.archivo_usuarios + '.tmp', data, self.compresion)
     
     def _guardar_conexiones(self, conexiones: List[Dict]) -> None:
-        """Guardar conexiones en archivo JSON"""
+        """Guardar conexiones en el temporal del archivo JSON"""
+        if self.compresion is not None:
+            origenes = np.fromiter((c['origen'] for c in conexiones), dtype=np.int64, count=len(conexiones))
+            destinos = np.fromiter((c['destino'] for c in conexiones), dtype=np.int64, count=len(conexiones))
+            datos = codificar_aristas(origenes, destinos)
+            _escribir_archivo(self.archivo_conexiones + '.tmp', lambda f: f.write(datos), self.compresion)
+            return
+        
         # Evitar duplicados
         conexiones_unicas = []
         aristas_procesadas = set()
@@ -83,5 +311,91 @@ class DataManager:
                 aristas_procesadas.add(arista)
         
         data = {"conexiones": conexiones_unicas}
-        with open(self.archivo_conexiones, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        _escribir_json(self.archivo_conexiones + '.tmp', data)
+
+def firma_archivos(archivos: Iterable[str]) -> Tuple:
+    """(tamano, mtime_ns) de cada archivo, None si no existe"""
+    firma = []
+    for archivo in archivos:
+        try:
+            estado = os.stat(archivo)
+            firma.append((estado.st_size, estado.st_mtime_ns))
+        except FileNotFoundError:
+            firma.append(None)
+    return tuple(firma)
+
+def _escribir_json(archivo: str, data: Dict, compresion: str = None) -> None:
+    """Escribir data como JSON (legible, o compacto si se comprime)"""
+    def volcar(f):
+        texto = io.TextIOWrapper(f, encoding='utf-8')
+        if compresion is None:
+            json.dump(data, texto, ensure_ascii=False, indent=2)
+        else:
+            json.dump(data, texto, ensure_ascii=False, separators=(',', ':'))
+        texto.flush()
+        texto.detach()
+    _escribir_archivo(archivo, volcar, compresion)
+
+def _escribir_archivo(archivo: str, escribir, compresion: str = None) -> None:
+    """Escribir un archivo (comprimido si corresponde) y forzar que llegue al disco"""
+    with open(archivo, 'wb') as crudo:
+        if compresion is None:
+            escribir(crudo)
+        else:
+            with COMPRESIONES[compresion][1](crudo, 'wb') as comprimido:
+                escribir(comprimido)
+        crudo.flush()
+        os.fsync(crudo.fileno())
+
+def _leer_array_json(f, clave: str) -> Iterator[Dict]:
+    """Generar los elementos del array asociado a 'clave' leyendo f por bloques"""
+    decoder = json.JSONDecoder()
+    inicio_array = re.compile(r'"%s"\s*:\s*\[' % re.escape(clave))
+    buffer = ''
+    fin_archivo = False
+    
+    def leer_bloque(conservar: str, tamano: int = TAMANO_BLOQUE) -> str:
+        nonlocal fin_archivo
+        bloque = f.read(tamano)
+        fin_archivo = not bloque
+        return conservar + bloque
+    
+    # Avanzar hasta el comienzo del array
+    while True:
+        coincidencia = inicio_array.search(buffer)
+        if coincidencia:
+            pos = coincidencia.end()
+            break
+        if fin_archivo:
+            return
+        buffer = leer_bloque(buffer[-(len(clave) + 64):])
+    
+    while True:
+        # Saltar espacios y separadores
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos == len(buffer):
+            if fin_archivo:
+                raise json.JSONDecodeError("Array sin cerrar", buffer, pos)
+            buffer, pos = leer_bloque(buffer[pos:]), 0
+            continue
+        if buffer[pos] == ']':
+            return
+        
+        try:
+            registro, fin = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Registro incompleto: leer mas datos y reintentar. La lectura
+            # duplica lo pendiente (reintentos logaritmicos) hasta MAXIMO_REGISTRO
+            pendiente = len(buffer) - pos
+            if fin_archivo or pendiente > MAXIMO_REGISTRO:
+                raise
+            buffer, pos = leer_bloque(buffer[pos:], max(TAMANO_BLOQUE, pendiente)), 0
+            continue
+        if fin == len(buffer) and not fin_archivo:
+            # Un valor al final del bloque podria continuar (p. ej. un numero)
+            buffer, pos = leer_bloque(buffer[pos:]), 0
+            continue
+        
+        yield registro
+        pos = fin
@@ -0,0 +1,187 @@
+﻿# -*- coding: utf-8 -*-
+# detector_comunidades.py
+"""
+Deteccion de comunidades - Strategy Pattern con arranque en caliente
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+import networkx as nx
+import numpy as np
+from services.matriz_adyacencia import MatrizAdyacencia
+
+try:
+    import community as community_louvain  # python-louvain
+except ImportError:  # python-louvain es opcional
+    community_louvain = None
+
+# Rondas maximas de la propagacion de etiquetas
+MAX_RONDAS_PROPAGACION = 100
+
+class DetectorComunidades(ABC):
+    """
+    Interfaz de los algoritmos de deteccion de comunidades
+    Conserva la ultima particion: si la version del grafo no cambio se
+    reutiliza y, si cambio, los algoritmos que lo admiten parten de ella
+    (arranque en caliente) en lugar de empezar desde cero.
+    """
+
+    # Si es False cada deteccion empieza desde cero
+    admite_arranque_en_caliente = True
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        # Comunidad de cada nodo en la ultima deteccion
+        self.particion: Dict[int, int] = {}
+
+    def detectar(self, grafo: nx.Graph, version: Optional[int] = None,
+                 adyacencia: Optional[MatrizAdyacencia] = None) -> List[List[int]]:
+        """
+        Comunidades del grafo como listas de ids, de mayor a menor tamano
+        version=None fuerza la deteccion. adyacencia: matriz compartida que
+        usan los algoritmos sobre CSR en lugar de construir la suya.
+        """
+        if version is None or version != self.version:
+            inicial = self._particion_inicial(grafo) if self.admite_arranque_en_caliente else None
+            self.particion = self._detectar(grafo, version, inicial)
+            self.version = version
+        return _agrupar(self.particion)
+
+    def reiniciar(self) -> None:
+        """Descartar la ultima particion: la proxima deteccion empieza desde cero"""
+        self.version = None
+        self.particion = {}
+
+    def _particion_inicial(self, grafo: nx.Graph) -> Optional[Dict[int, int]]:
+        """Ultima particion restringida a los nodos actuales; cada nodo nuevo queda solo"""
+        if not self.particion:
+            return None
+        anterior = self.particion
+        nueva = max(anterior.values()) + 1
+        inicial = {}
+        for nodo in grafo.nodes:
+            comunidad = anterior.get(nodo)
+            if comunidad is None:
+                comunidad, nueva = nueva, nueva + 1
+            inicial[nodo] = comunidad
+        return inicial
+
+    @abstractmethod
+    def _detectar(self, grafo: nx.Graph, version: Optional[int],
+                  inicial: Optional[Dict[int, int]]) -> Dict[int, int]:
+        """Comunidad de cada nodo, partiendo de la particion inicial si no es None"""
+        pass
+
+class DeteccionModularidadVoraz(DetectorComunidades):
+    """Modularidad voraz de networkx (Clauset-Newman-Moore), siempre desde cero"""
+
+    admite_arranque_en_caliente = False
+
+    def _detectar(self, grafo, version, inicial):
+        comunidades = nx.community.greedy_modularity_communities(grafo)
+        return {nodo: indice for indice, comunidad in enumerate(comunidades) for nodo in comunidad}
+
+class DeteccionLouvain(DetectorComunidades):
+    """
+    Louvain (python-louvain): mueve nodos entre comunidades mientras suba la
+    modularidad y repite sobre el grafo de comunidades
+    En caliente el primer nivel parte de la particion anterior, por lo que
+    tras pocas ediciones converge en una o dos pasadas.
+    """
+
+    def __init__(self, resolucion: float = 1.0, semilla: Optional[int] = None):
+        if community_louvain is None:
+            raise ImportError("DeteccionLouvain requiere python-louvain")
+        super().__init__()
+        self.resolucion = resolucion
+        self.semilla = semilla
+
+    def _detectar(self, grafo, version, inicial):
+        return community_louvain.best_partition(grafo, partition=inicial,
+                                                resolution=self.resolucion,
+                                                random_state=self.semilla)
+
+class DeteccionPropagacionEtiquetas(DetectorComunidades):
+    """
+    Propagacion de etiquetas vectorizada sobre la adyacencia CSR
+    Cada nodo adopta la etiqueta mas frecuente entre sus vecinos hasta que
+    ninguno cambia. En caliente las etiquetas iniciales son la particion
+    anterior: tras una ronda completa solo se revisan los alrededores de
+    los nodos que cambian.
+    """
+
+    def __init__(self, max_rondas: int = MAX_RONDAS_PROPAGACION, semilla: Optional[int] = None):
+        super().__init__()
+        self.max_rondas = max_rondas
+        self.semilla = semilla
+        self.matriz = MatrizAdyacencia()
+
+    def detectar(self, grafo, version=None, adyacencia=None):
+        if adyacencia is not None:
+            self.matriz = adyacencia
+        return super().detectar(grafo, version)
+
+    def _detectar(self, grafo, version, inicial):
+        matriz = self.matriz.actualizar(grafo, version)
+        ids = matriz.ids.tolist()
+        if inicial is None:
+            etiquetas = np.arange(len(ids), dtype=np.int64)
+        else:
+            etiquetas = np.fromiter((inicial[nodo] for nodo in ids), dtype=np.int64, count=len(ids))
+        etiquetas = _propagar(matriz, etiquetas, np.random.default_rng(self.semilla), self.max_rondas)
+        return dict(zip(ids, etiquetas.tolist()))
+
+def crear_detector_por_defecto() -> DetectorComunidades:
+    """Louvain si python-louvain esta instalado; si no, propagacion de etiquetas"""
+    if community_louvain is None:
+        return DeteccionPropagacionEtiquetas()
+    return DeteccionLouvain()
+
+def _agrupar(particion: Dict[int, int]) -> List[List[int]]:
+    """Listas de nodos por comunidad, de mayor a menor tamano"""
+    grupos: Dict[int, List[int]] = {}
+    for nodo, comunidad in particion.items():
+        grupos.setdefault(comunidad, []).append(nodo)
+    return sorted(grupos.values(), key=len, reverse=True)
+
+def _propagar(matriz: MatrizAdyacencia, etiquetas: np.ndarray,
+              rng: np.random.Generator, max_rondas: int) -> np.ndarray:
+    """
+    Propagacion semisincronica: en cada ronda los nodos activos eligen la
+    etiqueta mas frecuente entre sus vecinos (empates al azar, conservando
+    la propia si esta entre las mas frecuentes) y solo la mitad al azar de
+    los que cambian lo hace, lo que evita las oscilaciones de la version
+    sincronica. La ronda siguiente revisa los vecinos de los que cambiaron
+    y los que quedaron pendientes.
+    """
+    etiquetas = etiquetas.copy()
+    activos = np.flatnonzero(matriz.grados)
+    en_ronda = np.zeros(len(matriz), dtype=bool)
+    for _ in range(max_rondas):
+        if activos.size == 0:
+            break
+        # Cantidad de vecinos de cada nodo activo con cada etiqueta
+        origenes, destinos = matriz.aristas_desde(activos)
+        candidatas = etiquetas[destinos]
+        orden = np.lexsort((candidatas, origenes))
+        origenes, candidatas = origenes[orden], candidatas[orden]
+        inicios = np.flatnonzero(np.r_[True, (origenes[1:] != origenes[:-1]) |
+                                       (candidatas[1:] != candidatas[:-1])])
+        conteos = np.diff(np.r_[inicios, origenes.size])
+        nodos, candidatas = origenes[inicios], candidatas[inicios]
+
+        # Desempate al azar en [0, 0.5); la etiqueta propia suma 0.5 y gana los empates
+        puntajes = conteos + 0.5 * rng.random(conteos.size) + 0.5 * (candidatas == etiquetas[nodos])
+        orden = np.lexsort((puntajes, nodos))
+        mejores = orden[np.r_[nodos[orden][1:] != nodos[orden][:-1], True]]
+        nodos, elegidas = nodos[mejores], candidatas[mejores]
+        cambian = elegidas != etiquetas[nodos]
+        nodos, elegidas = nodos[cambian], elegidas[cambian]
+
+        aplicar = rng.random(nodos.size) < 0.5
+        etiquetas[nodos[aplicar]] = elegidas[aplicar]
+        _, vecinos = matriz.aristas_desde(nodos[aplicar])
+        en_ronda[vecinos] = True
+        en_ronda[nodos[~aplicar]] = True
+        activos = np.flatnonzero(en_ronda)
+        en_ronda[activos] = False
+    return etiquetas
@@ -0,0 +1,241 @@
+﻿# -*- coding: utf-8 -*-
+# estadisticas_incrementales.py
+"""
+Estadisticas de la red mantenidas con cada cambio (conteos y componentes conexas)
+"""
+from collections import deque
+from typing import Dict, Hashable, Iterable, List
+import networkx as nx
+
+class EstadisticasIncrementales:
+    """
+    Cantidad de nodos y aristas, suma de grados y componentes conexas de un
+    grafo no dirigido, actualizadas con cada alta o baja en lugar de recorrer
+    el grafo al consultarlas
+
+    Las componentes son un union-find sobre elementos: cada nodo tiene un
+    elemento y cada raiz cuenta sus nodos vivos. Agregar nodos o aristas es
+    casi O(1). Al quitar una arista o un nodo se buscan a la vez, por
+    anchura, los trozos que pueden separarse y se corta en cuanto solo queda
+    uno por completar, asi que el costo es el de los trozos menores. Los
+    nodos de un trozo separado reciben elementos nuevos y los anteriores
+    quedan como fantasmas del conjunto original (siguen sirviendo de camino
+    hacia su raiz); cuando superan a los vivos se reconstruye todo.
+    """
+
+    def __init__(self):
+        self.num_nodos = 0
+        self.num_aristas = 0
+        self.suma_grados = 0
+        self.componentes = 0
+        # nodo -> elemento del union-find
+        self._elemento: Dict[Hashable, int] = {}
+        self._padre: List[int] = []
+        # Nodos vivos de cada raiz (0 en los elementos que no son raiz)
+        self._vivos: List[int] = []
+        self._fantasmas = 0
+
+    def reconstruir(self, grafo: nx.Graph) -> None:
+        """Recalcular todo desde el grafo"""
+        self.__init__()
+        self.num_nodos = grafo.number_of_nodes()
+        self.num_aristas = grafo.number_of_edges()
+        self.suma_grados = 2 * self.num_aristas
+        for componente in nx.connected_components(grafo):
+            self._nuevo_conjunto(componente)
+
+    def resumen(self) -> Dict:
+        """Estadisticas generales, con las mismas claves que calcular_estadisticas_generales"""
+        n = self.num_nodos
+        if n == 0:
+            return {
+                'num_personas': 0,
+                'num_conexiones': 0,
+                'densidad': 0,
+                'grado_promedio': 0,
+                'componentes_conectados': 0,
+                'es_conectado': False
+            }
+        # Misma expresion que nx.density para obtener el mismo valor
+        densidad = 0 if self.num_aristas == 0 or n <= 1 else self.num_aristas / (n * (n - 1)) * 2
+        return {
+            'num_personas': n,
+            'num_conexiones': self.num_aristas,
+            'densidad': densidad,
+            'grado_promedio': self.suma_grados / n,
+            'componentes_conectados': self.componentes,
+            'es_conectado': self.componentes == 1
+        }
+
+    def coincide_con(self, grafo: nx.Graph) -> bool:
+        """Comprobar conteos y particion en componentes contra un recorrido completo"""
+        if (self.num_nodos, self.num_aristas, self.suma_grados) != (
+                grafo.number_of_nodes(), grafo.number_of_edges(),
+                2 * grafo.number_of_edges()):
+            return False
+        raices = set()
+        total = 0
+        for componente in nx.connected_components(grafo):
+            raices_componente = {self._raiz(nodo) for nodo in componente}
+            if len(raices_componente) != 1 or raices_componente & raices:
+                return False
+            raices |= raices_componente
+            total += 1
+        return total == self.componentes and len(self._elemento) == self.num_nodos
+
+    # === ALTAS ===
+
+    def agregar_nodo(self, nodo: Hashable) -> None:
+        """Registrar un nodo nuevo (aislado)"""
+        if nodo in self._elemento:
+            return
+        self.num_nodos += 1
+        self._nuevo_conjunto((nodo,))
+
+    def agregar_arista(self, origen: Hashable, destino: Hashable) -> None:
+        """Registrar una arista nueva entre nodos ya registrados"""
+        self.num_aristas += 1
+        self.suma_grados += 2
+        self._unir(origen, destino)
+
+    def agregar_aristas(self, aristas: Iterable, nuevas: int) -> None:
+        """Registrar un bloque de aristas, de las cuales nuevas no estaban en el grafo"""
+        self.num_aristas += nuevas
+        self.suma_grados += 2 * nuevas
+        for origen, destino in aristas:
+            self._unir(origen, destino)
+
+    # === BAJAS ===
+
+    def quitar_arista(self, grafo: nx.Graph, origen: Hashable, destino: Hashable) -> None:
+        """Registrar la baja de una arista, ya quitada del grafo"""
+        self.num_aristas -= 1
+        self.suma_grados -= 2
+        self._separar(grafo, (origen, destino))
+
+    def quitar_nodo(self, grafo: nx.Graph, nodo: Hashable, vecinos: Iterable[Hashable]) -> None:
+        """Registrar la baja de un nodo y sus aristas, ya quitados del grafo"""
+        vecinos = list(vecinos)
+        self.num_nodos -= 1
+        self.num_aristas -= len(vecinos)
+        self.suma_grados -= 2 * len(vecinos)
+        self._descartar_elemento(self._elemento.pop(nodo))
+        if len(vecinos) > 1:
+            self._separar(grafo, vecinos)
+        self._compactar_si_conviene(grafo)
+
+    # === UNION-FIND ===
+
+    def _raiz(self, nodo: Hashable) -> int:
+        padre = self._padre
+        elemento = self._elemento[nodo]
+        raiz = elemento
+        while padre[raiz] != raiz:
+            raiz = padre[raiz]
+        # Compresion de caminos
+        while padre[elemento] != raiz:
+            padre[elemento], elemento = raiz, padre[elemento]
+        return raiz
+
+    def _unir(self, origen: Hashable, destino: Hashable) -> None:
+        raiz_origen, raiz_destino = self._raiz(origen), self._raiz(destino)
+        if raiz_origen == raiz_destino:
+            return
+        vivos = self._vivos
+        # Union por cantidad de nodos vivos
+        if vivos[raiz_origen] < vivos[raiz_destino]:
+            raiz_origen, raiz_destino = raiz_destino, raiz_origen
+        self._padre[raiz_destino] = raiz_origen
+        vivos[raiz_origen] += vivos[raiz_destino]
+        vivos[raiz_destino] = 0
+        self.componentes -= 1
+
+    def _nuevo_conjunto(self, nodos: Iterable[Hashable]) -> None:
+        """Asignar elementos nuevos a nodos que forman una componente"""
+        raiz = len(self._padre)
+        cantidad = 0
+        for nodo in nodos:
+            self._elemento[nodo] = len(self._padre)
+            self._padre.append(raiz)
+            self._vivos.append(0)
+            cantidad += 1
+        if cantidad:
+            self._vivos[raiz] = cantidad
+            self.componentes += 1
+
+    def _descartar_elemento(self, elemento: int) -> None:
+        """Dejar un elemento como fantasma de su conjunto"""
+        raiz = elemento
+        while self._padre[raiz] != raiz:
+            raiz = self._padre[raiz]
+        self._vivos[raiz] -= 1
+        if self._vivos[raiz] == 0:
+            self.componentes -= 1
+        self._fantasmas += 1
+
+    def _separar(self, grafo: nx.Graph, semillas: List[Hashable]) -> None:
+        """
+        Detectar si las semillas (antes conectadas entre si) quedaron en trozos
+        distintos y dar a cada trozo separado su propio conjunto
+        Cada busqueda expande un nodo por turno; las que se encuentran se
+        fusionan y la que se agota es un trozo completo. La ultima busqueda
+        activa es el trozo que conserva los elementos originales.
+        """
+        semillas = list(dict.fromkeys(semillas))
+        if len(semillas) < 2:
+            return
+        adyacencia = grafo.adj
+        # Busqueda de cada nodo visitado; busquedas fusionadas con un union-find propio
+        busqueda_de = {semilla: indice for indice, semilla in enumerate(semillas)}
+        fusion = list(range(len(semillas)))
+        frentes = {indice: deque((semilla,)) for indice, semilla in enumerate(semillas)}
+        visitados = {indice: [semilla] for indice, semilla in enumerate(semillas)}
+
+        def raiz_busqueda(indice: int) -> int:
+            while fusion[indice] != indice:
+                fusion[indice] = fusion[fusion[indice]]
+                indice = fusion[indice]
+            return indice
+
+        while len(frentes) > 1:
+            for indice in list(frentes):
+                if indice not in frentes or len(frentes) == 1:
+                    continue
+                frente = frentes[indice]
+                nodo = frente.popleft()
+                for vecino in adyacencia[nodo]:
+                    otra = busqueda_de.get(vecino)
+                    if otra is None:
+                        busqueda_de[vecino] = indice
+                        frente.append(vecino)
+                        visitados[indice].append(vecino)
+                        continue
+                    otra = raiz_busqueda(otra)
+                    if otra == indice:
+                        continue
+                    # Se encontraron: la de menos visitados se suma a la otra
+                    mayor, menor = ((indice, otra) if len(visitados[indice]) >= len(visitados[otra])
+                                    else (otra, indice))
+                    fusion[menor] = mayor
+                    frentes[mayor].extend(frentes.pop(menor))
+                    visitados[mayor].extend(visitados.pop(menor))
+                    if menor == indice:
+                        # La otra busqueda termina de expandir este nodo
+                        frentes[mayor].append(nodo)
+                        break
+                else:
+                    if not frente and len(frentes) > 1:
+                        # Trozo completo y separado del resto
+                        del frentes[indice]
+                        trozo = visitados.pop(indice)
+                        for miembro in trozo:
+                            self._descartar_elemento(self._elemento[miembro])
+                        self._nuevo_conjunto(trozo)
+                    continue
+                if len(frentes) == 1:
+                    break
+        self._compactar_si_conviene(grafo)
+
+    def _compactar_si_conviene(self, grafo: nx.Graph) -> None:
+        if self._fantasmas > max(1024, self.num_nodos):
+            self.reconstruir(grafo)
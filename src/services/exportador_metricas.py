@@ -0,0 +1,201 @@
+﻿# -*- coding: utf-8 -*-
+# exportador_metricas.py
+"""
+Exportacion columnar de metricas por usuario (CSV o NPZ) desde arrays NumPy
+"""
+import os
+from itertools import combinations
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Sequence
+import numpy as np
+from services.centralidad_cercania import calcular_cercania
+
+COLUMNAS = ('id', 'grado', 'cercania', 'comunidad', 'recomendaciones')
+FORMATOS_CSV = {'id': '%d', 'grado': '%d', 'cercania': '%.10g',
+                'comunidad': '%d', 'recomendaciones': '%d'}
+FILAS_POR_BLOQUE = 100_000
+# Memoria maxima de los arrays intermedios de cada bloque
+MEMORIA_BLOQUE = 64 * 2**20
+# Tamano maximo de conjunto de intereses para contar candidatos por subconjuntos
+MAXIMO_INCLUSION_EXCLUSION = 10
+
+class ExportadorMetricas:
+    """
+    Calcula metricas por usuario como columnas NumPy (una posicion por nodo,
+    en el orden de MatrizAdyacencia) y las escribe por bloques de filas
+    Ninguna metrica crea diccionarios por fila y los arrays intermedios se
+    acotan a MEMORIA_BLOQUE, de modo que la memoria crece solo con las
+    columnas pedidas.
+
+    Columnas:
+        id, grado
+        cercania: closeness con normalizacion de Wasserman-Faust (la de
+            networkx), exacta; cuesta O(N * M) con BFS de 64 fuentes a la vez
+            repartidos entre procesos
+        comunidad: indice de la comunidad del usuario (por defecto, de su
+            componente conexa)
+        recomendaciones: cantidad de candidatos recomendables (comparten un
+            interes, no son amigos ni el propio usuario)
+    """
+
+    def __init__(self, servicio, filas_por_bloque: int = FILAS_POR_BLOQUE,
+                 progreso: Optional[Callable[[str, int, int], None]] = None):
+        self.servicio = servicio
+        self.filas_por_bloque = filas_por_bloque
+        # progreso(etapa, procesados, total)
+        self.progreso = progreso
+        # Adyacencia compartida del servicio (la parchean sus ediciones)
+        self.matriz = servicio.adyacencia
+
+    def calcular(self, columnas: Sequence[str] = COLUMNAS,
+                 comunidades: Optional[Iterable[Iterable]] = None) -> Dict[str, np.ndarray]:
+        """
+        Calcular las columnas pedidas
+        comunidades: particion a exportar (conjuntos de ids o de Usuario), por
+        ejemplo la de detectar_comunidades(); None usa componentes conexas.
+        """
+        desconocidas = set(columnas) - set(COLUMNAS)
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas: {sorted(desconocidas)}")
+        matriz = self.matriz.actualizar(self.servicio.grafo, self.servicio.version)
+        calculos = {
+            'id': lambda: matriz.ids,
+            'grado': lambda: matriz.grados,
+            'cercania': self._cercania,
+            'comunidad': lambda: self._comunidades(comunidades),
+            'recomendaciones': self._recomendaciones,
+        }
+        return {columna: calculos[columna]() for columna in columnas}
+
+    def exportar_csv(self, ruta: str, columnas: Sequence[str] = COLUMNAS,
+                     comunidades: Optional[Iterable[Iterable]] = None) -> int:
+        """Escribir las columnas en un CSV por bloques de filas. Retorna: filas escritas"""
+        datos = self.calcular(columnas, comunidades)
+        total = len(self.matriz)
+        formato = ','.join(FORMATOS_CSV[columna] for columna in columnas)
+        with open(ruta + '.tmp', 'w', encoding='utf-8', newline='') as f:
+            f.write(','.join(columnas) + '\n')
+            for inicio in range(0, total, self.filas_por_bloque):
+                fin = min(inicio + self.filas_por_bloque, total)
+                bloque = np.column_stack([datos[columna][inicio:fin] for columna in columnas])
+                np.savetxt(f, bloque, fmt=formato)
+                self._informar('exportacion', fin, total)
+        os.replace(ruta + '.tmp', ruta)
+        return total
+
+    def exportar_npz(self, ruta: str, columnas: Sequence[str] = COLUMNAS,
+                     comunidades: Optional[Iterable[Iterable]] = None,
+                     comprimir: bool = True) -> int:
+        """Escribir cada columna como un array del archivo NPZ. Retorna: filas escritas"""
+        datos = self.calcular(columnas, comunidades)
+        guardar = np.savez_compressed if comprimir else np.savez
+        with open(ruta + '.tmp', 'wb') as f:
+            guardar(f, **datos)
+        os.replace(ruta + '.tmp', ruta)
+        self._informar('exportacion', len(self.matriz), len(self.matriz))
+        return len(self.matriz)
+
+    # === METRICAS ===
+
+    def _cercania(self) -> np.ndarray:
+        cercania, _ = calcular_cercania(
+            self.matriz, progreso=lambda procesadas, total: self._informar('cercania', procesadas, total))
+        return cercania
+
+    def _comunidades(self, comunidades: Optional[Iterable[Iterable]]) -> np.ndarray:
+        import networkx as nx
+        if comunidades is None:
+            comunidades = nx.connected_components(self.servicio.grafo)
+        posiciones = self.matriz.posiciones
+        etiquetas = np.full(len(self.matriz), -1, dtype=np.int64)
+        for indice, comunidad in enumerate(comunidades):
+            miembros = [posiciones[getattr(miembro, 'id', miembro)] for miembro in comunidad]
+            etiquetas[miembros] = indice
+        return etiquetas
+
+    def _recomendaciones(self) -> np.ndarray:
+        """
+        Candidatos por usuario agrupando usuarios con el mismo conjunto de
+        intereses: se cuentan los usuarios de los grupos que comparten algun
+        interes (inclusion-exclusion sobre subconjuntos de intereses para los
+        grupos chicos, cruce de mascaras para los grandes y entre ambos) y se
+        descuentan el propio usuario y sus amigos con interes comun
+        """
+        matriz = self.matriz
+        n = len(matriz)
+        grupos: Dict[FrozenSet[int], int] = {}
+        grupo = np.zeros(n, dtype=np.int64)
+        posiciones = matriz.posiciones
+        for usuario in self.servicio.usuarios.values():
+            grupo[posiciones[usuario.id]] = grupos.setdefault(usuario.ids_intereses, len(grupos))
+        if not grupos:
+            return np.zeros(n, dtype=np.int64)
+
+        # Mascara de bits de intereses de cada grupo
+        maximo = max((max(ids) for ids in grupos if ids), default=0)
+        mascaras = np.zeros((len(grupos), maximo // 64 + 1), dtype=np.uint64)
+        for ids, indice in grupos.items():
+            for interes_id in ids:
+                mascaras[indice, interes_id // 64] |= np.uint64(1) << np.uint64(interes_id % 64)
+        tamanos = np.bincount(grupo, minlength=len(grupos))
+
+        # Cada grupo elige su metodo: los grandes no pagan 2^k subconjuntos y
+        # los chicos solo se cruzan con los grandes
+        chicos = {ids: indice for ids, indice in grupos.items() if len(ids) <= MAXIMO_INCLUSION_EXCLUSION}
+        grandes = np.array([indice for ids, indice in grupos.items()
+                            if len(ids) > MAXIMO_INCLUSION_EXCLUSION], dtype=np.int64)
+        pequenos = np.fromiter(chicos.values(), dtype=np.int64, count=len(chicos))
+        comparten = np.zeros(len(grupos), dtype=np.int64)
+        if chicos:
+            comparten[pequenos] = _comparten_por_subconjuntos(chicos, tamanos)
+        if grandes.size:
+            comparten[pequenos] += _comparten_por_mascaras(mascaras[pequenos], mascaras[grandes],
+                                                           tamanos[grandes])
+            comparten[grandes] = _comparten_por_mascaras(mascaras[grandes], mascaras, tamanos)
+        con_intereses = mascaras.any(axis=1)
+        candidatos = comparten[grupo] - con_intereses[grupo]
+
+        # Amigos con algun interes comun, recorriendo las aristas por bloques de nodos
+        for inicio in range(0, n, self.filas_por_bloque):
+            fin = min(inicio + self.filas_por_bloque, n)
+            filas = np.repeat(np.arange(inicio, fin), matriz.grados[inicio:fin])
+            vecinos = matriz.indices[matriz.indptr[inicio]:matriz.indptr[fin]]
+            comun = (mascaras[grupo[filas]] & mascaras[grupo[vecinos]]).any(axis=1)
+            candidatos[inicio:fin] -= np.bincount(filas[comun] - inicio, minlength=fin - inicio)
+            self._informar('recomendaciones', fin, n)
+        return candidatos
+
+    def _informar(self, etapa: str, procesados: int, total: int) -> None:
+        if self.progreso:
+            self.progreso(etapa, procesados, total)
+
+def _comparten_por_subconjuntos(grupos: Dict[FrozenSet[int], int], tamanos: np.ndarray) -> np.ndarray:
+    """
+    Usuarios que comparten algun interes con cada grupo por inclusion-exclusion:
+    |union de los usuarios de cada interes de S| = suma sobre T subconjunto de S
+    de (-1)^(|T|+1) * (usuarios cuyo conjunto contiene a T)
+    """
+    contienen: Dict[tuple, int] = {}
+    for ids, indice in grupos.items():
+        tamano = int(tamanos[indice])
+        for combinacion in _subconjuntos(ids):
+            contienen[combinacion] = contienen.get(combinacion, 0) + tamano
+    return np.fromiter(
+        (sum(contienen[combinacion] if len(combinacion) % 2 else -contienen[combinacion]
+             for combinacion in _subconjuntos(ids))
+         for ids in grupos),
+        dtype=np.int64, count=len(grupos)
+    )
+
+def _comparten_por_mascaras(filas: np.ndarray, mascaras: np.ndarray, tamanos: np.ndarray) -> np.ndarray:
+    """Usuarios de los grupos de mascaras que comparten algun interes con cada fila, por bloques"""
+    comparten = np.zeros(len(filas), dtype=np.int64)
+    paso = max(1, MEMORIA_BLOQUE // max(1, mascaras.itemsize * mascaras.size))
+    for inicio in range(0, len(filas), paso):
+        cruce = (filas[inicio:inicio + paso, None, :] & mascaras[None, :, :]).any(axis=2)
+        comparten[inicio:inicio + paso] = cruce @ tamanos
+    return comparten
+
+def _subconjuntos(ids: FrozenSet[int]) -> Iterable[tuple]:
+    ordenados = sorted(ids)
+    for k in range(1, len(ordenados) + 1):
+        yield from combinations(ordenados, k)
@@ -0,0 +1,122 @@
+﻿# -*- coding: utf-8 -*-
+# guardado.py
+"""
+Guardado de la red en un hilo escritor, sin bloquear la interfaz
+"""
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+class EscrituraPendiente:
+    """
+    Instantanea de los datos a guardar junto con la funcion que la escribe
+    La escritura no toca el estado del servicio, asi que puede ejecutarse en
+    otro hilo mientras se siguen haciendo cambios.
+    """
+
+    def __init__(self, escribir: Callable[[], bool], usuarios: Set[int],
+                 conexiones: Set[Tuple[int, int]], completa: bool):
+        self._escribir = escribir
+        # Cambios incluidos: vuelven a quedar pendientes si la escritura falla
+        self.usuarios = usuarios
+        self.conexiones = conexiones
+        self.completa = completa
+        self.exito: Optional[bool] = None
+
+    def __call__(self) -> bool:
+        try:
+            self.exito = bool(self._escribir())
+        except Exception as e:
+            print(f"Error al guardar datos: {e}")
+            self.exito = False
+        return self.exito
+
+class GuardadoEnSegundoPlano:
+    """
+    Hilo escritor para un RedSocialService
+    La instantanea se toma y los resultados se procesan en el hilo que usa el
+    servicio (solicitar/revisar); solo la escritura a disco corre en el hilo
+    escritor, en el orden en que se solicito.
+    """
+
+    def __init__(self, servicio, intervalo_autoguardado: Optional[float] = None):
+        self.servicio = servicio
+        # Segundos entre autoguardados (None lo desactiva)
+        self.intervalo_autoguardado = intervalo_autoguardado
+        self._solicitadas: "queue.Queue[Optional[EscrituraPendiente]]" = queue.Queue()
+        self._terminadas: "queue.Queue[EscrituraPendiente]" = queue.Queue()
+        self._en_curso = 0
+        self._ultimo_guardado = time.monotonic()
+        self._hilo = threading.Thread(target=self._escribir, name='guardado-red', daemon=True)
+        self._hilo.start()
+
+    @property
+    def ocupado(self) -> bool:
+        """Indica si hay escrituras sin terminar"""
+        return self._en_curso > 0
+
+    def solicitar(self, compactar: bool = False) -> Optional[EscrituraPendiente]:
+        """
+        Encolar el guardado de los cambios pendientes
+        compactar=True reescribe los archivos de datos aunque los cambios ya
+        esten en el journal (guardado explicito o al cerrar).
+        Retorna: la escritura encolada, o None si no habia nada que guardar
+        """
+        self._ultimo_guardado = time.monotonic()
+        if not (self.servicio.hay_cambios_sin_compactar if compactar else
+                self.servicio.hay_cambios_sin_guardar):
+            return None
+        escritura = self.servicio.preparar_guardado(compactar)
+        self._en_curso += 1
+        self._solicitadas.put(escritura)
+        return escritura
+
+    def revisar(self) -> List[EscrituraPendiente]:
+        """
+        Procesar las escrituras terminadas y lanzar el autoguardado si toca
+        Debe llamarse periodicamente desde el hilo que usa el servicio.
+        Retorna: escrituras terminadas desde la ultima revision
+        """
+        terminadas = []
+        while True:
+            try:
+                escritura = self._terminadas.get_nowait()
+            except queue.Empty:
+                break
+            self._en_curso -= 1
+            self.servicio.finalizar_guardado(escritura)
+            terminadas.append(escritura)
+
+        if (self.intervalo_autoguardado is not None and not self.ocupado and
+                time.monotonic() - self._ultimo_guardado >= self.intervalo_autoguardado):
+            self.solicitar()
+        return terminadas
+
+    def esperar(self) -> List[EscrituraPendiente]:
+        """Bloquear hasta que terminen las escrituras en curso y procesarlas"""
+        terminadas = []
+        while self.ocupado:
+            escritura = self._terminadas.get()
+            self._en_curso -= 1
+            self.servicio.finalizar_guardado(escritura)
+            terminadas.append(escritura)
+        return terminadas
+
+    def detener(self) -> List[EscrituraPendiente]:
+        """Esperar a que terminen las escrituras encoladas y cerrar el hilo"""
+        self._solicitadas.put(None)
+        self._hilo.join()
+        intervalo, self.intervalo_autoguardado = self.intervalo_autoguardado, None
+        try:
+            return self.revisar()
+        finally:
+            self.intervalo_autoguardado = intervalo
+
+    def _escribir(self) -> None:
+        while True:
+            escritura = self._solicitadas.get()
+            if escritura is None:
+                return
+            escritura()
+            self._terminadas.put(escritura)
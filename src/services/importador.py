@@ -0,0 +1,288 @@
+﻿# -*- coding: utf-8 -*-
+# importador.py
+"""
+Importacion en bloque de redes externas: listas de aristas (CSV, TSV, SNAP)
+y usuarios en CSV/TSV, leidas por bloques y agregadas con cargar_masivo
+"""
+import csv
+import io
+import os
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, Union
+import numpy as np
+from models.usuario import Usuario
+from services.data_manager import COMPRESIONES
+
+# Bytes de texto leidos por bloque
+TAMANO_BLOQUE = 1 << 24
+# Aristas pendientes antes de fusionarlas con las ya deduplicadas
+ARISTAS_POR_FUSION = 1 << 24
+# Nombres de columna que identifican una linea de encabezado
+ENCABEZADOS = {'origen', 'destino', 'source', 'target', 'from', 'to', 'src', 'dst',
+               'id', 'node', 'nodo', 'fromnodeid', 'tonodeid'}
+SEPARADORES = {'csv': ',', 'tsv': '\t', 'snap': None}
+COMENTARIOS = ('#', '%')
+# Separadores aceptados dentro de la columna de intereses
+SEPARADORES_INTERESES = (';', '|')
+
+IdExterno = Union[int, str]
+
+class ImportadorRed:
+    """
+    Importa usuarios y conexiones de archivos externos a un RedSocialService
+    Los ids externos (enteros o texto) se remapean a ids internos nuevos; las
+    aristas se deduplican como claves de 64 bits (menor << 32 | mayor) en un
+    array ordenado y todo se agrega con una unica llamada a cargar_masivo, sin
+    conexiones automaticas.
+
+    Uso:
+        importador = ImportadorRed(servicio, progreso=callback)
+        importador.importar_usuarios('usuarios.csv')
+        importador.importar_aristas('aristas.txt')
+        resumen = importador.confirmar()
+    """
+
+    def __init__(self, servicio, progreso: Optional[Callable[[int, int], None]] = None):
+        self.servicio = servicio
+        # progreso(bytes_leidos, bytes_totales) tras cada bloque
+        self.progreso = progreso
+        self.ids: Dict[IdExterno, int] = {}
+        # Ids vistos por primera vez desde la ultima confirmacion
+        self._ids_nuevos: Dict[IdExterno, int] = {}
+        self._usuarios: Dict[int, Usuario] = {}
+        self._claves = np.zeros(0, dtype=np.uint64)
+        self._claves_pendientes: List[np.ndarray] = []
+        self._pendientes = 0
+        self._lineas = 0
+        self._descartadas = 0
+        self._bytes = 0
+        self._segundos = 0.0
+
+    # === USUARIOS ===
+
+    def importar_usuarios(self, ruta: str, separador: str = None) -> int:
+        """
+        Leer usuarios de un CSV/TSV con encabezado
+        Columnas reconocidas: id (obligatoria), nombre, edad, email e intereses
+        (separados por ';' o '|'). Retorna: cantidad de usuarios leidos
+        """
+        inicio = time.perf_counter()
+        leidos = 0
+        with _abrir(ruta) as (crudo, f, total):
+            texto = io.TextIOWrapper(f, encoding='utf-8', newline='')
+            separador = separador or ('\t' if _formato(ruta) == 'tsv' else ',')
+            for leidos, fila in enumerate(csv.DictReader(texto, delimiter=separador), 1):
+                externo = _id_externo(fila['id'])
+                usuario_id = self._id_interno(externo)
+                try:
+                    edad = int(fila.get('edad') or 0)
+                except ValueError:
+                    edad = 0
+                self._usuarios[usuario_id] = Usuario(
+                    id=usuario_id,
+                    nombre=fila.get('nombre') or str(externo),
+                    edad=edad,
+                    email=fila.get('email') or "",
+                    intereses=_separar_intereses(fila.get('intereses') or "")
+                )
+                if self.progreso and leidos % 100_000 == 0:
+                    self.progreso(crudo.tell(), total)
+            self._bytes += crudo.tell()
+            if self.progreso:
+                self.progreso(crudo.tell(), total)
+        self._segundos += time.perf_counter() - inicio
+        return leidos
+
+    # === ARISTAS ===
+
+    def importar_aristas(self, ruta: str, formato: str = None, encabezado: bool = None) -> int:
+        """
+        Leer una lista de aristas por bloques
+        formato: 'csv', 'tsv' o 'snap' (espacios, comentarios con '#'); por
+        defecto se deduce de la extension. Solo se usan las dos primeras
+        columnas. encabezado=None lo detecta por los nombres de columna.
+        Retorna: cantidad de lineas de aristas leidas
+        """
+        formato = formato or _formato(ruta)
+        if formato not in SEPARADORES:
+            raise ValueError(f"Formato de aristas no soportado: {formato}")
+        separador = SEPARADORES[formato]
+        inicio = time.perf_counter()
+        lineas_leidas = 0
+        primera = True
+        with _abrir(ruta) as (crudo, f, total):
+            resto = b''
+            while True:
+                bloque = f.read(TAMANO_BLOQUE)
+                # Solo se procesan lineas completas; el resto pasa al siguiente bloque
+                datos = resto + bloque
+                corte = datos.rfind(b'\n') + 1 if bloque else len(datos)
+                datos, resto = datos[:corte], datos[corte:]
+                lineas = [linea for linea in datos.decode('utf-8').splitlines()
+                          if linea and not linea.startswith(COMENTARIOS)]
+                if primera and lineas:
+                    primera = False
+                    if _es_encabezado(lineas[0], separador) if encabezado is None else encabezado:
+                        lineas = lineas[1:]
+                if lineas:
+                    self._agregar_aristas(lineas, separador)
+                    lineas_leidas += len(lineas)
+                if self.progreso:
+                    self.progreso(crudo.tell(), total)
+                if not bloque:
+                    break
+            self._bytes += crudo.tell()
+        self._lineas += lineas_leidas
+        self._segundos += time.perf_counter() - inicio
+        return lineas_leidas
+
+    def _agregar_aristas(self, lineas: List[str], separador: Optional[str]) -> None:
+        externos = _parsear_enteros(lineas, separador)
+        if externos is None:
+            # Ids de texto, comillas o columnas extra: separar linea a linea
+            columnas = [linea.split(separador)[:2] for linea in lineas]
+            completas = [par for par in columnas if len(par) == 2]
+            self._descartadas += len(columnas) - len(completas)
+            if not completas:
+                return
+            externos = np.char.strip(np.array(completas), ' \t\r"')
+            try:
+                externos = externos.astype(np.int64)
+            except ValueError:
+                pass
+
+        # Remapeo vectorizado: solo los ids distintos del bloque pasan por el diccionario
+        unicos, inversa = np.unique(externos.ravel(), return_inverse=True)
+        internos = np.fromiter((self._id_interno(_id_externo(externo)) for externo in unicos.tolist()),
+                               dtype=np.int64, count=len(unicos))
+        pares = internos[inversa.reshape(-1)].reshape(-1, 2)
+
+        validas = pares[:, 0] != pares[:, 1]
+        self._descartadas += int((~validas).sum())
+        menores = np.minimum(pares[validas, 0], pares[validas, 1]).astype(np.uint64)
+        mayores = np.maximum(pares[validas, 0], pares[validas, 1]).astype(np.uint64)
+        claves = np.unique((menores << np.uint64(32)) | mayores)
+        self._claves_pendientes.append(claves)
+        self._pendientes += claves.size
+        if self._pendientes >= ARISTAS_POR_FUSION:
+            self._fusionar_claves()
+
+    def _fusionar_claves(self) -> None:
+        """Unir las claves pendientes con las ya deduplicadas (array ordenado)"""
+        if self._claves_pendientes:
+            self._claves = np.unique(np.concatenate([self._claves] + self._claves_pendientes))
+            self._claves_pendientes = []
+            self._pendientes = 0
+
+    # === CONFIRMACION ===
+
+    def confirmar(self) -> Dict:
+        """
+        Agregar lo importado al servicio con cargar_masivo
+        Los extremos nuevos sin fila en el archivo de usuarios se crean con su
+        id externo como nombre; los ya confirmados en un lote anterior
+        conservan su perfil. El resumen y los contadores son de este lote.
+        Retorna: resumen con cantidades y rendimiento
+        """
+        inicio = time.perf_counter()
+        self._fusionar_claves()
+        for externo, usuario_id in self._ids_nuevos.items():
+            if usuario_id not in self._usuarios:
+                self._usuarios[usuario_id] = Usuario(id=usuario_id, nombre=str(externo))
+
+        origenes = (self._claves >> np.uint64(32)).astype(np.int64)
+        destinos = (self._claves & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        conexiones = self.servicio.cargar_masivo(self._usuarios.values(), origenes, destinos)
+        self._segundos += time.perf_counter() - inicio
+
+        resumen = {
+            'usuarios': len(self._usuarios),
+            'conexiones': conexiones,
+            'lineas': self._lineas,
+            'descartadas': self._descartadas,
+            'duplicadas': self._lineas - self._descartadas - int(self._claves.size),
+            'segundos': self._segundos,
+            'aristas_por_segundo': self._lineas / self._segundos if self._segundos else 0.0,
+            'mb_por_segundo': self._bytes / 2**20 / self._segundos if self._segundos else 0.0,
+        }
+        self._usuarios, self._ids_nuevos = {}, {}
+        self._claves = np.zeros(0, dtype=np.uint64)
+        self._lineas = self._descartadas = self._bytes = 0
+        self._segundos = 0.0
+        return resumen
+
+    def _id_interno(self, externo: IdExterno) -> int:
+        usuario_id = self.ids.get(externo)
+        if usuario_id is None:
+            # El id se reserva en el servicio: los usuarios creados entre
+            # lotes (o antes de confirmar) no lo reutilizan
+            usuario_id = self.servicio._siguiente_id
+            if usuario_id >= 2**32:
+                raise ValueError("Demasiados usuarios para la clave de aristas de 64 bits")
+            self.servicio._siguiente_id += 1
+            self.ids[externo] = usuario_id
+            self._ids_nuevos[externo] = usuario_id
+        return usuario_id
+
+class _abrir:
+    """Abrir un archivo (comprimido segun su extension) conservando el archivo crudo para medir progreso"""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+
+    def __enter__(self) -> Tuple[io.BufferedReader, io.BufferedIOBase, int]:
+        self.crudo = open(self.ruta, 'rb')
+        self.archivo = self.crudo
+        for extension, abrir in COMPRESIONES.values():
+            if self.ruta.endswith(extension):
+                self.archivo = abrir(self.crudo, 'rb')
+        return self.crudo, self.archivo, os.path.getsize(self.ruta)
+
+    def __exit__(self, *excepcion) -> None:
+        if self.archivo is not self.crudo:
+            self.archivo.close()
+        self.crudo.close()
+
+def _formato(ruta: str) -> str:
+    """Formato deducido de la extension (ignorando la de compresion)"""
+    nombre = ruta.lower()
+    for extension, _ in COMPRESIONES.values():
+        if nombre.endswith(extension):
+            nombre = nombre[:-len(extension)]
+    if nombre.endswith('.csv'):
+        return 'csv'
+    if nombre.endswith('.tsv'):
+        return 'tsv'
+    return 'snap'
+
+def _parsear_enteros(lineas: List[str], separador: Optional[str]) -> Optional[np.ndarray]:
+    """Parseo rapido de un bloque de pares de enteros; None si el bloque no es solo eso"""
+    texto = ' '.join(lineas)
+    if separador is not None:
+        texto = texto.replace(separador, ' ')
+    tokens = texto.split()
+    if len(tokens) != 2 * len(lineas):
+        return None
+    try:
+        return np.array(tokens, dtype=np.int64).reshape(-1, 2)
+    except ValueError:
+        return None
+
+def _es_encabezado(linea: str, separador: Optional[str]) -> bool:
+    columnas = [columna.strip().strip('"').lower() for columna in linea.split(separador)[:2]]
+    return any(columna in ENCABEZADOS for columna in columnas)
+
+def _id_externo(valor) -> Hashable:
+    """Ids numericos como int (12 y '12' son el mismo usuario), el resto como texto"""
+    if isinstance(valor, int):
+        return valor
+    valor = valor.strip().strip('"')
+    try:
+        return int(valor)
+    except ValueError:
+        return valor
+
+def _separar_intereses(texto: str) -> List[str]:
+    for separador in SEPARADORES_INTERESES:
+        texto = texto.replace(separador, ',')
+    return [interes.strip() for interes in texto.split(',') if interes.strip()]
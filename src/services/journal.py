@@ -0,0 +1,120 @@
+﻿# -*- coding: utf-8 -*-
+# journal.py
+"""
+Registro de cambios (write-ahead journal) de solo anexado
+"""
+import json
+import os
+import threading
+from typing import Dict, Iterator
+
+# Operaciones que se registran en el journal
+AGREGAR_USUARIO = 'agregar_usuario'
+ELIMINAR_USUARIO = 'eliminar_usuario'
+AGREGAR_CONEXION = 'agregar_conexion'
+ELIMINAR_CONEXION = 'eliminar_conexion'
+
+# Bytes del final del archivo revisados al reabrirlo para anexar
+TAMANO_COLA = 1 << 16
+
+class JournalCambios:
+    """
+    Archivo JSONL donde cada linea es una operacion sobre la red
+    Anexar una operacion cuesta una escritura corta (y un fsync opcional)
+    en lugar de reescribir todos los datos.
+    """
+
+    def __init__(self, ruta: str, sincronizar: bool = True):
+        self.ruta = ruta
+        self.sincronizar = sincronizar
+        self._archivo = None
+        # Se puede sincronizar o compactar desde un hilo de guardado
+        self._bloqueo = threading.Lock()
+        self.operaciones = self._contar_operaciones()
+
+    def registrar(self, operacion: str, **datos) -> None:
+        """Anexar una operacion al journal"""
+        with self._bloqueo:
+            if self._archivo is None:
+                self._archivo = self._abrir_para_anexar()
+            self._archivo.write(json.dumps({'op': operacion, **datos}, ensure_ascii=False) + '\n')
+            self._archivo.flush()
+            if self.sincronizar:
+                os.fsync(self._archivo.fileno())
+            self.operaciones += 1
+
+    def sincronizar_disco(self) -> None:
+        """Forzar que lo anexado llegue al disco"""
+        with self._bloqueo:
+            if self._archivo is not None:
+                self._archivo.flush()
+                os.fsync(self._archivo.fileno())
+
+    def leer(self) -> Iterator[Dict]:
+        """
+        Generar las operaciones registradas en orden
+        Una ultima linea incompleta (escritura interrumpida) se descarta.
+        """
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    if not linea.endswith('\n'):
+                        break
+                    try:
+                        yield json.loads(linea)
+                    except json.JSONDecodeError:
+                        print(f"Error al leer {self.ruta}: operacion descartada")
+        except FileNotFoundError:
+            return
+
+    def truncar(self) -> None:
+        """Vaciar el journal (tras compactar los datos)"""
+        with self._bloqueo:
+            self._cerrar_archivo()
+            with open(self.ruta, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self.operaciones = 0
+
+    def descartar_primeras(self, cantidad: int) -> None:
+        """
+        Quitar las primeras operaciones (ya compactadas) conservando las demas
+        Permite compactar una instantanea mientras se siguen anexando cambios.
+        """
+        with self._bloqueo:
+            restantes = list(self.leer())[cantidad:]
+            self._cerrar_archivo()
+            temporal = self.ruta + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                for registro in restantes:
+                    f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
+            self.operaciones = len(restantes)
+
+    def cerrar(self) -> None:
+        """Cerrar el archivo abierto para anexar"""
+        with self._bloqueo:
+            self._cerrar_archivo()
+
+    def _cerrar_archivo(self) -> None:
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    def _abrir_para_anexar(self):
+        """Abrir el journal descartando una ultima linea incompleta"""
+        archivo = open(self.ruta, 'a+b')
+        tamano = archivo.seek(0, os.SEEK_END)
+        if tamano:
+            archivo.seek(max(0, tamano - TAMANO_COLA))
+            cola = archivo.read()
+            if not cola.endswith(b'\n'):
+                corte = cola.rfind(b'\n')
+                archivo.truncate(tamano - len(cola) + corte + 1)
+        archivo.close()
+        return open(self.ruta, 'a', encoding='utf-8')
+
+    def _contar_operaciones(self) -> int:
+        return sum(1 for _ in self.leer())
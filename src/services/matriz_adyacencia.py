@@ -0,0 +1,274 @@
+﻿# -*- coding: utf-8 -*-
+# matriz_adyacencia.py
+"""
+Adyacencia dispersa (CSR) del grafo para calculos vectorizados
+"""
+import networkx as nx
+import numpy as np
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Filas parcheadas que se acumulan como minimo antes de consolidarlas en el CSR
+MINIMO_FILAS_PARCHEADAS = 1024
+
+class MatrizAdyacencia:
+    """
+    Adyacencia del grafo en formato CSR (indptr/indices) con el orden de nodos
+    Solo se reconstruye cuando cambia la version del grafo. Las ediciones
+    puntuales se aplican con parchear(): las filas afectadas se guardan
+    aparte y las lecturas por fila (vecinos, producto_fila, aristas_desde)
+    las consultan hasta que se consolidan en indptr/indices, al pedir la
+    matriz con actualizar() o al acumularse demasiadas.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.posiciones: Dict[int, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.grados = np.zeros(0, dtype=np.int64)
+        # Filas parcheadas (posicion -> vecinos), marca por posicion y
+        # posiciones de nodos eliminados que siguen ocupando lugar
+        self._parcheadas: Dict[int, np.ndarray] = {}
+        self._parcheada = np.zeros(0, dtype=bool)
+        self._eliminadas: Set[int] = set()
+
+    @classmethod
+    def desde_csr(cls, indptr: np.ndarray, indices: np.ndarray) -> 'MatrizAdyacencia':
+        """Matriz a partir de arrays CSR, con las posiciones como ids (p. ej. en otro proceso)"""
+        matriz = cls()
+        matriz.indptr, matriz.indices = indptr, indices
+        matriz.grados = np.diff(indptr)
+        matriz.ids = np.arange(len(matriz.grados), dtype=np.int64)
+        matriz._parcheada = np.zeros(len(matriz.grados), dtype=bool)
+        return matriz
+
+    def actualizar(self, grafo: nx.Graph, version: Optional[int] = None,
+                   consolidar: bool = True) -> 'MatrizAdyacencia':
+        """
+        Reconstruir la matriz si la version no coincide (None fuerza la reconstruccion)
+        Con consolidar=False las filas parcheadas no se incorporan a
+        indptr/indices (basta para las lecturas por fila).
+        """
+        if version is not None and version == self.version:
+            if consolidar:
+                self._consolidar()
+            return self
+
+        adyacencia = grafo.adj
+        nodos = list(grafo.nodes)
+        posiciones = {nodo: posicion for posicion, nodo in enumerate(nodos)}
+        grados = np.fromiter((len(adyacencia[nodo]) for nodo in nodos),
+                             dtype=np.int64, count=len(nodos))
+        indptr = np.zeros(len(nodos) + 1, dtype=np.int64)
+        np.cumsum(grados, out=indptr[1:])
+        indices = np.fromiter(
+            (posiciones[vecino] for nodo in nodos for vecino in adyacencia[nodo]),
+            dtype=np.int64, count=int(indptr[-1])
+        )
+
+        self.ids = np.array(nodos, dtype=np.int64)
+        self.posiciones = posiciones
+        self.indptr, self.indices, self.grados = indptr, indices, grados
+        self._parcheadas, self._eliminadas = {}, set()
+        self._parcheada = np.zeros(len(nodos), dtype=bool)
+        self.version = version
+        return self
+
+    def parchear(self, grafo: nx.Graph, nodos: Iterable[int],
+                 version_anterior: int, version: int) -> bool:
+        """
+        Aplicar una edicion puntual del grafo sin reconstruir la matriz
+        Se vuelven a leer del grafo las filas de nodos (agregados, eliminados
+        o con vecinos cambiados), con coste proporcional a sus grados. Solo
+        se aplica si la matriz estaba al dia con version_anterior; si no,
+        queda desactualizada y actualizar() la reconstruye.
+        Retorna: True si se aplico
+        """
+        if self.version is None or self.version != version_anterior:
+            return False
+        adyacencia = grafo.adj
+        nodos = list(dict.fromkeys(nodos))
+        # Los nodos nuevos van al final, como en list(grafo.nodes)
+        nuevos = [nodo for nodo in nodos if nodo in adyacencia and nodo not in self.posiciones]
+        if nuevos:
+            inicio = len(self.ids)
+            self.posiciones.update((nodo, inicio + indice) for indice, nodo in enumerate(nuevos))
+            self.ids = np.concatenate([self.ids, np.array(nuevos, dtype=np.int64)])
+            self.grados = np.concatenate([self.grados, np.zeros(len(nuevos), dtype=np.int64)])
+            self._parcheada = np.concatenate([self._parcheada, np.ones(len(nuevos), dtype=bool)])
+
+        for nodo in nodos:
+            if nodo in adyacencia:
+                posicion = self.posiciones[nodo]
+                fila = np.fromiter((self.posiciones[vecino] for vecino in adyacencia[nodo]),
+                                   dtype=np.int64, count=len(adyacencia[nodo]))
+            else:
+                posicion = self.posiciones.pop(nodo, None)
+                if posicion is None:
+                    continue
+                fila = np.zeros(0, dtype=np.int64)
+                self._eliminadas.add(posicion)
+            self._parcheadas[posicion] = fila
+            self._parcheada[posicion] = True
+            self.grados[posicion] = fila.size
+
+        self.version = version
+        if len(self._parcheadas) > max(MINIMO_FILAS_PARCHEADAS, len(self.ids) // 16):
+            self._consolidar()
+        return True
+
+    def _consolidar(self) -> None:
+        """
+        Incorporar las filas parcheadas a indptr/indices y descartar las
+        posiciones eliminadas, con operaciones vectorizadas en O(N + M)
+        El resultado es el mismo que el de reconstruir desde el grafo.
+        """
+        if not self._parcheadas:
+            return
+        indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(self.grados, out=indptr[1:])
+        indices = np.empty(int(indptr[-1]), dtype=np.int64)
+
+        intactas = np.flatnonzero(~self._parcheada)
+        longitudes = self.grados[intactas]
+        indices[_rangos(indptr[intactas], longitudes)] = \
+            self.indices[_rangos(self.indptr[intactas], longitudes)]
+        parcheadas = np.array(sorted(self._parcheadas), dtype=np.int64)
+        if indices.size:
+            indices[_rangos(indptr[parcheadas], self.grados[parcheadas])] = \
+                np.concatenate([self._parcheadas[posicion] for posicion in parcheadas.tolist()])
+
+        if self._eliminadas:
+            # Las filas eliminadas estan vacias: basta renumerar las demas
+            vivas = np.ones(len(self.ids), dtype=bool)
+            vivas[list(self._eliminadas)] = False
+            indices = (np.cumsum(vivas) - 1)[indices]
+            self.ids, self.grados = self.ids[vivas], self.grados[vivas]
+            indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+            np.cumsum(self.grados, out=indptr[1:])
+            self.posiciones = {nodo: posicion for posicion, nodo in enumerate(self.ids.tolist())}
+
+        self.indptr, self.indices = indptr, indices
+        self._parcheadas, self._eliminadas = {}, set()
+        self._parcheada = np.zeros(len(self.ids), dtype=bool)
+
+    def vecinos(self, posicion: int) -> np.ndarray:
+        """Posiciones de los vecinos del nodo en la posicion dada"""
+        if self._parcheada[posicion]:
+            return self._parcheadas[posicion]
+        return self.indices[self.indptr[posicion]:self.indptr[posicion + 1]]
+
+    def producto_fila(self, posiciones: np.ndarray,
+                      pesos: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Producto disperso x @ A con x definido sobre 'posiciones' (peso 1 si no se indica)
+        El coste es proporcional a la suma de grados de esas posiciones, no a N.
+        Retorna: (columnas ordenadas, valores acumulados)
+        """
+        columnas, longitudes = self._filas(posiciones)
+        if columnas.size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        columnas, inversa = np.unique(columnas, return_inverse=True)
+        valores = np.bincount(inversa, weights=None if pesos is None else np.repeat(pesos, longitudes),
+                              minlength=columnas.size).astype(np.float64)
+        return columnas, valores
+
+    def aristas_desde(self, posiciones: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aristas que salen de las posiciones dadas, con coste proporcional a sus grados
+        Retorna: (origenes, destinos)
+        """
+        destinos, longitudes = self._filas(posiciones)
+        return np.repeat(posiciones, longitudes), destinos
+
+    def _filas(self, posiciones: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Concatenar las filas de A indicadas sin bucles de Python (salvo si hay
+        filas parcheadas entre ellas, que se leen una a una)
+        Retorna: (columnas, longitudes)
+        """
+        if self._parcheadas and self._parcheada[posiciones].any():
+            filas = [self.vecinos(posicion) for posicion in posiciones.tolist()]
+            longitudes = np.fromiter(map(len, filas), dtype=np.int64, count=len(filas))
+            columnas = np.concatenate(filas) if filas else np.zeros(0, dtype=np.int64)
+            return columnas, longitudes
+        inicios = self.indptr[posiciones]
+        longitudes = self.indptr[posiciones + 1] - inicios
+        return self.indices[_rangos(inicios, longitudes)], longitudes
+
+    def componentes(self) -> np.ndarray:
+        """
+        Componente conexa de cada posicion, identificada por su menor posicion
+        Propagacion vectorizada del minimo con saltos de puntero: cada ronda
+        es una pasada sobre las aristas.
+        """
+        etiquetas = np.arange(len(self), dtype=np.int64)
+        con_vecinos = np.flatnonzero(self.grados)
+        if con_vecinos.size == 0:
+            return etiquetas
+        inicios = self.indptr[con_vecinos]
+        while True:
+            nuevas = etiquetas.copy()
+            nuevas[con_vecinos] = np.minimum(etiquetas[con_vecinos],
+                                             np.minimum.reduceat(etiquetas[self.indices], inicios))
+            nuevas = nuevas[nuevas]
+            if np.array_equal(nuevas, etiquetas):
+                return etiquetas
+            etiquetas = nuevas
+
+    def distancias_acumuladas(self, fuentes: np.ndarray,
+                              bits: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BFS simultaneo desde varias posiciones, una por bit de un uint64 por nodo
+        Fuentes de componentes distintas pueden compartir bit porque sus
+        busquedas no se cruzan (bits=None asigna un bit distinto a cada una).
+        Cada nivel es una pasada vectorizada sobre las aristas y la memoria es O(N).
+        Retorna: (suma por nodo de sus distancias a las fuentes, suma de sus
+        cuadrados por nodo)
+        """
+        fuentes = np.asarray(fuentes, dtype=np.int64)
+        bits = np.arange(fuentes.size) if bits is None else np.asarray(bits)
+        if bits.size and bits.max() >= 64:
+            raise ValueError("distancias_acumuladas admite como maximo 64 bits por llamada")
+        visitados = np.zeros(len(self), dtype=np.uint64)
+        np.bitwise_or.at(visitados, fuentes, np.left_shift(np.uint64(1), bits.astype(np.uint64)))
+        frontera = visitados.copy()
+        sumas = np.zeros(len(self), dtype=np.int64)
+        cuadrados = np.zeros(len(self), dtype=np.int64)
+
+        # reduceat no admite segmentos vacios: solo se reducen los nodos con vecinos
+        con_vecinos = np.flatnonzero(self.grados)
+        inicios = self.indptr[con_vecinos]
+        nivel = 0
+        while con_vecinos.size:
+            siguiente = np.zeros(len(self), dtype=np.uint64)
+            siguiente[con_vecinos] = np.bitwise_or.reduceat(frontera[self.indices], inicios)
+            siguiente &= ~visitados
+            activos = np.flatnonzero(siguiente)
+            if activos.size == 0:
+                break
+            nivel += 1
+            alcanzadas = _contar_bits(siguiente[activos])
+            sumas[activos] += nivel * alcanzadas
+            cuadrados[activos] += nivel * nivel * alcanzadas
+            visitados |= siguiente
+            frontera = siguiente
+        return sumas, cuadrados
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def _rangos(inicios: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Concatenacion de arange(inicio, inicio + longitud) de cada par, sin bucles"""
+    desplazamientos = np.repeat(inicios - (np.cumsum(longitudes) - longitudes), longitudes)
+    return np.arange(int(longitudes.sum())) + desplazamientos
+
+def _contar_bits(valores: np.ndarray) -> np.ndarray:
+    """Cantidad de bits en 1 de cada uint64 (misma forma que valores)"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(valores).astype(np.int64)
+    # NumPy < 2.0: tabla por byte
+    tabla = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+    bytes_ = np.ascontiguousarray(valores).view(np.uint8)
+    return tabla[bytes_].reshape(valores.shape + (8,)).sum(axis=-1)
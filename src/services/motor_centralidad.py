@@ -0,0 +1,152 @@
+﻿# -*- coding: utf-8 -*-
+# motor_centralidad.py
+"""
+Centralidades espectrales (PageRank, vector propio, Katz) por iteracion de
+potencias vectorizada sobre la adyacencia CSR
+"""
+from typing import Dict, Optional
+import networkx as nx
+import numpy as np
+from services.matriz_adyacencia import MatrizAdyacencia
+
+# Fraccion de 1 / radio espectral usada como alfa de Katz por defecto
+FRACCION_ALFA_KATZ = 0.9
+
+class MotorCentralidad:
+    """
+    Calcula centralidades como arrays por posicion de la matriz
+    La adyacencia CSR (propia o la compartida del servicio) y los resultados
+    se conservan mientras la version del grafo no cambie. Los criterios de
+    convergencia y las normalizaciones son los de networkx (suma de
+    |x - x_anterior| < N * tolerancia), por lo que los valores coinciden
+    con nx.pagerank, nx.eigenvector_centrality y, con el mismo alfa,
+    nx.katz_centrality (ver katz()).
+    """
+
+    def __init__(self, matriz: Optional[MatrizAdyacencia] = None):
+        self.matriz = matriz if matriz is not None else MatrizAdyacencia()
+        # Version de los datos derivados; la matriz compartida avanza por su cuenta
+        self.version: Optional[int] = None
+        # Fila de cada entrada de indices, para A @ x con bincount
+        self._filas = np.zeros(0, dtype=np.int64)
+        self._resultados: Dict[tuple, np.ndarray] = {}
+        self._radio_espectral: Optional[float] = None
+
+    def actualizar(self, grafo: nx.Graph, version: Optional[int] = None) -> MatrizAdyacencia:
+        """
+        Poner al dia la adyacencia y descartar los resultados si cambio la
+        version (None fuerza el recalculo)
+        """
+        self.matriz.actualizar(grafo, version)
+        if version is None or version != self.version:
+            self._filas = np.repeat(np.arange(len(self.matriz)), self.matriz.grados)
+            self._resultados.clear()
+            self._radio_espectral = None
+            self.version = version
+        return self.matriz
+
+    def grado(self) -> np.ndarray:
+        """Grado normalizado por N - 1 (como nx.degree_centrality)"""
+        n = len(self.matriz)
+        if n <= 1:
+            return np.ones(n, dtype=np.float64)
+        return self.matriz.grados / (n - 1)
+
+    def pagerank(self, alfa: float = 0.85, max_iteraciones: int = 100,
+                 tolerancia: float = 1e-6) -> np.ndarray:
+        """PageRank con teletransporte uniforme; los nodos sin vecinos reparten su peso a todos"""
+        clave = ('pagerank', alfa, max_iteraciones, tolerancia)
+        if clave not in self._resultados:
+            n = len(self.matriz)
+            if n == 0:
+                return np.zeros(0, dtype=np.float64)
+            grados = self.matriz.grados
+            sin_vecinos = grados == 0
+            inversos = np.zeros(n, dtype=np.float64)
+            inversos[~sin_vecinos] = 1.0 / grados[~sin_vecinos]
+            x = np.full(n, 1.0 / n)
+            for _ in range(max_iteraciones):
+                anterior = x
+                x = (alfa * (self._producto(anterior * inversos) + anterior[sin_vecinos].sum() / n) +
+                     (1 - alfa) / n)
+                if np.abs(x - anterior).sum() < n * tolerancia:
+                    break
+            else:
+                raise nx.PowerIterationFailedConvergence(max_iteraciones)
+            self._resultados[clave] = x
+        return self._resultados[clave]
+
+    def vector_propio(self, max_iteraciones: int = 100, tolerancia: float = 1e-6) -> np.ndarray:
+        """
+        Centralidad de vector propio por iteracion con A + I (converge tambien
+        en grafos bipartitos), normalizada en norma euclidea
+        """
+        clave = ('vector_propio', max_iteraciones, tolerancia)
+        if clave not in self._resultados:
+            n = len(self.matriz)
+            if n == 0:
+                return np.zeros(0, dtype=np.float64)
+            x = np.full(n, 1.0 / n)
+            for _ in range(max_iteraciones):
+                anterior = x
+                x = anterior + self._producto(anterior)
+                norma = np.linalg.norm(x) or 1.0
+                x = x / norma
+                if np.abs(x - anterior).sum() < n * tolerancia:
+                    break
+            else:
+                raise nx.PowerIterationFailedConvergence(max_iteraciones)
+            # (A + I) x = norma * x en el punto fijo
+            self._radio_espectral = float(norma) - 1.0
+            self._resultados[clave] = x
+        return self._resultados[clave]
+
+    def katz(self, alfa: Optional[float] = None, beta: float = 1.0,
+             max_iteraciones: int = 1000, tolerancia: float = 1e-6) -> np.ndarray:
+        """
+        Centralidad de Katz x = alfa * A x + beta, normalizada en norma euclidea
+        Solo converge si alfa < 1 / radio espectral; alfa=None usa
+        FRACCION_ALFA_KATZ de ese limite, estimado con vector_propio(). Ese
+        valor por defecto no es el de nx.katz_centrality (alfa fijo 0.1, que no
+        converge si el radio espectral pasa de 10): para comparar con networkx
+        hay que pasar el mismo alfa a ambos.
+        """
+        if alfa is None:
+            self.vector_propio()
+            alfa = FRACCION_ALFA_KATZ / max(self._radio_espectral, 1.0)
+        clave = ('katz', alfa, beta, max_iteraciones, tolerancia)
+        if clave not in self._resultados:
+            n = len(self.matriz)
+            if n == 0:
+                return np.zeros(0, dtype=np.float64)
+            x = np.zeros(n, dtype=np.float64)
+            for _ in range(max_iteraciones):
+                anterior = x
+                x = alfa * self._producto(anterior) + beta
+                if np.abs(x - anterior).sum() < n * tolerancia:
+                    break
+            else:
+                raise nx.PowerIterationFailedConvergence(max_iteraciones)
+            self._resultados[clave] = x / (np.linalg.norm(x) or 1.0)
+        return self._resultados[clave]
+
+    def _producto(self, x: np.ndarray) -> np.ndarray:
+        """A @ x (la adyacencia es simetrica)"""
+        return np.bincount(self._filas, weights=x[self.matriz.indices], minlength=len(self.matriz))
+
+def posiciones_mejores(valores: np.ndarray, cantidad: int) -> np.ndarray:
+    """
+    Posiciones de los cantidad mayores valores, de mayor a menor (empates por posicion)
+    argpartition las separa en O(N); solo se ordenan esas cantidad.
+    """
+    cantidad = min(cantidad, valores.size)
+    if cantidad <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if cantidad < valores.size:
+        candidatas = np.argpartition(-valores, cantidad - 1)[:cantidad]
+        # El k-esimo valor puede repetirse fuera de las elegidas: se suman sus primeras apariciones
+        limite = valores[candidatas].min()
+        candidatas = np.union1d(candidatas, np.flatnonzero(valores == limite)[:cantidad])
+    else:
+        candidatas = np.arange(valores.size)
+    return candidatas[np.lexsort((candidatas, -valores[candidatas]))][:cantidad]
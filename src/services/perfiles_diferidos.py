@@ -0,0 +1,113 @@
+﻿# -*- coding: utf-8 -*-
+# perfiles_diferidos.py
+"""
+Perfiles de usuario cargados bajo demanda desde el repositorio
+"""
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+from models.usuario import Usuario
+from services.cache_lru import CacheLRU
+from services.data_manager import RepositorioRed
+
+class PerfilesDiferidos(MutableMapping):
+    """
+    Mapping id -> Usuario que solo mantiene los ids en memoria
+    Cada perfil se lee del repositorio al pedirlo (obtener_usuario, que debe
+    usar un indice: admite_lectura_por_id) y queda en una cache LRU acotada.
+    Los usuarios agregados en la sesion se fijan en memoria: todavia no estan
+    en el repositorio y no pueden descartarse.
+    """
+
+    def __init__(self, repositorio: RepositorioRed, ids: Iterable[int],
+                 adyacencia: Mapping[int, Mapping], capacidad: int = 10_000):
+        self._repositorio = repositorio
+        self._ids = set(ids)
+        # Los amigos de cada perfil son siempre su adyacencia en el grafo
+        self._adyacencia = adyacencia
+        self._cache = CacheLRU(capacidad)
+        self._fijados: Dict[int, Usuario] = {}
+
+    def __getitem__(self, usuario_id: int) -> Usuario:
+        usuario = self._fijados.get(usuario_id)
+        if usuario is not None:
+            return usuario
+        if usuario_id not in self._ids:
+            raise KeyError(usuario_id)
+        usuario = self._cache.obtener(usuario_id)
+        if usuario is None:
+            datos = self._repositorio.obtener_usuario(usuario_id)
+            if datos is None:
+                raise KeyError(usuario_id)
+            usuario = self._crear(datos)
+            self._cache.guardar(usuario_id, usuario)
+        return usuario
+
+    def __setitem__(self, usuario_id: int, usuario: Usuario) -> None:
+        self._ids.add(usuario_id)
+        self._fijados[usuario_id] = usuario
+        self._cache.invalidar((usuario_id,))
+
+    def __delitem__(self, usuario_id: int) -> None:
+        if usuario_id not in self._ids:
+            raise KeyError(usuario_id)
+        self._ids.discard(usuario_id)
+        self._fijados.pop(usuario_id, None)
+        self._cache.invalidar((usuario_id,))
+
+    def pop(self, usuario_id: int, *defecto) -> Usuario:
+        """Quitar un usuario aunque su perfil ya no este en el repositorio"""
+        if usuario_id not in self._ids:
+            if defecto:
+                return defecto[0]
+            raise KeyError(usuario_id)
+        try:
+            usuario = self[usuario_id]
+        except KeyError:
+            usuario = Usuario(usuario_id, "")
+            usuario.vincular_adyacencia(self._adyacencia[usuario_id])
+        del self[usuario_id]
+        return usuario
+
+    def __contains__(self, usuario_id) -> bool:
+        return usuario_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def values(self) -> Iterator[Usuario]:
+        """
+        Recorrer todos los perfiles leyendo el repositorio en orden
+        Los perfiles que no estaban en cache se crean sin guardarse en ella,
+        para que un recorrido completo no desplace a los usados recientemente.
+        """
+        for datos in self._repositorio.iterar_usuarios():
+            usuario_id = datos['id']
+            if usuario_id in self._fijados or usuario_id not in self._ids:
+                continue
+            usuario = self._cache.obtener(usuario_id)
+            yield usuario if usuario is not None else self._crear(datos)
+        yield from list(self._fijados.values())
+
+    def items(self) -> Iterator[Tuple[int, Usuario]]:
+        return ((usuario.id, usuario) for usuario in self.values())
+
+    def en_memoria(self) -> List[Usuario]:
+        """Perfiles que estan en memoria (en cache o fijados)"""
+        return self._cache.valores() + list(self._fijados.values())
+
+    def descartar_cache(self, usuario_ids: Iterable[int]) -> None:
+        """Olvidar los perfiles en cache (p. ej. porque cambiaron en el repositorio)"""
+        self._cache.invalidar(usuario_ids)
+
+    def estadisticas(self) -> Dict:
+        """Ocupacion y aciertos de la cache de perfiles"""
+        return dict(self._cache.estadisticas(), fijados=len(self._fijados))
+
+    def _crear(self, datos: Dict) -> Usuario:
+        datos = {clave: valor for clave, valor in datos.items() if clave != 'amigos'}
+        usuario = Usuario.from_dict(datos)
+        usuario.vincular_adyacencia(self._adyacencia[usuario.id])
+        return usuario
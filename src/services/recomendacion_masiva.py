@@ -0,0 +1,147 @@
+﻿# -*- coding: utf-8 -*-
+# recomendacion_masiva.py
+"""
+Generacion de recomendaciones para todos los usuarios con un pool de procesos
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from models.usuario import Usuario
+from services.recomendador import RecomendadorConexiones, EstrategiaRecomendacion
+
+# (id, nombre, edad, email, intereses, amigos)
+RegistroUsuario = Tuple[int, str, int, str, List[str], Tuple[int, ...]]
+
+# Estado de cada proceso worker, se construye una sola vez en el inicializador
+_estado_worker: Dict = {}
+
+
+def _inicializar_worker(registros: Sequence[RegistroUsuario],
+                        estrategia: EstrategiaRecomendacion) -> None:
+    """Reconstruir usuarios e indice de intereses dentro del worker"""
+    # Las estrategias llegan ya preparadas con el grafo (p. ej. su adyacencia CSR)
+    usuarios: List[Usuario] = []
+    posiciones: Dict[int, int] = {}
+    amigos: Dict[int, frozenset] = {}
+    indice: Dict[int, List[int]] = {}
+
+    for posicion, (usuario_id, nombre, edad, email, intereses, amigos_ids) in enumerate(registros):
+        usuario = Usuario(usuario_id, nombre, edad, email, intereses)
+        usuarios.append(usuario)
+        posiciones[usuario_id] = posicion
+        amigos[usuario_id] = frozenset(amigos_ids)
+        for interes_id in usuario.ids_intereses:
+            indice.setdefault(interes_id, []).append(posicion)
+
+    _estado_worker.update(
+        usuarios=usuarios,
+        usuarios_por_id={u.id: u for u in usuarios},
+        posiciones=posiciones,
+        amigos=amigos,
+        indice=indice,
+        recomendador=RecomendadorConexiones(estrategia)
+    )
+
+
+def _procesar_lote(usuario_ids: Sequence[int], limite: int) -> str:
+    """Calcular recomendaciones de un lote y devolverlas como lineas JSONL"""
+    usuarios = _estado_worker['usuarios']
+    posiciones = _estado_worker['posiciones']
+    amigos = _estado_worker['amigos']
+    indice = _estado_worker['indice']
+    recomendador = _estado_worker['recomendador']
+
+    lineas = []
+    for usuario_id in usuario_ids:
+        usuario = usuarios[posiciones[usuario_id]]
+        excluidos = amigos[usuario_id]
+
+        if recomendador.estrategia.requiere_interes_comun:
+            # Solo los usuarios con algun interes comun pueden ser recomendados;
+            # se ordenan por posicion para conservar el orden del servicio
+            candidatas = set()
+            for interes_id in usuario.ids_intereses:
+                candidatas.update(indice[interes_id])
+            candidatos = [
+                usuarios[posicion] for posicion in sorted(candidatas)
+                if usuarios[posicion].id != usuario_id and usuarios[posicion].id not in excluidos
+            ]
+        else:
+            candidatos = recomendador.generar_candidatos(usuario, _estado_worker['usuarios_por_id'])
+
+        recomendaciones = recomendador.generar_recomendaciones(usuario, candidatos, limite)
+        lineas.append(json.dumps({
+            'id': usuario_id,
+            'recomendaciones': [
+                {
+                    'id': r['id'],
+                    'score': r['score'],
+                    'compatibilidad': r['compatibilidad'],
+                    'intereses_comunes': sorted(r['intereses_comunes'])
+                }
+                for r in recomendaciones
+            ]
+        }, ensure_ascii=False))
+
+    return '\n'.join(lineas) + '\n' if lineas else ''
+
+
+def _dividir(ids: Sequence[int], tamano_lote: int) -> Iterator[Sequence[int]]:
+    for inicio in range(0, len(ids), tamano_lote):
+        yield ids[inicio:inicio + tamano_lote]
+
+
+def generar_recomendaciones_masivas(registros: Sequence[RegistroUsuario],
+                                    estrategia: EstrategiaRecomendacion,
+                                    ruta_salida: str,
+                                    limite: int = 10,
+                                    workers: Optional[int] = None,
+                                    tamano_lote: int = 1000,
+                                    progreso: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Escribir en ruta_salida (JSONL) las recomendaciones de todos los usuarios
+    Los datos se envian una vez a cada worker; los lotes de ids se reparten
+    entre ellos y los resultados se escriben en orden a medida que llegan.
+    Retorna: cantidad de usuarios procesados
+    """
+    ids = [registro[0] for registro in registros]
+    total = len(ids)
+    workers = workers or os.cpu_count() or 1
+    procesados = 0
+
+    with open(ruta_salida, 'w', encoding='utf-8') as salida:
+        if workers == 1:
+            # Sin pool: mismo codigo en el proceso actual
+            _inicializar_worker(registros, estrategia)
+            for lote in _dividir(ids, tamano_lote):
+                salida.write(_procesar_lote(lote, limite))
+                procesados += len(lote)
+                if progreso:
+                    progreso(procesados, total)
+            _estado_worker.clear()
+            return procesados
+
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_inicializar_worker,
+                                 initargs=(registros, estrategia)) as pool:
+            # Ventana acotada de lotes en vuelo para limitar la memoria
+            pendientes = []
+            lotes = _dividir(ids, tamano_lote)
+            for lote in lotes:
+                pendientes.append((len(lote), pool.submit(_procesar_lote, lote, limite)))
+                if len(pendientes) >= 2 * workers:
+                    break
+
+            while pendientes:
+                cantidad, futuro = pendientes.pop(0)
+                salida.write(futuro.result())
+                procesados += cantidad
+                if progreso:
+                    progreso(procesados, total)
+
+                siguiente = next(lotes, None)
+                if siguiente is not None:
+                    pendientes.append((len(siguiente), pool.submit(_procesar_lote, siguiente, limite)))
+
+    return procesados
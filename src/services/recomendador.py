@@ -3,17 +3,55 @@
 """
 Sistema de recomendaciones - Implementa Strategy Pattern
 """
-from typing import List, Dict
+from typing import List, Dict, FrozenSet, Tuple, Optional
 from abc import ABC, abstractmethod
 from models.usuario import Usuario
 
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional
+    np = None
+
 class EstrategiaRecomendacion(ABC):
     """Interfaz para estrategias de recomendacion"""
     
+    # Si es True solo pueden recomendarse usuarios con algun interes comun
+    requiere_interes_comun = True
+    
+    def preparar(self, grafo, version: int = None, adyacencia=None) -> None:
+        """
+        Actualizar datos derivados del grafo antes de recomendar
+        adyacencia: MatrizAdyacencia compartida que se mantiene con el grafo
+        """
+        pass
+    
+    def generar_candidatos(self, usuario_origen: Usuario,
+                           usuarios: Dict[int, Usuario]) -> List[Usuario]:
+        """Candidatos a recomendar: por defecto todos los usuarios que no son amigos"""
+        return [
+            u for u in usuarios.values()
+            if u.id != usuario_origen.id and u.id not in usuario_origen.amigos
+        ]
+    
     @abstractmethod
     def calcular_score(self, usuario_origen: Usuario, usuario_candidato: Usuario) -> float:
         """Calcular puntuacion de compatibilidad entre usuarios"""
         pass
+    
+    def seleccionar_mejores(self, usuario_origen: Usuario, candidatos: List[Usuario],
+                            limite: int) -> List[Tuple[Usuario, float]]:
+        """
+        Puntuar los candidatos con intereses comunes y devolver los mejores
+        Retorna: lista de (candidato, score) ordenada por score descendente
+        """
+        puntuados = [
+            (candidato, self.calcular_score(usuario_origen, candidato))
+            for candidato in candidatos
+            if usuario_origen.tiene_interes_comun(candidato)
+        ]
+        # sort es estable: a igual score se respeta el orden de los candidatos
+        puntuados.sort(key=lambda x: x[1], reverse=True)
+        return puntuados[:limite]
 
 class RecomendacionPorIntereses(EstrategiaRecomendacion):
     """Estrategia de recomendacion basada en intereses comunes"""
@@ -25,7 +63,7 @@ class RecomendacionPorIntereses(EstrategiaRecomendacion):
         score = len(intereses_comunes)
         
         # Bonus por diversidad de intereses del candidato
-        if len(usuario_candidato.intereses) > 2:
+        if usuario_candidato.num_intereses > 2:
             score += 0.5
         
         # Bonus por edad similar (+/- 5 anos)
@@ -35,6 +73,247 @@ class RecomendacionPorIntereses(EstrategiaRecomendacion):
         
         return score
 
+class RecomendacionVectorizada(RecomendacionPorIntereses):
+    """
+    Misma puntuacion que RecomendacionPorIntereses calculada en lote con NumPy
+    
+    Mantiene los usuarios ya vistos como arrays: una matriz de bits de
+    intereses, un vector de edades y un vector con la cantidad de intereses.
+    Cada fila se reutiliza entre llamadas mientras los intereses y la edad
+    del usuario sean los mismos con que se construyo; si cambian (aunque se
+    edite el mismo objeto Usuario) se vuelve a volcar.
+    """
+    
+    def __init__(self):
+        if np is None:
+            raise ImportError("RecomendacionVectorizada requiere numpy")
+        self._filas: Dict[int, int] = {}
+        # Datos con que se construyo cada fila: (ids de intereses, edad, cantidad de intereses)
+        self._datos: List[Tuple[FrozenSet[int], int, int]] = []
+        self._bits = np.zeros((0, 1), dtype=np.uint64)
+        self._edades = np.zeros(0, dtype=np.int64)
+        self._num_intereses = np.zeros(0, dtype=np.int64)
+    
+    def __getstate__(self):
+        # Las filas se reconstruyen bajo demanda; no se envian a otros procesos
+        return {}
+    
+    def __setstate__(self, estado):
+        self.__init__()
+    
+    def seleccionar_mejores(self, usuario_origen: Usuario, candidatos: List[Usuario],
+                            limite: int) -> List[Tuple[Usuario, float]]:
+        """Puntuar todos los candidatos en una pasada vectorizada"""
+        if not candidatos or limite <= 0:
+            return []
+        
+        fila_origen = self._fila(usuario_origen)
+        filas = np.fromiter((self._fila(c) for c in candidatos),
+                            dtype=np.intp, count=len(candidatos))
+        
+        from services.matriz_adyacencia import _contar_bits
+        comunes = _contar_bits(self._bits[filas] & self._bits[fila_origen]).sum(axis=1)
+        posiciones = np.flatnonzero(comunes > 0)
+        if posiciones.size == 0:
+            return []
+        filas = filas[posiciones]
+        
+        # Mismo orden de sumas que calcular_score para obtener floats identicos
+        bono_diversidad = self._num_intereses[filas] > 2
+        score = comunes[posiciones].astype(np.float64)
+        score = score + np.where(bono_diversidad, 0.5, 0.0)
+        bono_edad = np.zeros(filas.size, dtype=bool)
+        if usuario_origen.edad > 0:
+            edades = self._edades[filas]
+            bono_edad = (edades > 0) & (np.abs(edades - usuario_origen.edad) <= 5)
+            score = score + np.where(bono_edad, 0.3, 0.0)
+        
+        seleccion = _top_k_estable(score, limite)
+        return [
+            (candidatos[posiciones[i]],
+             score[i].item() if bono_diversidad[i] or bono_edad[i] else int(comunes[posiciones[i]]))
+            for i in seleccion
+        ]
+    
+    def _fila(self, usuario: Usuario) -> int:
+        """Obtener la fila del usuario, registrandolo si es necesario"""
+        fila = self._filas.get(usuario.id)
+        if fila is not None and self._datos[fila] == _datos_fila(usuario):
+            return fila
+        return self._registrar(usuario, fila)
+    
+    def _registrar(self, usuario: Usuario, fila: int = None) -> int:
+        """Volcar los datos del usuario en los arrays (fila nueva o reemplazo)"""
+        if fila is None:
+            fila = len(self._datos)
+            self._datos.append(_datos_fila(usuario))
+            self._filas[usuario.id] = fila
+            if fila >= self._edades.size:
+                self._redimensionar(max(16, 2 * self._edades.size), self._bits.shape[1])
+        else:
+            self._datos[fila] = _datos_fila(usuario)
+        
+        # Los ids de interes son los de la tabla global de Usuario
+        indices = usuario.ids_intereses
+        palabras_necesarias = max(indices, default=0) // 64 + 1
+        if palabras_necesarias > self._bits.shape[1]:
+            self._redimensionar(self._edades.size, max(palabras_necesarias, 2 * self._bits.shape[1]))
+        
+        self._bits[fila] = 0
+        for indice in indices:
+            self._bits[fila, indice // 64] |= np.uint64(1) << np.uint64(indice % 64)
+        self._edades[fila] = usuario.edad
+        self._num_intereses[fila] = usuario.num_intereses
+        return fila
+    
+    def _redimensionar(self, filas: int, palabras: int) -> None:
+        """Ampliar la capacidad de los arrays conservando su contenido"""
+        usadas = min(len(self._datos), self._bits.shape[0])
+        bits = np.zeros((filas, palabras), dtype=np.uint64)
+        bits[:usadas, :self._bits.shape[1]] = self._bits[:usadas]
+        edades = np.zeros(filas, dtype=np.int64)
+        edades[:usadas] = self._edades[:usadas]
+        num_intereses = np.zeros(filas, dtype=np.int64)
+        num_intereses[:usadas] = self._num_intereses[:usadas]
+        self._bits, self._edades, self._num_intereses = bits, edades, num_intereses
+
+def _datos_fila(usuario: Usuario) -> Tuple[FrozenSet[int], int, int]:
+    """Datos del usuario de los que depende su fila"""
+    return usuario.ids_intereses, usuario.edad, usuario.num_intereses
+
+def _top_k_estable(score: 'np.ndarray', k: int) -> 'np.ndarray':
+    """
+    Indices de los k mayores scores en orden descendente
+    A igual score conserva el orden original, igual que un sort estable
+    """
+    if k < score.size:
+        umbral = score[np.argpartition(-score, k - 1)[:k]].min()
+        indices = np.flatnonzero(score >= umbral)
+    else:
+        indices = np.arange(score.size)
+    orden = np.lexsort((indices, -score[indices]))
+    return indices[orden][:k]
+
+class EstrategiaGrafo(EstrategiaRecomendacion):
+    """
+    Base para estrategias basadas en la estructura del grafo
+    
+    Los candidatos se limitan a los vecinos a 2 saltos y se puntuan con un
+    producto disperso sobre la adyacencia CSR, asi que el coste depende de la
+    suma de grados de los amigos y no del total de usuarios.
+    Requiere llamar a preparar(grafo, version) antes de recomendar; con una
+    adyacencia compartida (la del servicio, que se parchea con cada edicion)
+    no hace falta reconstruir el CSR despues de cada cambio.
+    """
+    
+    requiere_interes_comun = False
+    
+    def __init__(self):
+        if np is None:
+            raise ImportError(f"{type(self).__name__} requiere numpy")
+        from services.matriz_adyacencia import MatrizAdyacencia
+        self.adyacencia = MatrizAdyacencia()
+        self._ultimo_vecindario = (None, None, None)
+    
+    def preparar(self, grafo, version: int = None, adyacencia=None) -> None:
+        """Usar la adyacencia compartida (si se indica) y reconstruirla solo si quedo desactualizada"""
+        if adyacencia is not None:
+            self.adyacencia = adyacencia
+        # Las lecturas por fila ya consultan las filas parcheadas
+        self.adyacencia.actualizar(grafo, version, consolidar=False)
+    
+    def generar_candidatos(self, usuario_origen: Usuario,
+                           usuarios: Dict[int, Usuario]) -> List[Usuario]:
+        """Vecinos a 2 saltos que todavia no son amigos"""
+        columnas, _ = self._vecindario(usuario_origen.id)
+        ids = self.adyacencia.ids
+        return [usuarios[ids[columna]] for columna in columnas.tolist()]
+    
+    def calcular_score(self, usuario_origen: Usuario, usuario_candidato: Usuario) -> float:
+        """Score del candidato dentro del vecindario a 2 saltos (0 si no pertenece)"""
+        columnas, scores = self._vecindario(usuario_origen.id)
+        posicion = self.adyacencia.posiciones.get(usuario_candidato.id)
+        indice = np.searchsorted(columnas, posicion) if posicion is not None else columnas.size
+        if indice < columnas.size and columnas[indice] == posicion:
+            return scores[indice].item()
+        return 0.0
+    
+    def seleccionar_mejores(self, usuario_origen: Usuario, candidatos: List[Usuario],
+                            limite: int) -> List[Tuple[Usuario, float]]:
+        """Puntuar todos los candidatos del vecindario en una sola pasada"""
+        if not candidatos or limite <= 0:
+            return []
+        
+        columnas, scores = self._vecindario(usuario_origen.id)
+        if columnas.size == 0:
+            return []
+        
+        posiciones = self.adyacencia.posiciones
+        buscadas = np.fromiter((posiciones.get(c.id, -1) for c in candidatos),
+                               dtype=np.int64, count=len(candidatos))
+        indices = np.minimum(np.searchsorted(columnas, buscadas), columnas.size - 1)
+        presentes = np.flatnonzero(columnas[indices] == buscadas)
+        score_candidatos = scores[indices[presentes]]
+        
+        seleccion = _top_k_estable(score_candidatos, limite)
+        return [(candidatos[presentes[i]], score_candidatos[i].item()) for i in seleccion]
+    
+    def _vecindario(self, usuario_id: int) -> Tuple['np.ndarray', 'np.ndarray']:
+        """Posiciones a 2 saltos (sin el usuario ni sus amigos) y sus scores"""
+        ady = self.adyacencia
+        clave = (id(ady), ady.version, id(ady.indices), usuario_id)
+        if self._ultimo_vecindario[0] == clave:
+            return self._ultimo_vecindario[1], self._ultimo_vecindario[2]
+        
+        posicion = ady.posiciones.get(usuario_id)
+        if posicion is None:
+            columnas, scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+        else:
+            vecinos = ady.vecinos(posicion)
+            columnas, acumulado = ady.producto_fila(vecinos, self._pesos_intermedios(vecinos))
+            nuevos = (columnas != posicion) & ~np.isin(columnas, vecinos)
+            columnas, acumulado = columnas[nuevos], acumulado[nuevos]
+            scores = self._puntuar(posicion, columnas, acumulado)
+        
+        self._ultimo_vecindario = (clave, columnas, scores)
+        return columnas, scores
+    
+    def _pesos_intermedios(self, vecinos: 'np.ndarray') -> Optional['np.ndarray']:
+        """Peso de cada vecino comun en el producto (None cuenta 1 por vecino)"""
+        return None
+    
+    @abstractmethod
+    def _puntuar(self, posicion: int, columnas: 'np.ndarray',
+                 acumulado: 'np.ndarray') -> 'np.ndarray':
+        """Convertir el producto acumulado en el score de cada columna"""
+        pass
+
+class RecomendacionVecinosComunes(EstrategiaGrafo):
+    """Score = cantidad de amigos en comun"""
+    
+    def _puntuar(self, posicion, columnas, acumulado):
+        return acumulado
+
+class RecomendacionAdamicAdar(EstrategiaGrafo):
+    """Score = suma de 1/log(grado) de los amigos en comun"""
+    
+    def _pesos_intermedios(self, vecinos):
+        # Un vecino comun tiene grado >= 2, por lo que log(grado) > 0
+        grados = self.adyacencia.grados[vecinos].astype(np.float64)
+        pesos = np.zeros(grados.size)
+        np.divide(1.0, np.log(grados), out=pesos, where=grados > 1)
+        return pesos
+    
+    def _puntuar(self, posicion, columnas, acumulado):
+        return acumulado
+
+class RecomendacionJaccard(EstrategiaGrafo):
+    """Score = amigos en comun / amigos en total de ambos usuarios"""
+    
+    def _puntuar(self, posicion, columnas, acumulado):
+        grados = self.adyacencia.grados
+        return acumulado / (grados[posicion] + grados[columnas] - acumulado)
+
 class RecomendadorConexiones:
     """Recomendador principal que utiliza diferentes estrategias"""
     
@@ -45,19 +324,24 @@ class RecomendadorConexiones:
         """Cambiar estrategia de recomendacion"""
         self.estrategia = estrategia
     
+    def preparar(self, grafo, version: int = None, adyacencia=None) -> None:
+        """Dar a la estrategia la oportunidad de actualizarse con el grafo"""
+        self.estrategia.preparar(grafo, version, adyacencia)
+    
+    def generar_candidatos(self, usuario_origen: Usuario,
+                           usuarios: Dict[int, Usuario]) -> List[Usuario]:
+        """Candidatos a recomendar segun la estrategia actual"""
+        return self.estrategia.generar_candidatos(usuario_origen, usuarios)
+    
     def generar_recomendaciones(self, usuario_origen: Usuario, 
                               candidatos: List[Usuario], 
                               limite: int = 10) -> List[Dict]:
         """Generar recomendaciones ordenadas por relevancia"""
         recomendaciones = []
         
-        for candidato in candidatos:
-            # Solo recomendar si hay intereses comunes
-            intereses_comunes = usuario_origen.intereses_comunes(candidato)
-            if not intereses_comunes:
-                continue
-            
-            score = self.estrategia.calcular_score(usuario_origen, candidato)
+        # La estrategia filtra y ordena los candidatos
+        mejores = self.estrategia.seleccionar_mejores(usuario_origen, candidatos, limite)
+        for candidato, score in mejores:
             compatibilidad = min(100, int(score * 25))  # Convertir a porcentaje
             
             recomendacion = {
@@ -66,16 +350,13 @@ class RecomendadorConexiones:
                 'edad': candidato.edad,
                 'email': candidato.email,
                 'intereses': candidato.intereses,
-                'intereses_comunes': intereses_comunes,
+                'intereses_comunes': usuario_origen.intereses_comunes(candidato),
                 'score': score,
                 'compatibilidad': compatibilidad
             }
             recomendaciones.append(recomendacion)
         
-        # Ordenar por score descendente
-        recomendaciones.sort(key=lambda x: x['score'], reverse=True)
-        
-        return recomendaciones[:limite]
+        return recomendaciones
     
     def obtener_estadisticas_recomendaciones(self, usuario_origen: Usuario,
                                            candidatos: List[Usuario]) -> Dict:
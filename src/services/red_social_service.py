@@ -4,48 +4,499 @@
 Servicio principal para manejar la logica de negocio de la red social
 Implementa el patron Service Layer
 """
+import time
 import networkx as nx
-from typing import List, Dict, Tuple, Optional, Set
-from models.usuario import Usuario
-from services.data_manager import DataManager
+import numpy as np
+from array import array
+from typing import List, Dict, Tuple, Optional, Set, Callable, Iterable, Sequence
+from models.usuario import Usuario, cantidad_conjuntos_intereses, depurar_conjuntos_intereses
+from services.data_manager import DataManager, RepositorioRed
 from services.recomendador import RecomendadorConexiones
 from services.analizador_red import AnalizadorRed
+from services.matriz_adyacencia import MatrizAdyacencia
+from services.centralidad_intermediacion import MUESTRAS_INTERMEDIACION
+from services import recomendacion_masiva
+from services.cache_lru import CacheLRU
+from services import journal as ops
+from services.journal import JournalCambios
+from services.guardado import EscrituraPendiente
+from services.perfiles_diferidos import PerfilesDiferidos
+from services.cache_carga import CacheCarga
+from services.exportador_metricas import ExportadorMetricas, COLUMNAS as COLUMNAS_METRICAS
+
+# Las tablas de conjuntos de intereses se depuran al superar el doble de los
+# usuarios mas este minimo (asi su tamano queda acotado por los usuarios)
+MINIMO_CONJUNTOS_INTERESES = 1024
 
 class RedSocialService:
     """Servicio principal que maneja toda la logica de negocio"""
     
-    def __init__(self):
+    def __init__(self, data_manager: RepositorioRed = None,
+                 capacidad_cache_recomendaciones: int = 1024,
+                 journal: JournalCambios = None, compactar_cada: int = 10000,
+                 perfiles_diferidos: bool = False, capacidad_perfiles: int = 10_000,
+                 cache_carga: CacheCarga = None):
         self.grafo = nx.Graph()
         self.usuarios: Dict[int, Usuario] = {}
-        self.data_manager = DataManager()
+        # Con perfiles diferidos solo se cargan ids y conexiones; los perfiles
+        # se leen del repositorio al pedirlos (cache LRU de capacidad_perfiles)
+        self.perfiles_diferidos = perfiles_diferidos
+        self.capacidad_perfiles = capacidad_perfiles
+        self.data_manager = data_manager or DataManager()
+        if perfiles_diferidos and not self.data_manager.admite_lectura_por_id:
+            # Sin indice cada perfil no cacheado costaria recorrer todo el repositorio
+            raise ValueError(f"Los perfiles diferidos requieren un repositorio con lectura por id "
+                             f"(SQLite o snapshot), no {type(self.data_manager).__name__}")
         self.recomendador = RecomendadorConexiones()
-        self.analizador = AnalizadorRed()
+        # Adyacencia CSR compartida por recomendador, analizador y exportador;
+        # las ediciones puntuales la parchean en lugar de reconstruirla
+        self.adyacencia = MatrizAdyacencia()
+        self.analizador = AnalizadorRed(self.adyacencia)
         self._siguiente_id = 1
+        # Se incrementa con cada cambio del grafo (invalida datos derivados)
+        self._version = 0
+        # Indice invertido id de interes -> ids de usuarios que lo tienen
+        # (None: todavia no construido, solo con perfiles diferidos)
+        self._indice_intereses: Optional[Dict[int, Set[int]]] = {}
+        # usuario_id -> (estrategia, recomendaciones)
+        self._cache_recomendaciones = CacheLRU(capacidad_cache_recomendaciones)
+        # Journal de cambios: guardar solo anexa operaciones y se compacta
+        # en data_manager cuando acumula compactar_cada operaciones
+        self.journal = journal
+        self.compactar_cada = compactar_cada
+        self._compactacion_pendiente = False
+        self._reproduciendo_journal = False
+        # Usuarios y conexiones modificados desde el ultimo guardado
+        self._usuarios_modificados: Set[int] = set()
+        self._conexiones_modificadas: Set[Tuple[int, int]] = set()
+        # Estado ya construido de la ultima carga (no se usa con perfiles diferidos)
+        self.cache_carga = cache_carga
+        # Firma de cada particion del repositorio tal como esta en memoria
+        self._firmas_particiones: Dict[str, object] = {}
+        self._sincronizando_disco = False
     
     def cargar_datos(self) -> None:
         """Cargar datos desde archivos"""
-        usuarios_data, conexiones_data = self.data_manager.cargar_datos()
+        # Firmas tomadas antes de leer: un cambio durante la carga se detecta despues
+        self._firmas_particiones = self.data_manager.particiones()
+        if self.perfiles_diferidos:
+            self._cargar_topologia()
+        elif self.cache_carga is None or not self.cache_carga.restaurar(self):
+            inicio = time.perf_counter()
+            self._cargar_perfiles()
+            if self.cache_carga is not None:
+                self.cache_carga.guardar(self, time.perf_counter() - inicio)
+        
+        # Lo cargado ya esta guardado; solo falta aplicar lo registrado despues
+        self._compactacion_pendiente = False
+        if self.journal is not None:
+            self._reproducir_journal()
+        self._usuarios_modificados.clear()
+        self._conexiones_modificadas.clear()
+        self._depurar_intereses()
+    
+    def _cargar_perfiles(self) -> None:
+        """Cargar todos los usuarios completos y sus conexiones"""
+        # Los registros se consumen a medida que se leen; las conexiones se
+        # acumulan como enteros de 64 bits en lugar de diccionarios
+        usuarios = []
+        origenes, destinos = array('q'), array('q')
+        conexiones_origen, conexiones_destino = [], []
+        
+        for registros, bloque_origen, bloque_destino in self.data_manager.iterar_bloques():
+            for user_data in registros:
+                # Las listas de amigos guardadas tambien aportan conexiones
+                amigos = user_data.pop('amigos', None) or ()
+                usuario = Usuario.from_dict(user_data)
+                usuarios.append(usuario)
+                origenes.extend([usuario.id] * len(amigos))
+                destinos.extend(amigos)
+            conexiones_origen.append(bloque_origen)
+            conexiones_destino.append(bloque_destino)
         
-        # Cargar usuarios
-        for user_data in usuarios_data:
-            usuario = Usuario.from_dict(user_data)
+        conexiones_origen.append(np.frombuffer(origenes, dtype=np.int64))
+        conexiones_destino.append(np.frombuffer(destinos, dtype=np.int64))
+        self.cargar_masivo(usuarios, np.concatenate(conexiones_origen),
+                           np.concatenate(conexiones_destino))
+    
+    def _cargar_topologia(self) -> None:
+        """Cargar solo ids y conexiones; los perfiles quedan en el repositorio"""
+        ids, origenes, destinos = self.data_manager.cargar_topologia()
+        self.grafo.add_nodes_from(ids.tolist())
+        self.usuarios = PerfilesDiferidos(self.data_manager, ids.tolist(),
+                                          self.grafo.adj, self.capacidad_perfiles)
+        for usuario_id in ids.tolist():
+            self.analizador.estadisticas.agregar_nodo(usuario_id)
+        # El indice de intereses se construye solo si hace falta
+        self._indice_intereses = None
+        self._agregar_aristas(origenes, destinos)
+        if ids.size:
+            self._siguiente_id = max(self._siguiente_id, int(ids.max()) + 1)
+        self._version += 1
+        self._cache_recomendaciones.limpiar()
+    
+    def cambios_en_disco(self) -> bool:
+        """Indica si alguna particion del repositorio cambio desde la ultima carga o guardado"""
+        return self.data_manager.particiones() != self._firmas_particiones
+    
+    def recargar_cambios(self) -> Optional[Dict]:
+        """
+        Aplicar solo las diferencias entre el disco y la memoria
+        Se releen unicamente las particiones cuya firma cambio y se agregan o
+        quitan los usuarios y conexiones que difieren, sin reconstruir el
+        servicio ni descartar sus caches. Los cambios locales sin guardar
+        (pendientes o en el journal) prevalecen sobre los del disco.
+        El costo depende del repositorio: DataManager (JSON o compacto) es una
+        sola particion, asi que cualquier cambio relee y compara toda la red,
+        O(N + M); RepositorioFragmentado relee solo los fragmentos cambiados.
+        Retorna: resumen de lo aplicado, o None si hay una carga masiva sin
+        guardar (el estado en memoria no es comparable con el disco)
+        """
+        if self._compactacion_pendiente:
+            return None
+        inicio = time.perf_counter()
+        resumen = dict.fromkeys(('particiones', 'usuarios_agregados', 'usuarios_eliminados',
+                                 'usuarios_modificados', 'conexiones_agregadas',
+                                 'conexiones_eliminadas'), 0)
+        firmas = self.data_manager.particiones()
+        cambiadas = [clave for clave in firmas.keys() | self._firmas_particiones.keys()
+                     if firmas.get(clave) is None or firmas.get(clave) != self._firmas_particiones.get(clave)]
+        if cambiadas:
+            usuarios_locales, conexiones_locales = self._cambios_locales()
+            particiones = [self._leer_particion(clave) for clave in sorted(cambiadas)]
+            self._sincronizando_disco = True
+            try:
+                # Primero los usuarios de todas las particiones: una conexion puede
+                # pertenecer a otra particion que la de un usuario nuevo
+                for rango, en_disco, _ in particiones:
+                    self._aplicar_usuarios(rango, en_disco, usuarios_locales, resumen)
+                for rango, _, aristas_disco in particiones:
+                    self._aplicar_conexiones(rango, aristas_disco, conexiones_locales, resumen)
+            finally:
+                self._sincronizando_disco = False
+            if isinstance(self.usuarios, PerfilesDiferidos):
+                # Los perfiles cambiados se releen; el indice se reconstruye si hace falta
+                self._indice_intereses = None
+        self._firmas_particiones = firmas
+        resumen['particiones'] = len(cambiadas)
+        resumen['segundos'] = time.perf_counter() - inicio
+        return resumen
+    
+    def _cambios_locales(self) -> Tuple[Set[int], Set[Tuple[int, int]]]:
+        """Usuarios y conexiones con cambios locales (pendientes o registrados en el journal)"""
+        usuarios, conexiones = set(self._usuarios_modificados), set(self._conexiones_modificadas)
+        if self.journal is not None:
+            for registro in self.journal.leer():
+                operacion = registro.get('op')
+                if operacion == ops.AGREGAR_USUARIO:
+                    usuarios.add(registro['usuario']['id'])
+                elif operacion == ops.ELIMINAR_USUARIO:
+                    usuarios.add(registro['id'])
+                elif operacion in (ops.AGREGAR_CONEXION, ops.ELIMINAR_CONEXION):
+                    origen, destino = registro['origen'], registro['destino']
+                    conexiones.add((min(origen, destino), max(origen, destino)))
+        return usuarios, conexiones
+    
+    def _leer_particion(self, clave: str) -> Tuple[Optional[Tuple[int, int]], Dict[int, Dict], np.ndarray]:
+        """
+        Leer una particion del disco
+        Retorna: (rango de ids, usuarios por id, conexiones (menor, mayor) como array (k, 2))
+        """
+        registros, origenes, destinos = self.data_manager.leer_particion(clave)
+        # Las listas de amigos guardadas tambien aportan conexiones
+        en_disco: Dict[int, Dict] = {}
+        amigos_origen, amigos_destino = array('q'), array('q')
+        for registro in registros:
+            amigos = registro.pop('amigos', None) or ()
+            en_disco[registro['id']] = registro
+            amigos_origen.extend([registro['id']] * len(amigos))
+            amigos_destino.extend(amigos)
+        origenes = np.concatenate([origenes, np.frombuffer(amigos_origen, dtype=np.int64)])
+        destinos = np.concatenate([destinos, np.frombuffer(amigos_destino, dtype=np.int64)])
+        distintas = origenes != destinos
+        aristas = np.stack((np.minimum(origenes, destinos)[distintas],
+                            np.maximum(origenes, destinos)[distintas]), axis=1)
+        return self.data_manager.rango_particion(clave), en_disco, aristas
+    
+    def _ids_en_rango(self, rango: Optional[Tuple[int, int]]) -> List[int]:
+        ids = np.fromiter(self.usuarios.keys(), dtype=np.int64, count=len(self.usuarios))
+        if rango is not None:
+            ids = ids[(ids >= rango[0]) & (ids < rango[1])]
+        return ids.tolist()
+    
+    def _aplicar_usuarios(self, rango: Optional[Tuple[int, int]], en_disco: Dict[int, Dict],
+                          usuarios_locales: Set[int], resumen: Dict) -> None:
+        """Agregar, quitar y actualizar los usuarios de una particion segun el disco"""
+        en_memoria = set(self._ids_en_rango(rango))
+        for usuario_id in en_memoria - en_disco.keys() - usuarios_locales:
+            if self.eliminar_usuario(usuario_id):
+                resumen['usuarios_eliminados'] += 1
+        for usuario_id, registro in en_disco.items():
+            if usuario_id in usuarios_locales:
+                continue
+            if usuario_id not in en_memoria:
+                self._registrar_usuario(Usuario.from_dict(registro))
+                resumen['usuarios_agregados'] += 1
+            elif self._actualizar_perfil(usuario_id, registro):
+                resumen['usuarios_modificados'] += 1
+    
+    def _aplicar_conexiones(self, rango: Optional[Tuple[int, int]], aristas_disco: np.ndarray,
+                            conexiones_locales: Set[Tuple[int, int]], resumen: Dict) -> None:
+        """Igualar las conexiones de una particion (las de su extremo menor) con el disco"""
+        adyacencia = self.grafo.adj
+        aristas_memoria = np.array(
+            [(usuario_id, vecino) for usuario_id in self._ids_en_rango(rango)
+             for vecino in adyacencia[usuario_id] if vecino > usuario_id],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        for arista in self._aristas_faltantes(aristas_memoria, aristas_disco):
+            if arista not in conexiones_locales and self.eliminar_conexion(*arista):
+                resumen['conexiones_eliminadas'] += 1
+        for arista in self._aristas_faltantes(aristas_disco, aristas_memoria):
+            if arista not in conexiones_locales and self.crear_conexion(*arista):
+                resumen['conexiones_agregadas'] += 1
+    
+    def _aristas_faltantes(self, aristas: np.ndarray, otras: np.ndarray) -> List[Tuple[int, int]]:
+        """Aristas (menor, mayor) de aristas que no estan en otras, sin repetir"""
+        todas = np.concatenate([aristas, otras])
+        if todas.size and todas.min() >= 0 and todas.max() < 2**31:
+            # Una clave de 64 bits por arista es mucho mas rapida que comparar tuplas
+            claves = np.setdiff1d((aristas[:, 0] << 32) | aristas[:, 1], (otras[:, 0] << 32) | otras[:, 1])
+            return list(zip((claves >> 32).tolist(), (claves & 0xFFFFFFFF).tolist()))
+        return sorted(set(map(tuple, aristas.tolist())) - set(map(tuple, otras.tolist())))
+    
+    def _actualizar_perfil(self, usuario_id: int, registro: Dict) -> bool:
+        """Aplicar los datos de perfil guardados a un usuario existente. Retorna: True si cambio"""
+        if isinstance(self.usuarios, PerfilesDiferidos):
+            # El perfil se vuelve a leer del repositorio al pedirlo
+            self.usuarios.descartar_cache((usuario_id,))
+            self._invalidar_recomendaciones((usuario_id,))
+            return False
+        usuario = self.usuarios[usuario_id]
+        nuevo = Usuario.from_dict(registro)
+        if ((usuario.nombre, usuario.edad, usuario.email, usuario.intereses) ==
+                (nuevo.nombre, nuevo.edad, nuevo.email, nuevo.intereses)):
+            return False
+        afectados = {usuario_id}
+        if self._cache_recomendaciones and self.recomendador.estrategia.requiere_interes_comun:
+            afectados |= self._usuarios_con_intereses_comunes(usuario_id)
+        self._desindexar_intereses(usuario)
+        # Se modifica el mismo objeto (la GUI lo referencia y sus amistades pueden
+        # leerse del grafo); las estrategias validan sus filas por datos, no por identidad
+        usuario.nombre, usuario.edad, usuario.email = nuevo.nombre, nuevo.edad, nuevo.email
+        usuario.intereses = nuevo.intereses
+        self._indexar_intereses(usuario)
+        self._depurar_intereses()
+        if self._cache_recomendaciones and self.recomendador.estrategia.requiere_interes_comun:
+            afectados |= self._usuarios_con_intereses_comunes(usuario_id)
+        self._invalidar_recomendaciones(afectados)
+        self._nueva_version()
+        return True
+    
+    def _estado_carga(self) -> Dict:
+        """Estado recien cargado para la cache: el grafo y los usuarios en columnas"""
+        usuarios = list(self.usuarios.values())
+        return {
+            'grafo': self.grafo,
+            'ids': np.fromiter((u.id for u in usuarios), dtype=np.int64, count=len(usuarios)),
+            'nombres': [u.nombre for u in usuarios],
+            'edades': np.fromiter((u.edad for u in usuarios), dtype=np.int64, count=len(usuarios)),
+            'emails': [u.email for u in usuarios],
+            # Los ids de interes son propios de cada proceso: se guardan los nombres
+            'intereses': [u.intereses for u in usuarios],
+            'siguiente_id': self._siguiente_id,
+            'estadisticas': self.analizador.estadisticas,
+        }
+    
+    def _restaurar_estado_carga(self, estado: Dict) -> None:
+        """Reemplazar el estado por el de la cache, vinculando los usuarios al grafo restaurado"""
+        self.grafo = estado['grafo']
+        self.analizador.estadisticas = estado['estadisticas']
+        adyacencia = self.grafo.adj
+        self.usuarios = {}
+        self._indice_intereses = {}
+        for usuario_id, nombre, edad, email, intereses in zip(
+                estado['ids'].tolist(), estado['nombres'], estado['edades'].tolist(),
+                estado['emails'], estado['intereses']):
+            usuario = Usuario(usuario_id, nombre, edad, email, intereses)
+            usuario.vincular_adyacencia(adyacencia[usuario_id])
+            self.usuarios[usuario_id] = usuario
+            self._indexar_intereses(usuario)
+        self._siguiente_id = max(self._siguiente_id, estado['siguiente_id'])
+        self._version += 1
+        self._cache_recomendaciones.limpiar()
+    
+    def cargar_masivo(self, usuarios: Iterable[Usuario], origenes: Iterable[int],
+                      destinos: Iterable[int], reemplazar: bool = False) -> int:
+        """
+        Incorporar usuarios y conexiones en bloque, sin conexiones automaticas
+        Las aristas se validan de forma vectorizada (ambos extremos existentes,
+        sin bucles ni duplicados) y se agregan al grafo de una sola vez. Un
+        usuario con un id ya existente es un error salvo con reemplazar=True.
+        Retorna: cantidad de conexiones nuevas
+        """
+        usuarios = list(usuarios)
+        if not reemplazar:
+            existentes = [usuario.id for usuario in usuarios if usuario.id in self.usuarios]
+            if existentes:
+                raise ValueError(f"Ids de usuario ya existentes: {existentes[:10]}")
+        for usuario in usuarios:
+            anterior = self.usuarios.get(usuario.id)
+            if anterior is not None:
+                self._desindexar_intereses(anterior)
             self.usuarios[usuario.id] = usuario
-            self.grafo.add_node(usuario.id, **usuario.to_dict())
+        self.grafo.add_nodes_from(usuario.id for usuario in usuarios)
+        for usuario in usuarios:
+            self.analizador.estadisticas.agregar_nodo(usuario.id)
+        
+        aristas_nuevas = self._agregar_aristas(origenes, destinos)
+        
+        # Las listas de amigos se resuelven una sola vez contra la adyacencia final
+        adyacencia = self.grafo.adj
+        for usuario in usuarios:
+            usuario.vincular_adyacencia(adyacencia[usuario.id])
+            self._indexar_intereses(usuario)
             self._siguiente_id = max(self._siguiente_id, usuario.id + 1)
         
-        # Cargar conexiones
-        for conexion in conexiones_data:
-            if conexion['origen'] in self.usuarios and conexion['destino'] in self.usuarios:
-                self.crear_conexion(conexion['origen'], conexion['destino'])
+        self._version += 1
+        self._cache_recomendaciones.limpiar()
+        # Una carga masiva no se registra operacion a operacion
+        self._compactacion_pendiente = True
+        self._depurar_intereses()
+        return aristas_nuevas
+    
+    def _agregar_aristas(self, origenes: Iterable[int], destinos: Iterable[int]) -> int:
+        """Agregar conexiones validadas en bloque. Retorna: cantidad de conexiones nuevas"""
+        origenes = np.asarray(origenes, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+        ids = np.fromiter(self.usuarios.keys(), dtype=np.int64, count=len(self.usuarios))
+        validas = np.isin(origenes, ids) & np.isin(destinos, ids) & (origenes != destinos)
+        
+        # Normalizar (menor, mayor) para descartar duplicados en ambos sentidos
+        menores = np.minimum(origenes[validas], destinos[validas])
+        mayores = np.maximum(origenes[validas], destinos[validas])
+        if menores.size and menores.min() >= 0 and mayores.max() < 2**31:
+            # Una clave de 64 bits por arista es mucho mas rapida que unique por filas
+            claves = np.unique((menores << 32) | mayores)
+            menores, mayores = claves >> 32, claves & 0xFFFFFFFF
+        else:
+            aristas = np.unique(np.stack((menores, mayores), axis=1), axis=0)
+            menores, mayores = aristas[:, 0], aristas[:, 1]
+        menores, mayores = menores.tolist(), mayores.tolist()
+        
+        aristas_previas = self.grafo.number_of_edges()
+        self.grafo.add_edges_from(zip(menores, mayores))
+        aristas_nuevas = self.grafo.number_of_edges() - aristas_previas
+        self.analizador.estadisticas.agregar_aristas(zip(menores, mayores), aristas_nuevas)
+        return aristas_nuevas
     
     def guardar_datos(self) -> bool:
-        """Guardar datos a archivos"""
+        """Guardar datos a archivos (en el hilo actual)"""
+        if not self.hay_cambios_sin_guardar:
+            return True
+        escritura = self.preparar_guardado()
+        escritura()
+        self.finalizar_guardado(escritura)
+        return escritura.exito
+    
+    def compactar(self) -> bool:
+        """Reescribir los datos completos y vaciar el journal"""
+        self._compactacion_pendiente = True
+        return self.guardar_datos()
+    
+    @property
+    def hay_cambios_sin_compactar(self) -> bool:
+        """Indica si los archivos de datos no reflejan todo (cambios pendientes o en el journal)"""
+        return self.hay_cambios_sin_guardar or (self.journal is not None and self.journal.operaciones > 0)
+    
+    @property
+    def hay_cambios_sin_guardar(self) -> bool:
+        """Indica si hay cambios que todavia no se guardaron"""
+        return bool(self._compactacion_pendiente or self._usuarios_modificados or
+                    self._conexiones_modificadas)
+    
+    def cambios_pendientes(self) -> Tuple[Set[int], Set[Tuple[int, int]]]:
+        """Usuarios y conexiones (menor, mayor) modificados desde el ultimo guardado"""
+        return set(self._usuarios_modificados), set(self._conexiones_modificadas)
+    
+    def preparar_guardado(self, compactar: bool = False) -> EscrituraPendiente:
+        """
+        Tomar una instantanea consistente de los datos a guardar
+        La escritura devuelta puede ejecutarse en otro hilo; despues debe
+        pasarse a finalizar_guardado desde el hilo que usa el servicio.
+        Con journal los cambios ya estan anexados: solo se reescriben los
+        archivos completos cuando corresponde compactar (o con compactar=True,
+        p. ej. en un guardado explicito). Sin journal, los repositorios
+        incrementales reciben solo lo modificado.
+        """
+        journal = self.journal
+        completa = (journal is None or compactar or self._compactacion_pendiente or
+                    journal.operaciones >= self.compactar_cada)
+        if (journal is None and not self._compactacion_pendiente and
+                self.data_manager.admite_cambios_incrementales):
+            escribir = self._escritura_incremental()
+        elif completa:
+            repositorio = self.data_manager
+            usuarios_data, conexiones_data = self._datos_completos()
+            # Solo se descartan las operaciones incluidas en la instantanea
+            operaciones = journal.operaciones if journal is not None else 0
+            
+            def escribir() -> bool:
+                if not repositorio.guardar_datos(usuarios_data, conexiones_data):
+                    return False
+                if journal is not None:
+                    journal.descartar_primeras(operaciones)
+                return True
+        else:
+            def escribir() -> bool:
+                journal.sincronizar_disco()
+                return True
+        
+        escritura = EscrituraPendiente(escribir, self._usuarios_modificados,
+                                       self._conexiones_modificadas,
+                                       self._compactacion_pendiente)
+        self._usuarios_modificados, self._conexiones_modificadas = set(), set()
+        self._compactacion_pendiente = False
+        return escritura
+    
+    def _escritura_incremental(self) -> Callable[[], bool]:
+        """Escritura de solo los usuarios y conexiones modificados"""
+        repositorio = self.data_manager
+        usuarios = [self.usuarios[usuario_id].to_dict()
+                    for usuario_id in self._usuarios_modificados if usuario_id in self.usuarios]
+        eliminados = [usuario_id for usuario_id in self._usuarios_modificados
+                      if usuario_id not in self.usuarios]
+        conexiones, conexiones_eliminadas = [], []
+        for arista in self._conexiones_modificadas:
+            (conexiones if self.grafo.has_edge(*arista) else conexiones_eliminadas).append(arista)
+        
+        def escribir() -> bool:
+            return repositorio.guardar_cambios(usuarios, eliminados, conexiones, conexiones_eliminadas)
+        return escribir
+    
+    def finalizar_guardado(self, escritura: EscrituraPendiente) -> None:
+        """Volver a marcar como pendientes los cambios de una escritura fallida"""
+        if escritura.exito:
+            # Lo escrito es el estado en memoria: no es un cambio externo
+            self._firmas_particiones = self.data_manager.particiones()
+            return
+        self._usuarios_modificados |= escritura.usuarios
+        self._conexiones_modificadas |= escritura.conexiones
+        self._compactacion_pendiente |= escritura.completa
+    
+    def cerrar(self) -> None:
+        """Liberar los recursos abiertos (journal)"""
+        if self.journal is not None:
+            self.journal.cerrar()
+    
+    def _datos_completos(self) -> Tuple[List[Dict], List[Dict]]:
+        """Copia de todos los usuarios y conexiones en formato de repositorio"""
         usuarios_data = [usuario.to_dict() for usuario in self.usuarios.values()]
         conexiones_data = [
             {"origen": origen, "destino": destino}
             for origen, destino in self.grafo.edges()
         ]
-        return self.data_manager.guardar_datos(usuarios_data, conexiones_data)
+        return usuarios_data, conexiones_data
     
     def agregar_usuario(self, nombre: str, edad: int = 0, email: str = "", 
                        intereses: List[str] = None) -> Tuple[Usuario, int]:
@@ -66,9 +517,7 @@ class RedSocialService:
         )
         
         # Agregar al sistema
-        self.usuarios[usuario.id] = usuario
-        self.grafo.add_node(usuario.id, **usuario.to_dict())
-        self._siguiente_id += 1
+        self._registrar_usuario(usuario)
         
         # Crear conexiones automaticas
         conexiones_creadas = self._crear_conexiones_automaticas(usuario.id)
@@ -83,19 +532,71 @@ class RedSocialService:
             self.grafo.has_edge(usuario1_id, usuario2_id)):
             return False
         
-        # Crear conexion en el grafo
+        # Crear conexion en el grafo (los amigos de cada usuario son su adyacencia)
         self.grafo.add_edge(usuario1_id, usuario2_id)
+        self.analizador.estadisticas.agregar_arista(usuario1_id, usuario2_id)
+        self._nueva_version(usuario1_id, usuario2_id)
+        self._invalidar_recomendaciones(self._afectados_por_cambio(usuario1_id, usuario2_id))
+        self._registrar_cambio(ops.AGREGAR_CONEXION, origen=usuario1_id, destino=usuario2_id)
+        self._marcar_modificados((usuario1_id, usuario2_id), [(usuario1_id, usuario2_id)])
         
-        # Actualizar listas de amigos
-        self.usuarios[usuario1_id].agregar_amigo(usuario2_id)
-        self.usuarios[usuario2_id].agregar_amigo(usuario1_id)
+        return True
+    
+    def eliminar_conexion(self, usuario1_id: int, usuario2_id: int) -> bool:
+        """Eliminar la conexion entre dos usuarios"""
+        if not self.grafo.has_edge(usuario1_id, usuario2_id):
+            return False
         
-        # Actualizar atributos del grafo
-        self.grafo.nodes[usuario1_id]['amigos'] = self.usuarios[usuario1_id].amigos
-        self.grafo.nodes[usuario2_id]['amigos'] = self.usuarios[usuario2_id].amigos
+        # Las recomendaciones afectadas se calculan con la conexion todavia presente
+        self._invalidar_recomendaciones(self._afectados_por_cambio(usuario1_id, usuario2_id))
+        self.grafo.remove_edge(usuario1_id, usuario2_id)
+        self.analizador.estadisticas.quitar_arista(self.grafo, usuario1_id, usuario2_id)
+        self._nueva_version(usuario1_id, usuario2_id)
+        self._registrar_cambio(ops.ELIMINAR_CONEXION, origen=usuario1_id, destino=usuario2_id)
+        self._marcar_modificados((usuario1_id, usuario2_id), [(usuario1_id, usuario2_id)])
         
         return True
     
+    def eliminar_usuario(self, usuario_id: int) -> bool:
+        """Eliminar un usuario y todas sus conexiones"""
+        usuario = self.usuarios.pop(usuario_id, None)
+        if usuario is None:
+            return False
+        
+        if self._cache_recomendaciones:
+            # Equivale a eliminar cada una de sus conexiones
+            afectados = self._afectados_por_cambio(usuario_id, *self.grafo.adj[usuario_id])
+            if self.recomendador.estrategia.requiere_interes_comun:
+                indice = self._obtener_indice_intereses()
+                for interes_id in usuario.ids_intereses:
+                    afectados.update(indice.get(interes_id, ()))
+            self._invalidar_recomendaciones(afectados)
+        
+        # Sus amigos cambian de lista y sus conexiones desaparecen
+        vecinos = list(self.grafo.adj[usuario_id])
+        self._marcar_modificados([usuario_id, *vecinos],
+                                 [(usuario_id, vecino) for vecino in vecinos])
+        
+        # Quitar el nodo elimina tambien al usuario de la adyacencia de sus vecinos
+        usuario.desvincular_adyacencia()
+        self.grafo.remove_node(usuario_id)
+        self.analizador.estadisticas.quitar_nodo(self.grafo, usuario_id, vecinos)
+        self._desindexar_intereses(usuario)
+        self._nueva_version(usuario_id, *vecinos)
+        self._registrar_cambio(ops.ELIMINAR_USUARIO, id=usuario_id)
+        return True
+    
+    def _nueva_version(self, *usuario_ids: int) -> None:
+        """Incrementar la version tras una edicion puntual y parchear la adyacencia de usuario_ids"""
+        anterior = self._version
+        self._version += 1
+        self.adyacencia.parchear(self.grafo, usuario_ids, anterior, self._version)
+    
+    @property
+    def version(self) -> int:
+        """Version actual del grafo"""
+        return self._version
+    
     def obtener_usuario(self, usuario_id: int) -> Optional[Usuario]:
         """Obtener usuario por ID"""
         return self.usuarios.get(usuario_id)
@@ -129,41 +630,247 @@ class RedSocialService:
         return nx.ego_graph(self.grafo, usuario_id, radius=1)
     
     def obtener_recomendaciones(self, usuario_id: int) -> List[Dict]:
-        """Obtener recomendaciones de conexiones para un usuario"""
+        """Obtener recomendaciones de conexiones para un usuario (con cache)"""
         if usuario_id not in self.usuarios:
             return []
         
+        estrategia = self.recomendador.estrategia
+        entrada = self._cache_recomendaciones.obtener(usuario_id)
+        if entrada is not None and entrada[0] is estrategia:
+            return list(entrada[1])
+        
         usuario = self.usuarios[usuario_id]
-        candidatos = [
-            u for u in self.usuarios.values() 
-            if u.id != usuario_id and u.id not in usuario.amigos
-        ]
+        self.recomendador.preparar(self.grafo, self._version, self.adyacencia)
+        usuarios = self.usuarios
+        if self.perfiles_diferidos and self.recomendador.estrategia.requiere_interes_comun:
+            # Solo se leen los perfiles que pueden recomendarse
+            usuarios = {otro_id: self.usuarios[otro_id]
+                        for otro_id in sorted(self._usuarios_con_intereses_comunes(usuario_id))}
+        candidatos = self.recomendador.generar_candidatos(usuario, usuarios)
+        recomendaciones = self.recomendador.generar_recomendaciones(usuario, candidatos)
         
-        return self.recomendador.generar_recomendaciones(usuario, candidatos)
+        self._cache_recomendaciones.guardar(usuario_id, (estrategia, recomendaciones))
+        return list(recomendaciones)
+    
+    def configurar_cache_recomendaciones(self, capacidad: int) -> None:
+        """Cambiar la cantidad maxima de usuarios con recomendaciones en cache"""
+        self._cache_recomendaciones.redimensionar(capacidad)
+    
+    def estadisticas_cache_recomendaciones(self) -> Dict:
+        """Obtener aciertos, fallos y ocupacion de la cache de recomendaciones"""
+        return self._cache_recomendaciones.estadisticas()
+    
+    def generar_recomendaciones_masivas(self, ruta_salida: str, limite: int = 10,
+                                        workers: Optional[int] = None,
+                                        progreso: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Precalcular recomendaciones de todos los usuarios en un archivo JSONL
+        Reparte los usuarios entre un pool de procesos (workers=1 para no usarlo)
+        y llama a progreso(procesados, total) tras cada lote.
+        Retorna: cantidad de usuarios procesados
+        """
+        # Los workers reciben el CSR ya consolidado
+        self.adyacencia.actualizar(self.grafo, self._version)
+        self.recomendador.preparar(self.grafo, self._version, self.adyacencia)
+        registros = [
+            (u.id, u.nombre, u.edad, u.email, u.intereses, tuple(u.amigos))
+            for u in self.usuarios.values()
+        ]
+        return recomendacion_masiva.generar_recomendaciones_masivas(
+            registros, self.recomendador.estrategia, ruta_salida,
+            limite=limite, workers=workers, progreso=progreso
+        )
+    
+    def exportar_metricas(self, ruta_salida: str, columnas: Sequence[str] = COLUMNAS_METRICAS,
+                          comunidades: Optional[Iterable[Iterable]] = None,
+                          progreso: Optional[Callable[[str, int, int], None]] = None) -> int:
+        """
+        Exportar metricas por usuario en columnas (NPZ si la ruta termina en .npz, si no CSV)
+        Retorna: cantidad de usuarios exportados
+        """
+        exportador = ExportadorMetricas(self, progreso=progreso)
+        if ruta_salida.endswith('.npz'):
+            return exportador.exportar_npz(ruta_salida, columnas, comunidades)
+        return exportador.exportar_csv(ruta_salida, columnas, comunidades)
     
     def obtener_estadisticas(self) -> Dict:
-        """Obtener estadisticas generales de la red"""
-        return self.analizador.calcular_estadisticas_generales(self.grafo)
+        """Obtener estadisticas generales de la red (mantenidas con cada cambio, O(1))"""
+        return self.analizador.obtener_estadisticas()
+    
+    def recalcular_estadisticas(self) -> bool:
+        """
+        Recalcular las estadisticas recorriendo el grafo completo
+        Retorna: True si las mantenidas incrementalmente eran correctas
+        """
+        return self.analizador.recalcular_estadisticas(self.grafo)
+    
+    def calcular_centralidad(self, muestras_cercania: Optional[int] = None,
+                             workers: Optional[int] = None, cantidad: int = 5) -> Dict:
+        """
+        Calcular metricas de centralidad (los cantidad usuarios mejores de cada una)
+        muestras_cercania aproxima la cercania con esa cantidad de pivotes por
+        componente; workers procesos reparten las busquedas (1 para no usar pool).
+        """
+        return self.analizador.calcular_centralidad(self.grafo, self.usuarios, self._version,
+                                                    muestras_cercania, workers, cantidad)
     
-    def calcular_centralidad(self) -> Dict:
-        """Calcular metricas de centralidad"""
-        return self.analizador.calcular_centralidad(self.grafo, self.usuarios)
+    def calcular_intermediacion(self, muestras: Optional[int] = MUESTRAS_INTERMEDIACION,
+                                workers: Optional[int] = None,
+                                semilla: Optional[int] = None, cantidad: int = 5) -> List[Dict]:
+        """
+        Usuarios con mayor intermediacion, estimada con muestras fuentes al azar
+        (None: exacta); workers procesos reparten las fuentes (1 para no usar pool)
+        """
+        return self.analizador.calcular_intermediacion(self.grafo, self.usuarios, self._version,
+                                                       muestras, workers, semilla, cantidad)
     
     def detectar_comunidades(self) -> List[List[Usuario]]:
-        """Detectar comunidades en la red"""
-        return self.analizador.detectar_comunidades(self.grafo, self.usuarios)
+        """Detectar comunidades en la red (en caliente desde la deteccion anterior)"""
+        return self.analizador.detectar_comunidades(self.grafo, self.usuarios, self._version)
+    
+    def _registrar_usuario(self, usuario: Usuario) -> None:
+        """Incorporar un usuario nuevo al grafo, los indices y el journal"""
+        self.usuarios[usuario.id] = usuario
+        self.grafo.add_node(usuario.id)
+        self.analizador.estadisticas.agregar_nodo(usuario.id)
+        usuario.vincular_adyacencia(self.grafo.adj[usuario.id])
+        self._indexar_intereses(usuario)
+        self._siguiente_id = max(self._siguiente_id, usuario.id + 1)
+        self._nueva_version(usuario.id)
+        
+        # El nuevo usuario es candidato para quienes comparten sus intereses
+        if self._cache_recomendaciones and self.recomendador.estrategia.requiere_interes_comun:
+            self._invalidar_recomendaciones(self._usuarios_con_intereses_comunes(usuario.id))
+        
+        self._registrar_cambio(ops.AGREGAR_USUARIO, usuario=usuario.to_dict())
+        self._marcar_modificados((usuario.id,))
+        self._depurar_intereses()
+    
+    def _registrar_cambio(self, operacion: str, **datos) -> None:
+        """Anexar una operacion al journal (si hay uno y no se esta reproduciendo)"""
+        if (self.journal is not None and not self._reproduciendo_journal and
+                not self._sincronizando_disco):
+            self.journal.registrar(operacion, **datos)
+    
+    def _marcar_modificados(self, usuario_ids: Iterable[int],
+                            conexiones: Iterable[Tuple[int, int]] = ()) -> None:
+        """Anotar usuarios y conexiones pendientes de guardar"""
+        if self._sincronizando_disco:
+            # Lo que viene del disco ya esta guardado
+            return
+        self._usuarios_modificados.update(usuario_ids)
+        self._conexiones_modificadas.update(
+            (min(origen, destino), max(origen, destino)) for origen, destino in conexiones
+        )
+    
+    def _reproducir_journal(self) -> int:
+        """
+        Aplicar las operaciones del journal sobre los datos cargados
+        Todas son idempotentes, asi que reaplicar operaciones ya compactadas
+        (p. ej. tras una compactacion interrumpida) no cambia el resultado.
+        Retorna: cantidad de operaciones aplicadas
+        """
+        aplicadas = 0
+        self._reproduciendo_journal = True
+        try:
+            for registro in self.journal.leer():
+                operacion = registro.get('op')
+                if operacion == ops.AGREGAR_USUARIO:
+                    datos = dict(registro['usuario'], amigos=[])
+                    if datos['id'] not in self.usuarios:
+                        self._registrar_usuario(Usuario.from_dict(datos))
+                elif operacion == ops.ELIMINAR_USUARIO:
+                    self.eliminar_usuario(registro['id'])
+                elif operacion == ops.AGREGAR_CONEXION:
+                    self.crear_conexion(registro['origen'], registro['destino'])
+                elif operacion == ops.ELIMINAR_CONEXION:
+                    self.eliminar_conexion(registro['origen'], registro['destino'])
+                else:
+                    continue
+                aplicadas += 1
+        finally:
+            self._reproduciendo_journal = False
+        return aplicadas
     
     def _crear_conexiones_automaticas(self, usuario_id: int) -> int:
         """Crear conexiones automaticas basadas en intereses comunes"""
-        usuario = self.usuarios[usuario_id]
         conexiones_creadas = 0
         
-        for otro_usuario in self.usuarios.values():
-            if (otro_usuario.id != usuario_id and 
-                not self.grafo.has_edge(usuario_id, otro_usuario.id) and
-                usuario.tiene_interes_comun(otro_usuario)):
-                
-                self.crear_conexion(usuario_id, otro_usuario.id)
+        # Solo se visitan los usuarios que comparten algun interes
+        for otro_id in sorted(self._usuarios_con_intereses_comunes(usuario_id)):
+            if (not self.grafo.has_edge(usuario_id, otro_id) and
+                self.crear_conexion(usuario_id, otro_id)):
                 conexiones_creadas += 1
         
         return conexiones_creadas
+    
+    def _usuarios_con_intereses_comunes(self, usuario_id: int) -> Set[int]:
+        """Obtener ids de usuarios que comparten al menos un interes"""
+        candidatos = set()
+        indice = self._obtener_indice_intereses()
+        for interes_id in self.usuarios[usuario_id].ids_intereses:
+            candidatos.update(indice.get(interes_id, ()))
+        candidatos.discard(usuario_id)
+        return candidatos
+    
+    def _afectados_por_cambio(self, *usuario_ids: int) -> Set[int]:
+        """
+        Usuarios cuyas recomendaciones cambian al modificar las conexiones de usuario_ids
+        Con estrategias por intereses solo cambian los extremos; con estrategias
+        de grafo cambia todo el vecindario a 2 saltos de cada extremo.
+        """
+        afectados = set(usuario_ids)
+        if not self._cache_recomendaciones or self.recomendador.estrategia.requiere_interes_comun:
+            return afectados
+        
+        adyacencia = self.grafo.adj
+        for usuario_id in usuario_ids:
+            for vecino_id in adyacencia[usuario_id]:
+                afectados.add(vecino_id)
+                afectados.update(adyacencia[vecino_id])
+        return afectados
+    
+    def _invalidar_recomendaciones(self, usuario_ids) -> None:
+        """Descartar las recomendaciones en cache de los usuarios indicados"""
+        if self._cache_recomendaciones:
+            self._cache_recomendaciones.invalidar(usuario_ids)
+    
+    def _depurar_intereses(self) -> None:
+        """
+        Descartar los conjuntos de intereses que ya no usa ningun usuario en
+        memoria (los de usuarios eliminados, recargados o importados de nuevo)
+        cuando las tablas superan el doble de los usuarios: coste O(N) amortizado
+        """
+        if cantidad_conjuntos_intereses() <= 2 * len(self.usuarios) + MINIMO_CONJUNTOS_INTERESES:
+            return
+        if isinstance(self.usuarios, PerfilesDiferidos):
+            depurar_conjuntos_intereses(self.usuarios.en_memoria())
+        else:
+            depurar_conjuntos_intereses(self.usuarios.values())
+    
+    def _obtener_indice_intereses(self) -> Dict[int, Set[int]]:
+        """Indice invertido de intereses, construido al primer uso con perfiles diferidos"""
+        if self._indice_intereses is None:
+            self._indice_intereses = {}
+            for usuario in self.usuarios.values():
+                self._indexar_intereses(usuario)
+        return self._indice_intereses
+    
+    def _indexar_intereses(self, usuario: Usuario) -> None:
+        """Registrar los intereses del usuario en el indice invertido"""
+        if self._indice_intereses is None:
+            return
+        for interes_id in usuario.ids_intereses:
+            self._indice_intereses.setdefault(interes_id, set()).add(usuario.id)
+    
+    def _desindexar_intereses(self, usuario: Usuario) -> None:
+        """Quitar los intereses del usuario del indice invertido"""
+        if self._indice_intereses is None:
+            return
+        for interes_id in usuario.ids_intereses:
+            ids = self._indice_intereses.get(interes_id)
+            if ids is None:
+                continue
+            ids.discard(usuario.id)
+            if not ids:
+                del self._indice_intereses[interes_id]
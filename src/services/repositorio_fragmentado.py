@@ -0,0 +1,227 @@
+﻿# -*- coding: utf-8 -*-
+# repositorio_fragmentado.py
+"""
+Directorio de datos fragmentado por rangos de id, con carga en paralelo
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from services.data_manager import RepositorioIncremental, DataManager
+
+FORMATO_FRAGMENTOS = 1
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+USUARIOS_POR_FRAGMENTO = 100_000
+
+class RepositorioFragmentado(RepositorioIncremental):
+    """
+    Red repartida en fragmentos por rango de id de usuario
+    Cada fragmento es un subdirectorio con su propio DataManager (JSON o
+    compacto) que guarda los usuarios de su rango sin lista de amigos y las
+    conexiones cuyo extremo menor cae en el rango. El manifiesto registra el
+    tamano de los rangos y la huella de cada fragmento, de modo que guardar
+    solo reescribe los fragmentos cuyo contenido cambio.
+    """
+
+    def __init__(self, directorio: str = None, usuarios_por_fragmento: int = USUARIOS_POR_FRAGMENTO,
+                 compresion: str = None, workers: Optional[int] = None):
+        if directorio is None:
+            directorio = os.path.join(DataManager().directorio, 'fragmentos')
+        self.directorio = directorio
+        self.workers = workers
+        self._manifiesto = self._leer_manifiesto()
+        if self._manifiesto is None:
+            self._manifiesto = {
+                "formato": FORMATO_FRAGMENTOS,
+                "usuarios_por_fragmento": usuarios_por_fragmento,
+                "compresion": compresion,
+                "fragmentos": {}
+            }
+        elif self._manifiesto.get("formato") != FORMATO_FRAGMENTOS:
+            raise ValueError(f"Formato de fragmentos no soportado: {self._manifiesto.get('formato')}")
+
+    @property
+    def usuarios_por_fragmento(self) -> int:
+        return self._manifiesto["usuarios_por_fragmento"]
+
+    def fragmentos(self) -> List[int]:
+        """Indices de los fragmentos guardados"""
+        return sorted(int(indice) for indice in self._manifiesto["fragmentos"])
+
+    def fragmento_de(self, usuario_id: int) -> int:
+        """Indice del fragmento al que pertenece un usuario"""
+        return usuario_id // self.usuarios_por_fragmento
+
+    def archivos_datos(self) -> List[str]:
+        archivos = [os.path.join(self.directorio, ARCHIVO_MANIFIESTO)]
+        for indice in self.fragmentos():
+            archivos.extend(self._data_manager(indice).archivos_datos())
+        return archivos
+
+    def particiones(self) -> Dict[str, str]:
+        """Una particion por fragmento, firmada con la huella del manifiesto en disco"""
+        self._manifiesto = self._leer_manifiesto() or self._manifiesto
+        return {indice: datos["huella"] for indice, datos in self._manifiesto["fragmentos"].items()}
+
+    def rango_particion(self, clave: str) -> Tuple[int, int]:
+        inicio = int(clave) * self.usuarios_por_fragmento
+        return inicio, inicio + self.usuarios_por_fragmento
+
+    def leer_particion(self, clave: str) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        if clave not in self._manifiesto["fragmentos"]:
+            return [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return _leer_fragmento(self._directorio_fragmento(int(clave)), self._manifiesto["compresion"])
+
+    # === LECTURA ===
+
+    def iterar_bloques(self) -> Iterator[Tuple[List[Dict], np.ndarray, np.ndarray]]:
+        """Un bloque por fragmento; los fragmentos se leen en paralelo"""
+        directorios = [self._directorio_fragmento(indice) for indice in self.fragmentos()]
+        compresion = self._manifiesto["compresion"]
+        if self.workers == 1 or len(directorios) <= 1:
+            for directorio in directorios:
+                yield _leer_fragmento(directorio, compresion)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from executor.map(_leer_fragmento, directorios, [compresion] * len(directorios))
+
+    def iterar_usuarios(self) -> Iterator[Dict]:
+        """Generar los usuarios fragmento a fragmento (sin lista de amigos)"""
+        for indice in self.fragmentos():
+            yield from self._data_manager(indice).iterar_usuarios()
+
+    def iterar_conexiones(self) -> Iterator[Dict]:
+        for indice in self.fragmentos():
+            yield from self._data_manager(indice).iterar_conexiones()
+
+    def obtener_usuario(self, usuario_id: int) -> Optional[Dict]:
+        """Leer un usuario recorriendo solo su fragmento"""
+        indice = self.fragmento_de(usuario_id)
+        if str(indice) not in self._manifiesto["fragmentos"]:
+            return None
+        return self._data_manager(indice).obtener_usuario(usuario_id)
+
+    def cargar_aristas(self) -> Tuple[np.ndarray, np.ndarray]:
+        aristas = [self._data_manager(indice).cargar_aristas() for indice in self.fragmentos()]
+        if not aristas:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return (np.concatenate([origenes for origenes, _ in aristas]),
+                np.concatenate([destinos for _, destinos in aristas]))
+
+    # === ESCRITURA ===
+
+    def guardar_datos(self, usuarios: List[Dict], conexiones: List[Dict]) -> bool:
+        """Repartir la red en fragmentos y escribir solo los que cambiaron"""
+        aristas = [(c['origen'], c['destino']) for c in conexiones]
+        for usuario in usuarios:
+            aristas.extend((usuario['id'], amigo) for amigo in usuario.get('amigos', ()))
+
+        contenido: Dict[int, Tuple[Dict[int, Dict], set]] = {}
+        for usuario in usuarios:
+            self._contenido(contenido, self.fragmento_de(usuario['id']))[0][usuario['id']] = usuario
+        for origen, destino in aristas:
+            if origen != destino:
+                arista = (min(origen, destino), max(origen, destino))
+                self._contenido(contenido, self.fragmento_de(arista[0]))[1].add(arista)
+
+        # Los fragmentos que ya no tienen contenido se guardan vacios
+        for indice in self.fragmentos():
+            self._contenido(contenido, indice)
+        return self._escribir_fragmentos(contenido)
+
+    def guardar_cambios(self, usuarios: List[Dict], usuarios_eliminados: Iterable[int],
+                        conexiones: Iterable[Tuple[int, int]],
+                        conexiones_eliminadas: Iterable[Tuple[int, int]]) -> bool:
+        """Releer, modificar y reescribir solo los fragmentos afectados"""
+        contenido: Dict[int, Tuple[Dict[int, Dict], set]] = {}
+
+        def fragmento(usuario_id: int) -> Tuple[Dict[int, Dict], set]:
+            indice = self.fragmento_de(usuario_id)
+            if indice not in contenido:
+                data_manager = self._data_manager(indice)
+                origenes, destinos = data_manager.cargar_aristas()
+                contenido[indice] = ({u['id']: u for u in data_manager.iterar_usuarios()},
+                                     set(zip(origenes.tolist(), destinos.tolist())))
+            return contenido[indice]
+
+        for usuario_id in usuarios_eliminados:
+            fragmento(usuario_id)[0].pop(usuario_id, None)
+        for usuario in usuarios:
+            fragmento(usuario['id'])[0][usuario['id']] = usuario
+        for origen, destino in conexiones_eliminadas:
+            arista = (min(origen, destino), max(origen, destino))
+            fragmento(arista[0])[1].discard(arista)
+        for origen, destino in conexiones:
+            arista = (min(origen, destino), max(origen, destino))
+            fragmento(arista[0])[1].add(arista)
+        return self._escribir_fragmentos(contenido)
+
+    def _contenido(self, contenido: Dict, indice: int) -> Tuple[Dict[int, Dict], set]:
+        return contenido.setdefault(indice, ({}, set()))
+
+    def _escribir_fragmentos(self, contenido: Dict[int, Tuple[Dict[int, Dict], set]]) -> bool:
+        fragmentos = self._manifiesto["fragmentos"]
+        try:
+            for indice, (usuarios, aristas) in contenido.items():
+                usuarios = [{clave: valor for clave, valor in usuarios[usuario_id].items()
+                             if clave != 'amigos'}
+                            for usuario_id in sorted(usuarios)]
+                aristas = sorted(aristas)
+                huella = _huella(usuarios, aristas)
+                anterior = fragmentos.get(str(indice))
+                if anterior is not None and anterior["huella"] == huella:
+                    continue
+                if not usuarios and not aristas:
+                    # Fragmento vacio: basta con sacarlo del manifiesto
+                    fragmentos.pop(str(indice), None)
+                    continue
+                os.makedirs(self._directorio_fragmento(indice), exist_ok=True)
+                conexiones = [{"origen": origen, "destino": destino} for origen, destino in aristas]
+                if not self._data_manager(indice).guardar_datos(usuarios, conexiones):
+                    return False
+                fragmentos[str(indice)] = {"usuarios": len(usuarios),
+                                           "conexiones": len(aristas),
+                                           "huella": huella}
+            self._escribir_manifiesto()
+            return True
+        except OSError as e:
+            print(f"Error al guardar fragmentos: {e}")
+            return False
+        finally:
+            # Ante un error el manifiesto en memoria vuelve a reflejar el disco
+            self._manifiesto = self._leer_manifiesto() or self._manifiesto
+
+    def _leer_manifiesto(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.directorio, ARCHIVO_MANIFIESTO), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _escribir_manifiesto(self) -> None:
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = os.path.join(self.directorio, ARCHIVO_MANIFIESTO)
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self._manifiesto, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta + '.tmp', ruta)
+
+    def _directorio_fragmento(self, indice: int) -> str:
+        return os.path.join(self.directorio, f"fragmento_{indice:05d}")
+
+    def _data_manager(self, indice: int) -> DataManager:
+        return DataManager(self._directorio_fragmento(indice), compresion=self._manifiesto["compresion"])
+
+def _leer_fragmento(directorio: str, compresion: Optional[str]) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+    """Parsear un fragmento completo (se ejecuta en los procesos del pool)"""
+    data_manager = DataManager(directorio, compresion=compresion)
+    origenes, destinos = data_manager.cargar_aristas()
+    return list(data_manager.iterar_usuarios()), origenes, destinos
+
+def _huella(usuarios: List[Dict], aristas: List[Tuple[int, int]]) -> str:
+    """Resumen del contenido de un fragmento para detectar cambios"""
+    contenido = json.dumps([usuarios, aristas], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
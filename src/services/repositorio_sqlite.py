@@ -0,0 +1,276 @@
+﻿# -*- coding: utf-8 -*-
+# repositorio_sqlite.py
+"""
+Backend de persistencia de la red en una base de datos SQLite
+"""
+import heapq
+import os
+import sqlite3
+import threading
+from array import array
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from services.data_manager import RepositorioIncremental, DataManager
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    edad INTEGER NOT NULL DEFAULT 0,
+    email TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS usuario_interes (
+    usuario_id INTEGER NOT NULL,
+    posicion INTEGER NOT NULL,
+    interes TEXT NOT NULL,
+    PRIMARY KEY (usuario_id, posicion)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_usuario_interes_interes ON usuario_interes (interes);
+CREATE TABLE IF NOT EXISTS conexiones (
+    origen INTEGER NOT NULL,
+    destino INTEGER NOT NULL,
+    PRIMARY KEY (origen, destino),
+    CHECK (origen < destino)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_conexiones_destino ON conexiones (destino, origen);
+"""
+
+# Filas por llamada a executemany en las escrituras masivas
+TAMANO_LOTE = 50_000
+
+class RepositorioSQLite(RepositorioIncremental):
+    """
+    Repositorio con tablas de usuarios, intereses normalizados y conexiones
+    Cada conexion se guarda una sola vez como (menor, mayor); los indices por
+    id, interes y ambos extremos permiten consultas puntuales y escrituras
+    incrementales sin cargar la red completa.
+    """
+
+    admite_lectura_por_id = True
+
+    def __init__(self, ruta: str = None):
+        if ruta is None:
+            ruta = os.path.join(DataManager().directorio, 'red_social.db')
+        self.ruta = ruta
+        self._conexion_db: Optional[sqlite3.Connection] = None
+        # La conexion se comparte con el hilo de guardado en segundo plano
+        self._bloqueo = threading.RLock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conexion_db is None:
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.executescript(ESQUEMA)
+            self._conexion_db = conexion
+        return self._conexion_db
+
+    def _conexion_lectura(self) -> sqlite3.Connection:
+        """Conexion propia para un recorrido largo (WAL permite leer mientras se escribe)"""
+        with self._bloqueo:
+            self._db()
+        return sqlite3.connect(self.ruta)
+
+    def archivos_datos(self) -> List[str]:
+        # En modo WAL los cambios recientes solo estan en el archivo -wal
+        return [self.ruta, self.ruta + '-wal']
+
+    def cerrar(self) -> None:
+        """Cerrar la conexion con la base de datos"""
+        with self._bloqueo:
+            if self._conexion_db is not None:
+                self._conexion_db.close()
+                self._conexion_db = None
+
+    def __len__(self) -> int:
+        with self._bloqueo:
+            return self._db().execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    # === LECTURA ===
+
+    def iterar_usuarios(self) -> Iterator[Dict]:
+        """
+        Generar los usuarios en orden de id
+        Usuarios, intereses y ambos sentidos de las conexiones se recorren en
+        el orden de sus indices y se combinan sin ordenar nada en memoria.
+        """
+        db = self._conexion_lectura()
+        try:
+            yield from _combinar_registros(
+                db.execute("SELECT id, nombre, edad, email FROM usuarios ORDER BY id"),
+                db.execute("SELECT usuario_id, interes FROM usuario_interes "
+                           "ORDER BY usuario_id, posicion"),
+                heapq.merge(
+                    db.execute("SELECT origen, destino FROM conexiones ORDER BY origen, destino"),
+                    db.execute("SELECT destino, origen FROM conexiones ORDER BY destino, origen")
+                )
+            )
+        finally:
+            db.close()
+
+    def iterar_conexiones(self) -> Iterator[Dict]:
+        """Generar cada conexion una sola vez (origen < destino)"""
+        db = self._conexion_lectura()
+        try:
+            for origen, destino in db.execute("SELECT origen, destino FROM conexiones"):
+                yield {"origen": origen, "destino": destino}
+        finally:
+            db.close()
+
+    def cargar_aristas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Conexiones como arrays de ids"""
+        origenes, destinos = array('q'), array('q')
+        db = self._conexion_lectura()
+        try:
+            for origen, destino in db.execute("SELECT origen, destino FROM conexiones"):
+                origenes.append(origen)
+                destinos.append(destino)
+        finally:
+            db.close()
+        return np.frombuffer(origenes, dtype=np.int64), np.frombuffer(destinos, dtype=np.int64)
+
+    def cargar_topologia(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Ids (recorriendo solo la clave primaria) y conexiones"""
+        ids = array('q')
+        db = self._conexion_lectura()
+        try:
+            ids.extend(usuario_id for usuario_id, in db.execute("SELECT id FROM usuarios ORDER BY id"))
+        finally:
+            db.close()
+        return (np.frombuffer(ids, dtype=np.int64),) + self.cargar_aristas()
+
+    def obtener_usuario(self, usuario_id: int) -> Optional[Dict]:
+        """Leer un unico usuario por id"""
+        with self._bloqueo:
+            db = self._db()
+            fila = db.execute("SELECT id, nombre, edad, email FROM usuarios WHERE id = ?",
+                              (usuario_id,)).fetchone()
+            if fila is None:
+                return None
+            intereses = db.execute(
+                "SELECT interes FROM usuario_interes WHERE usuario_id = ? ORDER BY posicion",
+                (usuario_id,)
+            ).fetchall()
+            amigos = self.vecinos(usuario_id)
+        return {
+            "id": fila[0],
+            "nombre": fila[1],
+            "edad": fila[2],
+            "email": fila[3],
+            "intereses": [interes for interes, in intereses],
+            "amigos": amigos
+        }
+
+    def vecinos(self, usuario_id: int) -> List[int]:
+        """Ids de los amigos de un usuario (usa el indice de cada extremo)"""
+        with self._bloqueo:
+            filas = self._db().execute(
+                "SELECT destino FROM conexiones WHERE origen = ? "
+                "UNION ALL SELECT origen FROM conexiones WHERE destino = ?",
+                (usuario_id, usuario_id)
+            ).fetchall()
+        return sorted(vecino for vecino, in filas)
+
+    def usuarios_con_interes(self, interes: str) -> List[int]:
+        """Ids de los usuarios que tienen un interes"""
+        with self._bloqueo:
+            filas = self._db().execute(
+                "SELECT DISTINCT usuario_id FROM usuario_interes WHERE interes = ? ORDER BY usuario_id",
+                (interes.lower(),)
+            ).fetchall()
+        return [usuario_id for usuario_id, in filas]
+
+    # === ESCRITURA ===
+
+    def guardar_datos(self, usuarios: List[Dict], conexiones: List[Dict]) -> bool:
+        """Reemplazar todos los datos en una unica transaccion"""
+        # Las listas de amigos tambien aportan conexiones
+        aristas = [(c['origen'], c['destino']) for c in conexiones]
+        for usuario in usuarios:
+            aristas.extend((usuario['id'], amigo) for amigo in usuario.get('amigos', []))
+        try:
+            with self._bloqueo:
+                db = self._db()
+                with db:
+                    db.execute("DELETE FROM conexiones")
+                    db.execute("DELETE FROM usuario_interes")
+                    db.execute("DELETE FROM usuarios")
+                    self._insertar_usuarios(db, usuarios)
+                    self._insertar_conexiones(db, aristas)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al guardar en {self.ruta}: {e}")
+            return False
+
+    def guardar_cambios(self, usuarios: List[Dict], usuarios_eliminados: Iterable[int],
+                        conexiones: Iterable[Tuple[int, int]],
+                        conexiones_eliminadas: Iterable[Tuple[int, int]]) -> bool:
+        """Escribir solo los usuarios y conexiones modificados"""
+        usuarios_eliminados = [(usuario_id,) for usuario_id in usuarios_eliminados]
+        try:
+            with self._bloqueo:
+                db = self._db()
+                with db:
+                    # Usuarios reemplazados o eliminados: se borran y se reinsertan
+                    reemplazados = usuarios_eliminados + [(u['id'],) for u in usuarios]
+                    db.executemany("DELETE FROM usuario_interes WHERE usuario_id = ?", reemplazados)
+                    db.executemany("DELETE FROM usuarios WHERE id = ?", reemplazados)
+                    db.executemany("DELETE FROM conexiones WHERE origen = ?", usuarios_eliminados)
+                    db.executemany("DELETE FROM conexiones WHERE destino = ?", usuarios_eliminados)
+                    db.executemany("DELETE FROM conexiones WHERE origen = ? AND destino = ?",
+                                   (_normalizar(a, b) for a, b in conexiones_eliminadas))
+                    self._insertar_usuarios(db, usuarios)
+                    self._insertar_conexiones(db, conexiones)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al guardar en {self.ruta}: {e}")
+            return False
+
+    def _insertar_usuarios(self, db: sqlite3.Connection, usuarios: List[Dict]) -> None:
+        for inicio in range(0, len(usuarios), TAMANO_LOTE):
+            lote = usuarios[inicio:inicio + TAMANO_LOTE]
+            db.executemany(
+                "INSERT INTO usuarios (id, nombre, edad, email) VALUES (?, ?, ?, ?)",
+                [(u['id'], u.get('nombre', ''), u.get('edad', 0), u.get('email', '')) for u in lote]
+            )
+            db.executemany(
+                "INSERT INTO usuario_interes (usuario_id, posicion, interes) VALUES (?, ?, ?)",
+                [(u['id'], posicion, interes)
+                 for u in lote for posicion, interes in enumerate(u.get('intereses', []))]
+            )
+
+    def _insertar_conexiones(self, db: sqlite3.Connection,
+                             aristas: Iterable[Tuple[int, int]]) -> None:
+        # OR IGNORE descarta duplicados en cualquier sentido
+        db.executemany("INSERT OR IGNORE INTO conexiones (origen, destino) VALUES (?, ?)",
+                       (_normalizar(a, b) for a, b in aristas if a != b))
+
+def _normalizar(origen: int, destino: int) -> Tuple[int, int]:
+    return (origen, destino) if origen < destino else (destino, origen)
+
+def _combinar_registros(usuarios, intereses, amigos) -> Iterator[Dict]:
+    """Unir filas ordenadas por id de usuario en registros de Usuario.to_dict"""
+    intereses = groupby(intereses, key=itemgetter(0))
+    amigos = groupby(amigos, key=itemgetter(0))
+    interes_actual = next(intereses, None)
+    amigo_actual = next(amigos, None)
+    for usuario_id, nombre, edad, email in usuarios:
+        lista_intereses, lista_amigos = [], []
+        while interes_actual is not None and interes_actual[0] <= usuario_id:
+            if interes_actual[0] == usuario_id:
+                lista_intereses = [fila[1] for fila in interes_actual[1]]
+            interes_actual = next(intereses, None)
+        while amigo_actual is not None and amigo_actual[0] <= usuario_id:
+            if amigo_actual[0] == usuario_id:
+                lista_amigos = [fila[1] for fila in amigo_actual[1]]
+            amigo_actual = next(amigos, None)
+        yield {
+            "id": usuario_id,
+            "nombre": nombre,
+            "edad": edad,
+            "email": email,
+            "intereses": lista_intereses,
+            "amigos": lista_amigos
+        }
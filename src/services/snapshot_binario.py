@@ -0,0 +1,337 @@
+﻿# -*- coding: utf-8 -*-
+# snapshot_binario.py
+"""
+Snapshot binario de la red en archivos .npy que se abren con mmap
+"""
+import json
+import os
+import shutil
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from services.data_manager import RepositorioRed, DataManager, USUARIOS_POR_BLOQUE
+
+FORMATO_SNAPSHOT = 1
+ARCHIVO_MANIFIESTO = 'snapshot.json'
+
+# Arrays que componen el snapshot (todos indexados por posicion de usuario)
+ARRAYS_SNAPSHOT = (
+    'ids',                  # int64, ordenados de menor a mayor
+    'edades',               # int32
+    'adyacencia_indptr',    # int64, CSR simetrica de conexiones
+    'adyacencia_indices',   # int32, posiciones de los vecinos
+    'intereses_tabla',      # unicode, nombre de cada interes internado
+    'intereses_indptr',     # int64, CSR usuario -> intereses (orden original)
+    'intereses_indices',    # int32, ids en intereses_tabla
+    'nombres_datos',        # uint8, nombres en UTF-8 concatenados
+    'nombres_offsets',      # int64
+    'emails_datos',         # uint8
+    'emails_offsets',       # int64
+)
+
+class RepositorioSnapshot(RepositorioRed):
+    """
+    Backend de persistencia basado en arrays NumPy mapeados en memoria
+    Abrir el snapshot solo mapea los archivos; las paginas se leen del disco
+    a medida que se accede a cada usuario o conexion.
+    Cada guardado escribe sus arrays en un subdirectorio de generacion nuevo
+    y despues reemplaza de forma atomica el manifiesto que lo nombra: una
+    interrupcion deja siempre el snapshot anterior o el nuevo completos.
+    """
+
+    admite_lectura_por_id = True
+
+    def __init__(self, directorio: str = None):
+        if directorio is None:
+            directorio = os.path.join(DataManager().directorio, 'snapshot')
+        self.directorio = directorio
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+
+    def existe(self) -> bool:
+        """Indica si hay un snapshot guardado en el directorio"""
+        return os.path.exists(os.path.join(self.directorio, ARCHIVO_MANIFIESTO))
+
+    def abrir(self) -> Dict[str, np.ndarray]:
+        """Mapear los arrays del snapshot (vacio si no existe)"""
+        if self._arrays is None:
+            manifiesto = self._leer_manifiesto()
+            if manifiesto is None:
+                return {}
+            if manifiesto.get('formato') != FORMATO_SNAPSHOT:
+                raise ValueError(f"Formato de snapshot no soportado: {manifiesto.get('formato')}")
+            directorio = self._directorio_arrays(manifiesto)
+            self._arrays = {
+                nombre: np.load(self._ruta(nombre, directorio), mmap_mode='r')
+                for nombre in ARRAYS_SNAPSHOT
+            }
+        return self._arrays
+
+    def archivos_datos(self) -> List[str]:
+        directorio = self._directorio_arrays(self._leer_manifiesto())
+        return ([os.path.join(self.directorio, ARCHIVO_MANIFIESTO)] +
+                [self._ruta(nombre, directorio) for nombre in ARRAYS_SNAPSHOT])
+
+    def cerrar(self) -> None:
+        """Liberar los mapeos de memoria"""
+        self._arrays = None
+
+    def __len__(self) -> int:
+        arrays = self.abrir()
+        return len(arrays['ids']) if arrays else 0
+
+    # === LECTURA ===
+
+    def iterar_usuarios(self) -> Iterator[Dict]:
+        """Generar los usuarios del snapshot en orden de id"""
+        for posicion in range(len(self)):
+            yield self._registro(posicion)
+
+    def iterar_bloques(self) -> Iterator[Tuple[List[Dict], np.ndarray, np.ndarray]]:
+        """
+        Generar la red por bloques para cargarla
+        Los registros van sin 'amigos': cada conexion se entrega una sola vez,
+        derivada de la CSR en el ultimo bloque, en lugar de una por extremo.
+        """
+        vacio = np.zeros(0, dtype=np.int64)
+        total = len(self)
+        for inicio in range(0, total, USUARIOS_POR_BLOQUE):
+            fin = min(inicio + USUARIOS_POR_BLOQUE, total)
+            bloque = [self._registro(posicion, amigos=False) for posicion in range(inicio, fin)]
+            if fin < total:
+                yield bloque, vacio, vacio
+            else:
+                yield (bloque,) + self.cargar_aristas()
+        if not total:
+            yield ([],) + self.cargar_aristas()
+
+    def iterar_conexiones(self) -> Iterator[Dict]:
+        """Generar cada conexion una sola vez (origen < destino)"""
+        origenes, destinos = self.cargar_aristas()
+        for origen, destino in zip(origenes.tolist(), destinos.tolist()):
+            yield {"origen": origen, "destino": destino}
+
+    def cargar_aristas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Conexiones como arrays de ids, derivadas directamente de la CSR"""
+        arrays = self.abrir()
+        if not arrays:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        ids = arrays['ids']
+        indptr = arrays['adyacencia_indptr']
+        vecinos = np.asarray(arrays['adyacencia_indices'], dtype=np.int64)
+        filas = np.repeat(np.arange(len(ids), dtype=np.int64), np.diff(indptr))
+        una_vez = filas < vecinos
+        return ids[filas[una_vez]], ids[vecinos[una_vez]]
+
+    def cargar_topologia(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Ids y conexiones sin leer nombres, emails ni intereses"""
+        arrays = self.abrir()
+        ids = np.array(arrays['ids']) if arrays else np.zeros(0, dtype=np.int64)
+        return (ids,) + self.cargar_aristas()
+
+    def obtener_usuario(self, usuario_id: int) -> Optional[Dict]:
+        """Leer un unico usuario por id (busqueda binaria sobre ids)"""
+        posicion = self._posicion(usuario_id)
+        return self._registro(posicion) if posicion is not None else None
+
+    def vecinos(self, usuario_id: int) -> np.ndarray:
+        """Ids de los amigos de un usuario"""
+        posicion = self._posicion(usuario_id)
+        if posicion is None:
+            return np.zeros(0, dtype=np.int64)
+        arrays = self._arrays
+        indptr = arrays['adyacencia_indptr']
+        return arrays['ids'][arrays['adyacencia_indices'][indptr[posicion]:indptr[posicion + 1]]]
+
+    def _posicion(self, usuario_id: int) -> Optional[int]:
+        arrays = self.abrir()
+        if not arrays:
+            return None
+        ids = arrays['ids']
+        posicion = int(np.searchsorted(ids, usuario_id))
+        if posicion < len(ids) and ids[posicion] == usuario_id:
+            return posicion
+        return None
+
+    def _registro(self, posicion: int, amigos: bool = True) -> Dict:
+        """Perfil de una posicion (con amigos=False no se lee la adyacencia)"""
+        arrays = self._arrays
+        ids = arrays['ids']
+        inicio, fin = arrays['intereses_indptr'][posicion:posicion + 2]
+        intereses = arrays['intereses_tabla'][arrays['intereses_indices'][inicio:fin]]
+        registro = {
+            "id": int(ids[posicion]),
+            "nombre": _texto(arrays['nombres_datos'], arrays['nombres_offsets'], posicion),
+            "edad": int(arrays['edades'][posicion]),
+            "email": _texto(arrays['emails_datos'], arrays['emails_offsets'], posicion),
+            "intereses": intereses.tolist()
+        }
+        if amigos:
+            inicio, fin = arrays['adyacencia_indptr'][posicion:posicion + 2]
+            registro["amigos"] = ids[arrays['adyacencia_indices'][inicio:fin]].tolist()
+        return registro
+
+    # === ESCRITURA ===
+
+    def guardar_datos(self, usuarios: List[Dict], conexiones: List[Dict]) -> bool:
+        """Escribir un snapshot completo a partir de usuarios y conexiones"""
+        try:
+            self._escribir(usuarios, conexiones)
+            return True
+        except Exception as e:
+            print(f"Error al guardar snapshot: {e}")
+            return False
+
+    def _escribir(self, usuarios: List[Dict], conexiones: List[Dict]) -> None:
+        usuarios = sorted(usuarios, key=lambda u: u['id'])
+        n = len(usuarios)
+        ids = np.fromiter((u['id'] for u in usuarios), dtype=np.int64, count=n)
+        edades = np.fromiter((u.get('edad', 0) for u in usuarios), dtype=np.int32, count=n)
+
+        # Intereses internados: tabla de nombres + CSR usuario -> interes
+        tabla: Dict[str, int] = {}
+        intereses_indptr = np.zeros(n + 1, dtype=np.int64)
+        intereses_indices = []
+        for posicion, usuario in enumerate(usuarios):
+            for interes in usuario.get('intereses', []):
+                intereses_indices.append(tabla.setdefault(interes, len(tabla)))
+            intereses_indptr[posicion + 1] = len(intereses_indices)
+        intereses_tabla = np.array(list(tabla) or [''], dtype=str)[:len(tabla)]
+
+        # Conexiones guardadas y listas de amigos, validadas y sin duplicados
+        origenes = [c['origen'] for c in conexiones]
+        destinos = [c['destino'] for c in conexiones]
+        for usuario in usuarios:
+            amigos = usuario.get('amigos', [])
+            origenes.extend([usuario['id']] * len(amigos))
+            destinos.extend(amigos)
+        indptr, indices = _csr_simetrica(ids, np.array(origenes, dtype=np.int64),
+                                         np.array(destinos, dtype=np.int64))
+
+        nombres_datos, nombres_offsets = _empaquetar_textos(u.get('nombre', '') for u in usuarios)
+        emails_datos, emails_offsets = _empaquetar_textos(u.get('email', '') for u in usuarios)
+
+        arrays = {
+            'ids': ids,
+            'edades': edades,
+            'adyacencia_indptr': indptr,
+            'adyacencia_indices': indices,
+            'intereses_tabla': intereses_tabla,
+            'intereses_indptr': intereses_indptr,
+            'intereses_indices': np.array(intereses_indices, dtype=np.int32),
+            'nombres_datos': nombres_datos,
+            'nombres_offsets': nombres_offsets,
+            'emails_datos': emails_datos,
+            'emails_offsets': emails_offsets,
+        }
+
+        # Los arrays van a una generacion nueva; la actual no se toca
+        anterior = self._leer_manifiesto()
+        generacion = (anterior or {}).get('generacion', 0) + 1
+        directorio = os.path.join(self.directorio, f"generacion_{generacion:06d}")
+        shutil.rmtree(directorio, ignore_errors=True)  # restos de un guardado interrumpido
+        os.makedirs(directorio)
+        for nombre, datos in arrays.items():
+            with open(self._ruta(nombre, directorio), 'wb') as f:
+                np.save(f, datos)
+                f.flush()
+                os.fsync(f.fileno())
+        _sincronizar_directorio(directorio)
+
+        # Reemplazar el manifiesto publica la generacion nueva de forma atomica
+        ruta = os.path.join(self.directorio, ARCHIVO_MANIFIESTO)
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"formato": FORMATO_SNAPSHOT, "generacion": generacion, "usuarios": n,
+                       "conexiones": int(indices.size // 2)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta + '.tmp', ruta)
+        _sincronizar_directorio(self.directorio)
+
+        # Soltar los mapeos actuales y borrar las generaciones viejas
+        self.cerrar()
+        self._descartar_generaciones(directorio)
+
+    def _leer_manifiesto(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.directorio, ARCHIVO_MANIFIESTO), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _directorio_arrays(self, manifiesto: Optional[Dict]) -> str:
+        """Directorio de la generacion publicada (los snapshots sin generacion usan la raiz)"""
+        generacion = (manifiesto or {}).get('generacion')
+        if generacion is None:
+            return self.directorio
+        return os.path.join(self.directorio, f"generacion_{generacion:06d}")
+
+    def _descartar_generaciones(self, vigente: str) -> None:
+        """Borrar los arrays que no son de la generacion vigente (puede haber mapeos abiertos)"""
+        for entrada in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, entrada)
+            if entrada.startswith('generacion_') and ruta != vigente:
+                shutil.rmtree(ruta, ignore_errors=True)
+            elif entrada.endswith('.npy'):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    def _ruta(self, nombre: str, directorio: str) -> str:
+        return os.path.join(directorio, f"{nombre}.npy")
+
+def _sincronizar_directorio(directorio: str) -> None:
+    """Hacer durables las entradas de un directorio (no disponible en Windows)"""
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+def _texto(datos: np.ndarray, offsets: np.ndarray, posicion: int) -> str:
+    return datos[offsets[posicion]:offsets[posicion + 1]].tobytes().decode('utf-8')
+
+def _empaquetar_textos(textos) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenar textos en UTF-8 y devolver (bytes, offsets)"""
+    codificados = [texto.encode('utf-8') for texto in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in codificados], out=offsets[1:])
+    return np.frombuffer(b''.join(codificados), dtype=np.uint8), offsets
+
+def _csr_simetrica(ids: np.ndarray, origenes: np.ndarray,
+                   destinos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR por posicion con cada conexion en ambos sentidos (ids debe estar ordenado)"""
+    n = len(ids)
+    pos_origen = np.searchsorted(ids, origenes)
+    pos_destino = np.searchsorted(ids, destinos)
+    validas = ((pos_origen < n) & (pos_destino < n) & (origenes != destinos))
+    validas[validas] &= ((ids[pos_origen[validas]] == origenes[validas]) &
+                         (ids[pos_destino[validas]] == destinos[validas]))
+
+    menores = np.minimum(pos_origen[validas], pos_destino[validas])
+    mayores = np.maximum(pos_origen[validas], pos_destino[validas])
+    claves = np.unique(menores * max(n, 1) + mayores)
+    menores, mayores = claves // max(n, 1), claves % max(n, 1)
+
+    filas = np.concatenate((menores, mayores))
+    columnas = np.concatenate((mayores, menores))
+    orden = np.lexsort((columnas, filas))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(filas, minlength=n), out=indptr[1:])
+    return indptr, columnas[orden].astype(np.int32)
+
+def exportar_snapshot(origen: RepositorioRed = None, directorio: str = None) -> bool:
+    """Convertir los archivos JSON actuales (u otro repositorio) en un snapshot binario"""
+    origen = origen or DataManager()
+    usuarios, conexiones = origen.cargar_datos()
+    return RepositorioSnapshot(directorio).guardar_datos(usuarios, conexiones)
+
+def importar_snapshot(directorio: str = None, destino: RepositorioRed = None) -> bool:
+    """Escribir el contenido de un snapshot binario en los archivos JSON (u otro repositorio)"""
+    destino = destino or DataManager()
+    usuarios, conexiones = RepositorioSnapshot(directorio).cargar_datos()
+    return destino.guardar_datos(usuarios, conexiones)
@@ -4,21 +4,40 @@
 Controlador principal que conecta la logica de negocio con la interfaz
 Implementa el patron MVC (Model-View-Controller)
 """
+import os
 from typing import Optional, List
 import tkinter as tk
 from tkinter import messagebox
 from services.red_social_service import RedSocialService
+from services.data_manager import DataManager
+from services.journal import JournalCambios
+from services.guardado import GuardadoEnSegundoPlano
+from services.cache_carga import CacheCarga
 from models.usuario import Usuario
 from utils.visualizador import VisualizadorGrafo, ShellLayout
 
+# Cada cuanto se revisan los guardados en segundo plano (ms)
+INTERVALO_REVISION_GUARDADO = 500
+
 class GUIController:
     """Controlador principal de la aplicacion"""
     
-    def __init__(self):
-        self.service = RedSocialService()
+    def __init__(self, intervalo_autoguardado: Optional[float] = 30.0,
+                 intervalo_vigilancia: Optional[float] = None):
+        self.service = self._crear_servicio()
         self.visualizador = VisualizadorGrafo()
         self.view = None  # Se asignara cuando se cree la vista
         
+        # Guardado en segundo plano (intervalo en segundos, None sin autoguardado)
+        self.intervalo_autoguardado = intervalo_autoguardado
+        self.guardado: Optional[GuardadoEnSegundoPlano] = None
+        self._guardados_manuales = []
+        # Recarga aplazada hasta que el escritor termine
+        self._recarga_pendiente = False
+        
+        # Cada cuanto se buscan cambios externos en los archivos (segundos, None sin vigilancia)
+        self.intervalo_vigilancia = intervalo_vigilancia
+        
         # Estado de la aplicacion
         self.ego_mode = False
         self.ego_user_id = None
@@ -26,6 +45,28 @@ class GUIController:
     def inicializar(self):
         """Inicializar el controlador"""
         self.service.cargar_datos()
+        self.guardado = GuardadoEnSegundoPlano(self.service, self.intervalo_autoguardado)
+        if self.view:
+            self.view.root.after(INTERVALO_REVISION_GUARDADO, self._revisar_guardado)
+            if self.intervalo_vigilancia:
+                self.view.root.after(int(self.intervalo_vigilancia * 1000), self._vigilar_archivos)
+    
+    def cerrar(self):
+        """Guardar lo pendiente y liberar recursos antes de salir"""
+        if self.guardado:
+            # Al salir los archivos de datos quedan completos (journal compactado)
+            self.guardado.solicitar(compactar=True)
+            self.guardado.detener()
+        self.service.cerrar()
+    
+    def _crear_servicio(self) -> RedSocialService:
+        """Servicio sobre los archivos JSON con journal de cambios y cache de carga"""
+        data_manager = DataManager()
+        # Sin fsync por operacion: el autoguardado sincroniza desde su hilo
+        journal = JournalCambios(os.path.join(data_manager.directorio, 'cambios.journal'),
+                                 sincronizar=False)
+        cache_carga = CacheCarga(os.path.join(data_manager.directorio, 'cache_carga.pkl'))
+        return RedSocialService(data_manager, journal=journal, cache_carga=cache_carga)
     
     def set_view(self, view):
         """Asignar la vista al controlador"""
@@ -219,19 +260,56 @@ class GUIController:
     # === PERSISTENCIA ===
     
     def guardar_datos(self) -> bool:
-        """Guardar datos"""
-        if self.service.guardar_datos():
-            usuarios = self.service.obtener_todos_usuarios()
-            conexiones = self.service.obtener_conexiones()
-            
-            messagebox.showinfo("Exito", 
-                               f"Datos guardados exitosamente:\n"
-                               f"- {len(usuarios)} usuarios\n"
-                               f"- {len(conexiones)} conexiones")
+        """
+        Guardar datos (la escritura corre en segundo plano)
+        Un guardado explicito compacta el journal: usuarios.json y
+        conexiones.json quedan al dia para quien los lea.
+        """
+        escritura = self.guardado.solicitar(compactar=True)
+        if escritura is None:
+            messagebox.showinfo("Exito", "No hay cambios sin guardar")
             return True
-        else:
-            messagebox.showerror("Error", "Error al guardar los datos")
-            return False
+        
+        # El resultado se informa al revisar el guardado
+        self._guardados_manuales.append(escritura)
+        return True
+    
+    def _revisar_guardado(self):
+        """Procesar guardados terminados y autoguardado (se reprograma con after)"""
+        for escritura in self.guardado.revisar():
+            if escritura not in self._guardados_manuales:
+                if not escritura.exito:
+                    print("Error en el autoguardado: los cambios siguen pendientes")
+                continue
+            self._guardados_manuales.remove(escritura)
+            if escritura.exito:
+                messagebox.showinfo("Exito", 
+                                   f"Datos guardados exitosamente:\n"
+                                   f"- {len(self.service.usuarios)} usuarios\n"
+                                   f"- {self.service.grafo.number_of_edges()} conexiones")
+            else:
+                messagebox.showerror("Error", "Error al guardar los datos")
+        
+        if self.view:
+            self.view.root.after(INTERVALO_REVISION_GUARDADO, self._revisar_guardado)
+    
+    def _vigilar_archivos(self):
+        """Aplicar los cambios externos de los archivos de datos (se reprograma con after)"""
+        # Mientras se guarda, los archivos cambian por el propio guardado
+        if not self.guardado.ocupado and self.service.cambios_en_disco():
+            try:
+                resumen = self.service.recargar_cambios()
+            except ValueError as e:
+                # Archivo ilegible (p. ej. otro programa escribiendolo): se reintenta
+                print(f"No se aplicaron los cambios externos: {e}")
+                resumen = None
+            if resumen and any(valor for clave, valor in resumen.items()
+                               if clave not in ('particiones', 'segundos')):
+                if self.view:
+                    self.view.actualizar_tras_cambio()
+        
+        if self.view:
+            self.view.root.after(int(self.intervalo_vigilancia * 1000), self._vigilar_archivos)
     
     def recargar_datos(self) -> bool:
         """Recargar datos desde archivos"""
@@ -239,17 +317,55 @@ class GUIController:
         self.ego_mode = False
         self.ego_user_id = None
         
-        # Recargar
-        self.service = RedSocialService()
+        # La recarga compara con el disco: con escrituras en curso se aplaza
+        # (sin bloquear la interfaz) hasta que _revisar_guardado las procese
+        if self.guardado.ocupado and self.view:
+            if not self._recarga_pendiente:
+                self._recarga_pendiente = True
+                self.view.root.after(INTERVALO_REVISION_GUARDADO, self._recargar_tras_guardado)
+            return True
+        self.guardado.esperar()
+        
+        # Aplicar solo lo que cambio en disco
+        try:
+            resumen = self.service.recargar_cambios()
+        except ValueError as e:
+            messagebox.showerror("Error", f"No se pudieron recargar los datos:\n{e}")
+            return False
+        if resumen is not None:
+            if self.view:
+                self.view.actualizar_tras_recarga()
+            cambios = sum(valor for clave, valor in resumen.items()
+                          if clave not in ('particiones', 'segundos'))
+            messagebox.showinfo("Exito", f"Datos recargados correctamente\n"
+                                         f"{cambios} cambios aplicados en {resumen['segundos']:.2f} s")
+            return True
+        
+        # Con una carga masiva sin guardar no hay con que comparar: reconstruir
+        self.guardado.detener()
+        self._guardados_manuales.clear()
+        self.service.cerrar()
+        self.service = self._crear_servicio()
         self.service.cargar_datos()
+        self.guardado = GuardadoEnSegundoPlano(self.service, self.intervalo_autoguardado)
         
         # Actualizar vista
         if self.view:
             self.view.actualizar_tras_recarga()
         
-        messagebox.showinfo("Exito", "Datos recargados correctamente")
+        mensaje = "Datos recargados correctamente"
+        carga = self.service.cache_carga.ultima_carga
+        if carga and carga['acierto']:
+            mensaje += (f"\nSin cambios en disco: restaurado desde cache en {carga['segundos']:.2f} s "
+                        f"({carga['ahorro']:.2f} s menos que leer los archivos)")
+        messagebox.showinfo("Exito", mensaje)
         return True
     
+    def _recargar_tras_guardado(self):
+        """Reintentar una recarga aplazada (se reprograma mientras el escritor siga ocupado)"""
+        self._recarga_pendiente = False
+        self.recargar_datos()
+    
     # === VISUALIZACION ===
     
     def renderizar_grafo(self, ax, usuarios_data=None):
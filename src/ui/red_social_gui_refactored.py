@@ -36,6 +36,7 @@ class RedSocialGUIRefactored:
         self.root.geometry("1600x900")
         self.root.configure(bg='#f0f0f0')
         self.root.state('zoomed')
+        self.root.protocol("WM_DELETE_WINDOW", self.on_cerrar)
     
     def crear_interfaz(self):
         """Crear la interfaz grafica principal"""
@@ -308,6 +309,11 @@ class RedSocialGUIRefactored:
     
     # === EVENTOS DE UI ===
     
+    def on_cerrar(self):
+        """Terminar los guardados pendientes antes de cerrar la ventana"""
+        self.controller.cerrar()
+        self.root.destroy()
+    
     def on_agregar_persona(self):
         """Manejar agregar persona"""
         if self.controller.agregar_usuario(
@@ -608,13 +614,21 @@ class RedSocialGUIRefactored:
         for i, item in enumerate(resultados['grado'], 1):
             self.analisis_text.insert(tk.END, f"{i}. {item['usuario']} (ID: {item['id']}): {item['centralidad']:.3f}\n")
         
-        # Centralidad de cercania
-        if resultados['cercania']:
-            self.analisis_text.insert(tk.END, "\n🎯 CENTRALIDAD DE CERCANIA:\n")
-            for i, item in enumerate(resultados['cercania'], 1):
-                self.analisis_text.insert(tk.END, f"{i}. {item['usuario']} (ID: {item['id']}): {item['centralidad']:.3f}\n")
-        else:
-            self.analisis_text.insert(tk.END, "\n⚠️ El grafo no esta completamente conectado para calcular centralidad de cercania.\n")
+        # Centralidad de cercania (cada usuario respecto de su componente)
+        self.analisis_text.insert(tk.END, "\n🎯 CENTRALIDAD DE CERCANIA:\n")
+        for i, item in enumerate(resultados['cercania'], 1):
+            self.analisis_text.insert(tk.END, f"{i}. {item['usuario']} (ID: {item['id']}): {item['centralidad']:.3f}\n")
+        if resultados.get('error_cercania') is not None:
+            self.analisis_text.insert(tk.END, f"(aproximada: distancia media con error estimado de ±{resultados['error_cercania']:.2f} saltos, 95%)\n")
+        
+        # Centralidades espectrales (vacias si no convergen)
+        for clave, titulo in (('pagerank', "PAGERANK"), ('vector_propio', "CENTRALIDAD DE VECTOR PROPIO"),
+                              ('katz', "CENTRALIDAD DE KATZ")):
+            if not resultados.get(clave):
+                continue
+            self.analisis_text.insert(tk.END, f"\n🎯 {titulo}:\n")
+            for i, item in enumerate(resultados[clave], 1):
+                self.analisis_text.insert(tk.END, f"{i}. {item['usuario']} (ID: {item['id']}): {item['centralidad']:.4f}\n")
     
     def mostrar_resultados_comunidades(self, comunidades):
         """Mostrar resultados de deteccion de comunidades"""
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del analizador de red
+"""
+import os
+import random
+import sys
+import unittest
+
+import networkx as nx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.analizador_red import AnalizadorRed
+from services.data_manager import DataManager
+from services.estadisticas_incrementales import EstadisticasIncrementales
+from services.motor_centralidad import MotorCentralidad, posiciones_mejores
+from services.red_social_service import RedSocialService
+
+
+class TestEstadisticasIncrementales(unittest.TestCase):
+    def setUp(self):
+        self.analizador = AnalizadorRed()
+
+    def comprobar(self, estadisticas, grafo):
+        self.assertEqual(estadisticas.resumen(),
+                         self.analizador.calcular_estadisticas_generales(grafo))
+        self.assertTrue(estadisticas.coincide_con(grafo))
+
+    def test_altas_y_bajas_contra_recalculo(self):
+        azar = random.Random(3)
+        grafo = nx.gnm_random_graph(60, 90, seed=3)
+        estadisticas = EstadisticasIncrementales()
+        estadisticas.reconstruir(grafo)
+        siguiente = 60
+        for _ in range(600):
+            operacion = azar.random()
+            if operacion < 0.3 and grafo.number_of_edges():
+                origen, destino = azar.choice(list(grafo.edges()))
+                grafo.remove_edge(origen, destino)
+                estadisticas.quitar_arista(grafo, origen, destino)
+            elif operacion < 0.45 and len(grafo):
+                nodo = azar.choice(list(grafo))
+                vecinos = list(grafo.adj[nodo])
+                grafo.remove_node(nodo)
+                estadisticas.quitar_nodo(grafo, nodo, vecinos)
+            elif operacion < 0.55:
+                grafo.add_node(siguiente)
+                estadisticas.agregar_nodo(siguiente)
+                siguiente += 1
+            elif len(grafo) > 1:
+                origen, destino = azar.sample(list(grafo), 2)
+                if not grafo.has_edge(origen, destino):
+                    grafo.add_edge(origen, destino)
+                    estadisticas.agregar_arista(origen, destino)
+            self.comprobar(estadisticas, grafo)
+
+    def test_quitar_puente_y_nodo_de_corte(self):
+        # Dos ciclos unidos por un camino 0-10-20: quitar 10 los separa
+        grafo = nx.union(nx.cycle_graph(range(0, 5)), nx.cycle_graph(range(20, 25)))
+        grafo.add_edges_from([(0, 10), (10, 20)])
+        estadisticas = EstadisticasIncrementales()
+        estadisticas.reconstruir(grafo)
+        self.assertEqual(estadisticas.componentes, 1)
+        vecinos = list(grafo.adj[10])
+        grafo.remove_node(10)
+        estadisticas.quitar_nodo(grafo, 10, vecinos)
+        self.comprobar(estadisticas, grafo)
+        self.assertEqual(estadisticas.componentes, 2)
+        # Quitar una arista de un ciclo no separa nada
+        grafo.remove_edge(0, 1)
+        estadisticas.quitar_arista(grafo, 0, 1)
+        self.comprobar(estadisticas, grafo)
+        self.assertEqual(estadisticas.componentes, 2)
+
+    def test_compacta_los_fantasmas(self):
+        grafo = nx.path_graph(3000)
+        estadisticas = EstadisticasIncrementales()
+        estadisticas.reconstruir(grafo)
+        # Quitar nodos de un extremo deja fantasmas hasta reconstruir
+        for nodo in range(2500):
+            vecinos = list(grafo.adj[nodo])
+            grafo.remove_node(nodo)
+            estadisticas.quitar_nodo(grafo, nodo, vecinos)
+        self.comprobar(estadisticas, grafo)
+        self.assertLessEqual(len(estadisticas._padre), 3000 - 2500 + 1025)
+
+    def test_grafo_vacio(self):
+        grafo = nx.Graph()
+        estadisticas = EstadisticasIncrementales()
+        estadisticas.reconstruir(grafo)
+        self.comprobar(estadisticas, grafo)
+        estadisticas.agregar_nodo(1)
+        grafo.add_node(1)
+        grafo.remove_node(1)
+        estadisticas.quitar_nodo(grafo, 1, [])
+        self.comprobar(estadisticas, grafo)
+
+
+class TestEstadisticasDelServicio(unittest.TestCase):
+    def test_ediciones_contra_recalculo(self):
+        servicio = RedSocialService(DataManager())
+        ids = [servicio.agregar_usuario(f"U{i}", 20, intereses=[f"t{i % 4}"])[0].id
+               for i in range(40)]
+        azar = random.Random(5)
+        for _ in range(120):
+            origen, destino = azar.sample(ids, 2)
+            servicio.crear_conexion(origen, destino)
+        for usuario_id in ids[::5]:
+            servicio.eliminar_usuario(usuario_id)
+        for origen, destino in list(servicio.grafo.edges())[::3]:
+            servicio.eliminar_conexion(origen, destino)
+        esperadas = servicio.analizador.calcular_estadisticas_generales(servicio.grafo)
+        self.assertEqual(servicio.obtener_estadisticas(), esperadas)
+        self.assertTrue(servicio.recalcular_estadisticas())
+        self.assertEqual(servicio.obtener_estadisticas(), esperadas)
+
+
+class TestMotorCentralidad(unittest.TestCase):
+    def setUp(self):
+        # Una componente sin estructura, una bipartita y nodos aislados
+        self.grafo = nx.disjoint_union(nx.barabasi_albert_graph(200, 3, seed=4),
+                                       nx.grid_2d_graph(5, 6))
+        self.grafo.add_nodes_from([900, 901])
+        self.motor = MotorCentralidad()
+        self.matriz = self.motor.actualizar(self.grafo, 1)
+
+    def comparar(self, valores, esperados, lugares=12):
+        for nodo, valor in esperados.items():
+            self.assertAlmostEqual(valores[self.matriz.posiciones[nodo]], valor, places=lugares)
+
+    def test_pagerank(self):
+        self.comparar(self.motor.pagerank(), nx.pagerank(self.grafo))
+        self.comparar(self.motor.pagerank(alfa=0.6), nx.pagerank(self.grafo, alpha=0.6))
+
+    def test_vector_propio(self):
+        self.comparar(self.motor.vector_propio(), nx.eigenvector_centrality(self.grafo))
+        radio = max(abs(np.linalg.eigvalsh(nx.to_numpy_array(self.grafo))))
+        self.assertAlmostEqual(self.motor._radio_espectral, radio, places=6)
+
+    def test_katz(self):
+        self.comparar(self.motor.katz(alfa=0.05), nx.katz_centrality(self.grafo, alpha=0.05))
+        # El alfa por defecto depende del radio espectral: se compara con la solucion exacta
+        alfa = 0.9 / max(abs(np.linalg.eigvalsh(nx.to_numpy_array(self.grafo))))
+        self.comparar(self.motor.katz(), nx.katz_centrality_numpy(self.grafo, alpha=alfa), 6)
+
+    def test_resultados_por_version(self):
+        pagerank = self.motor.pagerank()
+        self.motor.actualizar(self.grafo, 1)
+        self.assertIs(self.motor.pagerank(), pagerank)
+        self.grafo.add_edge(900, 901)
+        self.matriz = self.motor.actualizar(self.grafo, 2)
+        self.assertIsNot(self.motor.pagerank(), pagerank)
+        self.comparar(self.motor.pagerank(), nx.pagerank(self.grafo))
+
+    def test_grafo_vacio(self):
+        motor = MotorCentralidad()
+        motor.actualizar(nx.Graph())
+        self.assertEqual(motor.pagerank().size, 0)
+        self.assertEqual(motor.vector_propio().size, 0)
+        self.assertEqual(motor.katz(alfa=0.1).size, 0)
+
+    def test_posiciones_mejores(self):
+        valores = np.array([0.1, 0.5, 0.3, 0.5, 0.3, 0.0])
+        self.assertEqual(posiciones_mejores(valores, 3).tolist(), [1, 3, 2])
+        self.assertEqual(posiciones_mejores(valores, 10).tolist(), [1, 3, 2, 4, 0, 5])
+        self.assertEqual(posiciones_mejores(valores, 0).size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
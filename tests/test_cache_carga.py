@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la cache de carga
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.cache_carga import CacheCarga
+from services.data_manager import DataManager
+from services.red_social_service import RedSocialService
+
+
+USUARIOS = [
+    {"id": 1, "nombre": "Ana", "edad": 30, "email": "", "intereses": ["cine"], "amigos": []},
+    {"id": 2, "nombre": "Luis", "edad": 32, "email": "", "intereses": ["cine"], "amigos": []},
+    {"id": 3, "nombre": "Eva", "edad": 50, "email": "", "intereses": [], "amigos": []},
+]
+
+
+class TestCacheCarga(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.data_manager = DataManager(self.directorio)
+        self.data_manager.guardar_datos(USUARIOS, [{"origen": 1, "destino": 2}])
+        self.ruta = os.path.join(self.directorio, 'cache_carga.pkl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def cargar(self):
+        cache = CacheCarga(self.ruta)
+        servicio = RedSocialService(DataManager(self.directorio), cache_carga=cache)
+        servicio.cargar_datos()
+        return servicio, cache.ultima_carga['acierto']
+
+    def reescribir_usuarios(self, anterior, nuevo):
+        """Cambiar el archivo de usuarios conservando su tamano y su mtime"""
+        archivo = self.data_manager.archivo_usuarios
+        estado = os.stat(archivo)
+        with open(archivo, encoding='utf-8') as f:
+            contenido = f.read()
+        self.assertEqual(len(anterior), len(nuevo))
+        with open(archivo, 'w', encoding='utf-8') as f:
+            f.write(contenido.replace(anterior, nuevo))
+        os.utime(archivo, ns=(estado.st_atime_ns, estado.st_mtime_ns))
+
+    def test_acierto_restaura_el_mismo_estado(self):
+        original, acierto = self.cargar()
+        self.assertFalse(acierto)
+        self.assertTrue(os.path.exists(self.ruta))
+        restaurado, acierto = self.cargar()
+        self.assertTrue(acierto)
+        self.assertEqual({i: u.to_dict() for i, u in restaurado.usuarios.items()},
+                         {i: u.to_dict() for i, u in original.usuarios.items()})
+        self.assertEqual(sorted(restaurado.grafo.edges()), [(1, 2)])
+        self.assertEqual(restaurado.obtener_estadisticas()['num_conexiones'], 1)
+        # Los usuarios restaurados siguen vinculados al grafo
+        restaurado.crear_conexion(2, 3)
+        self.assertEqual(sorted(restaurado.usuarios[3].amigos), [2])
+
+    def test_invalida_si_cambia_el_contenido_con_igual_tamano_y_mtime(self):
+        self.cargar()
+        self.reescribir_usuarios('"Eva"', '"Sol"')
+        servicio, acierto = self.cargar()
+        self.assertFalse(acierto)
+        self.assertEqual(servicio.usuarios[3].nombre, "Sol")
+        # La cache se reescribe con la nueva huella
+        self.assertTrue(self.cargar()[1])
+
+    def test_invalida_si_cambian_los_archivos(self):
+        self.cargar()
+        self.data_manager.guardar_datos(USUARIOS, [{"origen": 2, "destino": 3}])
+        servicio, acierto = self.cargar()
+        self.assertFalse(acierto)
+        self.assertEqual(sorted(servicio.grafo.edges()), [(2, 3)])
+
+    def test_invalida_si_falta_un_archivo(self):
+        self.cargar()
+        os.remove(self.data_manager.archivo_conexiones)
+        servicio, acierto = self.cargar()
+        self.assertFalse(acierto)
+        self.assertEqual(servicio.grafo.number_of_edges(), 0)
+
+    def test_cache_corrupta_se_descarta(self):
+        self.cargar()
+        with open(self.ruta, 'wb') as f:
+            f.write(b'no es un pickle')
+        servicio, acierto = self.cargar()
+        self.assertFalse(acierto)
+        self.assertEqual(sorted(servicio.usuarios), [1, 2, 3])
+
+    def test_invalidar(self):
+        self.cargar()
+        CacheCarga(self.ruta).invalidar()
+        self.assertFalse(os.path.exists(self.ruta))
+        CacheCarga(self.ruta).invalidar()
+        self.assertFalse(self.cargar()[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
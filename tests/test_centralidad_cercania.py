@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la centralidad de cercania contra networkx
+"""
+import os
+import sys
+import unittest
+
+import networkx as nx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.centralidad_cercania import calcular_cercania
+from services.matriz_adyacencia import MatrizAdyacencia
+
+
+class TestCalcularCercania(unittest.TestCase):
+    def comparar(self, grafo):
+        matriz = MatrizAdyacencia().actualizar(grafo)
+        cercania, error = calcular_cercania(matriz, workers=1)
+        esperada = nx.closeness_centrality(grafo)
+        for nodo, valor in esperada.items():
+            self.assertAlmostEqual(cercania[matriz.posiciones[nodo]], valor, places=12)
+        self.assertIsNone(error)
+
+    def test_exacta_conexo(self):
+        self.comparar(nx.connected_watts_strogatz_graph(300, 4, 0.1, seed=3))
+
+    def test_exacta_varias_componentes(self):
+        # Mas de 64 fuentes por componente, nodos aislados y una arista suelta
+        grafo = nx.disjoint_union(nx.barabasi_albert_graph(150, 2, seed=5), nx.path_graph(70))
+        grafo.add_nodes_from([1000, 1001])
+        grafo.add_edge(2000, 2001)
+        self.comparar(grafo)
+
+    def test_muestreo_dentro_del_error_estimado(self):
+        grafo = nx.connected_watts_strogatz_graph(2000, 6, 0.05, seed=1)
+        matriz = MatrizAdyacencia().actualizar(grafo)
+        exacta, _ = calcular_cercania(matriz, workers=1)
+        cercania, error = calcular_cercania(matriz, muestras=200, workers=1, semilla=7)
+        self.assertIsNotNone(error)
+        # El error es por nodo al 95%: casi todas las distancias medias quedan dentro
+        desvios = np.abs(1 / cercania - 1 / exacta)
+        self.assertGreaterEqual((desvios <= error).mean(), 0.9)
+        self.assertLess(error, 1.0)
+
+    def test_muestras_invalidas(self):
+        matriz = MatrizAdyacencia().actualizar(nx.path_graph(5))
+        with self.assertRaises(ValueError):
+            calcular_cercania(matriz, muestras=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la centralidad de intermediacion contra networkx
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+import networkx as nx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services import centralidad_intermediacion
+from services.centralidad_intermediacion import calcular_intermediacion
+from services.matriz_adyacencia import MatrizAdyacencia
+
+
+class TestCalcularIntermediacion(unittest.TestCase):
+    def comparar(self, grafo, **opciones):
+        matriz = MatrizAdyacencia().actualizar(grafo)
+        intermediacion = calcular_intermediacion(matriz, **opciones)
+        for nodo, valor in nx.betweenness_centrality(grafo).items():
+            self.assertAlmostEqual(intermediacion[matriz.posiciones[nodo]], valor, places=12)
+
+    def test_exacta_conexo(self):
+        self.comparar(nx.connected_watts_strogatz_graph(300, 4, 0.1, seed=3), workers=1)
+
+    def test_exacta_con_caminos_empatados_y_componentes(self):
+        # La grilla tiene muchos caminos minimos por par; se suman nodos aislados y otra componente
+        grafo = nx.disjoint_union(nx.grid_2d_graph(8, 9), nx.star_graph(6))
+        grafo.add_nodes_from([1000, 1001])
+        self.comparar(grafo, workers=1)
+
+    def test_exacta_en_paralelo(self):
+        with mock.patch.object(centralidad_intermediacion, 'MINIMO_NODOS_PARALELO', 0):
+            self.comparar(nx.barabasi_albert_graph(200, 3, seed=2), workers=2)
+
+    def test_muestreo_cercano_a_la_exacta(self):
+        grafo = nx.connected_watts_strogatz_graph(1000, 6, 0.1, seed=2)
+        matriz = MatrizAdyacencia().actualizar(grafo)
+        exacta = calcular_intermediacion(matriz, workers=1)
+        estimada = calcular_intermediacion(matriz, muestras=200, workers=1, semilla=3)
+        self.assertLess(np.abs(estimada - exacta).max(), 0.02)
+        self.assertGreater(np.corrcoef(estimada, exacta)[0, 1], 0.9)
+        # Misma semilla, mismas fuentes
+        np.testing.assert_array_equal(
+            estimada, calcular_intermediacion(matriz, muestras=200, workers=1, semilla=3))
+
+    def test_muestreo_insesgado(self):
+        # Con pocas fuentes el sesgo de escalar mal a los nodos muestreados supera al ruido
+        matriz = MatrizAdyacencia().actualizar(nx.barabasi_albert_graph(30, 2, seed=1))
+        exacta = calcular_intermediacion(matriz, workers=1)
+        media = np.mean([calcular_intermediacion(matriz, muestras=3, workers=1, semilla=semilla)
+                         for semilla in range(3000)], axis=0)
+        self.assertLess(np.abs(media - exacta).max(), 0.008)
+
+    def test_casos_limite(self):
+        matriz = MatrizAdyacencia().actualizar(nx.path_graph(2))
+        np.testing.assert_array_equal(calcular_intermediacion(matriz), [0.0, 0.0])
+        with self.assertRaises(ValueError):
+            calcular_intermediacion(MatrizAdyacencia().actualizar(nx.path_graph(5)), muestras=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la codificacion compacta de conexiones
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.codificacion_aristas import codificar_aristas, decodificar_aristas
+from services.data_manager import DataManager
+
+
+def normalizadas(origenes, destinos):
+    """Conjunto de conexiones (menor, mayor) sin bucles"""
+    return {(min(o, d), max(o, d)) for o, d in zip(origenes, destinos) if o != d}
+
+
+class TestCodificacionAristas(unittest.TestCase):
+    def test_ida_y_vuelta(self):
+        azar = np.random.default_rng(8)
+        origenes = azar.integers(0, 5000, 20000)
+        destinos = azar.integers(0, 5000, 20000)
+        decodificados = decodificar_aristas(codificar_aristas(origenes, destinos))
+        self.assertEqual(set(zip(*(a.tolist() for a in decodificados))),
+                         normalizadas(origenes.tolist(), destinos.tolist()))
+        self.assertTrue((decodificados[0] < decodificados[1]).all())
+
+    def test_duplicados_y_bucles(self):
+        origenes = np.array([3, 1, 1, 5, 7, 2])
+        destinos = np.array([1, 3, 3, 5, 2, 7])
+        origen, destino = decodificar_aristas(codificar_aristas(origenes, destinos))
+        self.assertEqual(list(zip(origen.tolist(), destino.tolist())), [(1, 3), (2, 7)])
+
+    def test_ids_grandes(self):
+        grande = 2**62
+        origen, destino = decodificar_aristas(codificar_aristas(np.array([0, grande - 5]),
+                                                                np.array([grande, grande])))
+        self.assertEqual(list(zip(origen.tolist(), destino.tolist())),
+                         [(0, grande), (grande - 5, grande)])
+
+    def test_vacio_e_invalidos(self):
+        origen, destino = decodificar_aristas(codificar_aristas(np.zeros(0), np.zeros(0)))
+        self.assertEqual((origen.size, destino.size), (0, 0))
+        self.assertEqual(decodificar_aristas(b'')[0].size, 0)
+        with self.assertRaises(ValueError):
+            codificar_aristas(np.array([-1]), np.array([2]))
+        with self.assertRaises(ValueError):
+            decodificar_aristas(b'XXXX')
+
+    def test_mas_compacto_que_json(self):
+        azar = np.random.default_rng(1)
+        origenes = np.repeat(np.arange(1000), 10)
+        destinos = origenes + azar.integers(1, 200, origenes.size)
+        self.assertLess(len(codificar_aristas(origenes, destinos)), 3 * origenes.size)
+
+
+class TestFormatoCompacto(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_guardar_y_cargar(self):
+        for compresion, extension in (('gzip', '.gz'), ('lzma', '.xz')):
+            data_manager = DataManager(self.directorio, compresion=compresion)
+            usuarios = [{"id": 1, "nombre": "Ana", "edad": 30, "email": "", "intereses": ["cine"],
+                         "amigos": [3]},
+                        {"id": 2, "nombre": "Luis", "edad": 31, "email": "", "intereses": [],
+                         "amigos": []},
+                        {"id": 3, "nombre": "Eva", "edad": 32, "email": "", "intereses": [],
+                         "amigos": [1]}]
+            conexiones = [{"origen": 2, "destino": 1}, {"origen": 1, "destino": 2}]
+            self.assertTrue(data_manager.guardar_datos(usuarios, conexiones))
+            self.assertTrue(data_manager.archivo_conexiones.endswith('.bin' + extension))
+            leidos = list(data_manager.iterar_usuarios())
+            # Los amigos se guardan solo como conexiones
+            self.assertEqual([u['nombre'] for u in leidos], ["Ana", "Luis", "Eva"])
+            self.assertFalse(any('amigos' in u for u in leidos))
+            conexiones = data_manager.iterar_conexiones()
+            self.assertEqual(sorted((c['origen'], c['destino']) for c in conexiones), [(1, 2), (1, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
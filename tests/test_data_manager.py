@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de persistencia
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services import data_manager as modulo_data_manager
+from services.data_manager import DataManager
+
+
+def usuarios_de_prueba(cantidad, nombre="U"):
+    return [{"id": i, "nombre": f"{nombre}{i}", "edad": 20, "email": "", "intereses": ["a"], "amigos": []}
+            for i in range(1, cantidad + 1)]
+
+
+class TestGuardadoAtomico(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.data_manager = DataManager(self.directorio)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_guardado_y_lecturas_concurrentes(self):
+        errores = []
+
+        def escribir():
+            try:
+                for vuelta in range(30):
+                    usuarios = usuarios_de_prueba(vuelta + 1)
+                    conexiones = [{"origen": 1, "destino": i} for i in range(2, vuelta + 2)]
+                    self.assertTrue(self.data_manager.guardar_datos(usuarios, conexiones))
+            except Exception as e:
+                errores.append(e)
+
+        def leer():
+            try:
+                for _ in range(200):
+                    self.data_manager.particiones()
+                    list(self.data_manager.iterar_usuarios())
+            except Exception as e:
+                errores.append(e)
+
+        hilos = [threading.Thread(target=escribir)] + [threading.Thread(target=leer) for _ in range(3)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        self.assertFalse(os.path.exists(self.data_manager.archivo_marcador))
+        usuarios, conexiones = self.data_manager.cargar_datos()
+        self.assertEqual((len(usuarios), len(conexiones)), (30, 29))
+
+    def preparar_guardado_interrumpido(self, confirmado):
+        """Datos viejos en disco y temporales de un guardado nuevo sin reemplazar"""
+        self.data_manager.guardar_datos(usuarios_de_prueba(2, "Viejo"), [{"origen": 1, "destino": 2}])
+        self.data_manager._guardar_usuarios(usuarios_de_prueba(3, "Nuevo"))
+        self.data_manager._guardar_conexiones([{"origen": 2, "destino": 3}])
+        if confirmado:
+            open(self.data_manager.archivo_marcador, 'w').close()
+
+    def test_guardado_sin_confirmar_conserva_los_datos_anteriores(self):
+        self.preparar_guardado_interrumpido(confirmado=False)
+        usuarios, conexiones = DataManager(self.directorio).cargar_datos()
+        self.assertEqual([u['nombre'] for u in usuarios], ["Viejo1", "Viejo2"])
+        self.assertEqual(conexiones, [{"origen": 1, "destino": 2}])
+
+    def test_guardado_confirmado_se_completa_al_leer(self):
+        self.preparar_guardado_interrumpido(confirmado=True)
+        usuarios, conexiones = DataManager(self.directorio).cargar_datos()
+        self.assertEqual([u['nombre'] for u in usuarios], ["Nuevo1", "Nuevo2", "Nuevo3"])
+        self.assertEqual(conexiones, [{"origen": 2, "destino": 3}])
+        self.assertFalse(os.path.exists(self.data_manager.archivo_marcador))
+
+    def test_reemplazo_a_medias_se_completa_al_leer(self):
+        self.preparar_guardado_interrumpido(confirmado=True)
+        # Se llego a reemplazar solo el archivo de usuarios
+        os.replace(self.data_manager.archivo_usuarios + '.tmp', self.data_manager.archivo_usuarios)
+        usuarios, conexiones = DataManager(self.directorio).cargar_datos()
+        self.assertEqual(len(usuarios), 3)
+        self.assertEqual(conexiones, [{"origen": 2, "destino": 3}])
+
+
+class TestLecturaIncremental(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.data_manager = DataManager(self.directorio)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def escribir_usuarios(self, texto):
+        with open(self.data_manager.archivo_usuarios, 'w', encoding='utf-8') as f:
+            f.write(texto)
+
+    def test_lee_por_bloques(self):
+        usuarios = usuarios_de_prueba(2000)
+        self.data_manager.guardar_datos(usuarios, [])
+        self.assertEqual(list(self.data_manager.iterar_usuarios()), usuarios)
+
+    def test_registro_invalido_descarta_la_carga(self):
+        self.escribir_usuarios('{"usuarios": [{"id": 1, "nombre": "Ana"}, {"id": 2, "nombre": }, '
+                               '{"id": 3, "nombre": "Eva"}]}')
+        with self.assertRaises(ValueError):
+            list(self.data_manager.iterar_usuarios())
+
+    def test_registro_demasiado_grande(self):
+        maximo = modulo_data_manager.MAXIMO_REGISTRO
+        modulo_data_manager.MAXIMO_REGISTRO = 1 << 17
+        try:
+            self.escribir_usuarios('{"usuarios": [{"id": 1, "nombre": "' + 'x' * (1 << 20) + '"}]}')
+            with self.assertRaises(ValueError):
+                list(self.data_manager.iterar_usuarios())
+        finally:
+            modulo_data_manager.MAXIMO_REGISTRO = maximo
+
+
+if __name__ == "__main__":
+    unittest.main()
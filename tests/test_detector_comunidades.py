@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la deteccion de comunidades y del arranque en caliente
+"""
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+import networkx as nx
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services import detector_comunidades
+from services.detector_comunidades import (DeteccionLouvain, DeteccionModularidadVoraz,
+                                           DeteccionPropagacionEtiquetas,
+                                           crear_detector_por_defecto)
+
+
+def editar(grafo, semilla):
+    """Copia con nodos borrados, nodos nuevos y aristas nuevas"""
+    azar = random.Random(semilla)
+    editado = grafo.copy()
+    editado.remove_nodes_from(azar.sample(sorted(editado), 10))
+    for nuevo in range(1000, 1010):
+        editado.add_edge(nuevo, azar.choice(sorted(editado)))
+    editado.add_node(2000)
+    for _ in range(20):
+        editado.add_edge(*azar.sample(sorted(editado), 2))
+    return editado
+
+
+class TestArranqueEnCaliente(unittest.TestCase):
+    def setUp(self):
+        self.grafo = nx.planted_partition_graph(8, 30, 0.3, 0.01, seed=1)
+        self.editado = editar(self.grafo, 2)
+
+    def comprobar_particion(self, comunidades, grafo):
+        self.assertTrue(nx.community.is_partition(grafo, comunidades))
+        self.assertEqual(sorted(map(len, comunidades), reverse=True), list(map(len, comunidades)))
+
+    def comparar_con_desde_cero(self, crear, tolerancia):
+        detector = crear()
+        self.comprobar_particion(detector.detectar(self.grafo, 1), self.grafo)
+        en_caliente = detector.detectar(self.editado, 2)
+        self.comprobar_particion(en_caliente, self.editado)
+        desde_cero = crear().detectar(self.editado, 2)
+        self.assertGreater(nx.community.modularity(self.editado, en_caliente),
+                           nx.community.modularity(self.editado, desde_cero) - tolerancia)
+
+    @unittest.skipIf(detector_comunidades.community_louvain is None, "requiere python-louvain")
+    def test_louvain(self):
+        self.comparar_con_desde_cero(lambda: DeteccionLouvain(semilla=1), 0.02)
+
+    def test_propagacion_de_etiquetas(self):
+        self.comparar_con_desde_cero(lambda: DeteccionPropagacionEtiquetas(semilla=1), 0.05)
+
+    def test_particion_inicial(self):
+        detector = DeteccionPropagacionEtiquetas(semilla=1)
+        detector.detectar(self.grafo, 1)
+        anterior = dict(detector.particion)
+        inicial = detector._particion_inicial(self.editado)
+        self.assertEqual(set(inicial), set(self.editado))
+        conservados = set(self.grafo) & set(self.editado)
+        self.assertTrue(all(inicial[nodo] == anterior[nodo] for nodo in conservados))
+        # Cada nodo nuevo arranca solo, con una etiqueta que no usaba nadie
+        nuevas = [inicial[nodo] for nodo in set(self.editado) - conservados]
+        self.assertEqual(len(set(nuevas)), len(nuevas))
+        self.assertFalse(set(nuevas) & set(anterior.values()))
+
+    def test_reutiliza_la_misma_version(self):
+        detector = DeteccionPropagacionEtiquetas(semilla=1)
+        with mock.patch.object(detector, '_detectar', wraps=detector._detectar) as detectar:
+            primera = detector.detectar(self.grafo, 1)
+            self.assertEqual(detector.detectar(self.grafo, 1), primera)
+            self.assertEqual(detectar.call_count, 1)
+            detector.detectar(self.editado, 2)
+            self.assertIsNotNone(detectar.call_args.args[2])
+            detector.reiniciar()
+            detector.detectar(self.editado, 2)
+            self.assertIsNone(detectar.call_args.args[2])
+
+    def test_voraz_siempre_desde_cero(self):
+        detector = DeteccionModularidadVoraz()
+        detector.detectar(self.grafo, 1)
+        with mock.patch.object(detector, '_detectar', wraps=detector._detectar) as detectar:
+            self.comprobar_particion(detector.detectar(self.editado, 2), self.editado)
+            self.assertIsNone(detectar.call_args.args[2])
+
+
+class TestPropagacionEtiquetas(unittest.TestCase):
+    def test_dos_cliques(self):
+        grafo = nx.barbell_graph(8, 0)
+        grafo.add_node(100)
+        comunidades = DeteccionPropagacionEtiquetas(semilla=3).detectar(grafo)
+        self.assertEqual(sorted(sorted(c) for c in comunidades),
+                         [list(range(8)), list(range(8, 16)), [100]])
+
+    def test_detector_por_defecto(self):
+        esperado = (DeteccionPropagacionEtiquetas if detector_comunidades.community_louvain is None
+                    else DeteccionLouvain)
+        self.assertIsInstance(crear_detector_por_defecto(), esperado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la exportacion columnar de metricas
+"""
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import networkx as nx
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+from services import exportador_metricas
+from services.data_manager import DataManager
+from services.exportador_metricas import ExportadorMetricas
+from services.red_social_service import RedSocialService
+
+INTERESES = [f"tema{i}" for i in range(30)]
+
+
+def servicio_aleatorio(semilla, n=120):
+    """Red con intereses variados: conjuntos vacios, chicos y algunos de mas de 10 intereses"""
+    azar = random.Random(semilla)
+    grafo = nx.gnm_random_graph(n, 3 * n, seed=semilla)
+    grafo.add_nodes_from(range(n, n + 5))
+    usuarios = []
+    for nodo in sorted(grafo):
+        cantidad = azar.choice([0, 1, 2, 3, 12])
+        usuarios.append(Usuario(nodo + 1, f"Usuario {nodo}", 20,
+                                intereses=azar.sample(INTERESES, cantidad)))
+    aristas = list(grafo.edges())
+    servicio = RedSocialService(DataManager())
+    servicio.cargar_masivo(usuarios, [u + 1 for u, _ in aristas], [v + 1 for _, v in aristas])
+    return servicio
+
+
+def recomendaciones_fuerza_bruta(servicio):
+    """Candidatos por usuario: comparten un interes, no son amigos ni el propio usuario"""
+    return {usuario.id: sum(1 for otro in servicio.usuarios.values()
+                            if otro.id != usuario.id
+                            and not servicio.grafo.has_edge(usuario.id, otro.id)
+                            and usuario.intereses_set & otro.intereses_set)
+            for usuario in servicio.usuarios.values()}
+
+
+class TestExportadorMetricas(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.servicio = servicio_aleatorio(4)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def por_id(self, datos, columna):
+        return dict(zip(datos['id'].tolist(), datos[columna].tolist()))
+
+    def test_recomendaciones_contra_fuerza_bruta(self):
+        esperadas = recomendaciones_fuerza_bruta(self.servicio)
+        # Con el umbral por defecto y forzando el cruce por mascaras para casi todos los grupos
+        for umbral in (exportador_metricas.MAXIMO_INCLUSION_EXCLUSION, 1):
+            with mock.patch.object(exportador_metricas, 'MAXIMO_INCLUSION_EXCLUSION', umbral):
+                datos = ExportadorMetricas(self.servicio, filas_por_bloque=17).calcular(
+                    ('id', 'recomendaciones'))
+            self.assertEqual(self.por_id(datos, 'recomendaciones'), esperadas)
+
+    def test_grado_cercania_y_comunidad(self):
+        datos = ExportadorMetricas(self.servicio).calcular()
+        grafo = self.servicio.grafo
+        self.assertEqual(self.por_id(datos, 'grado'), dict(grafo.degree()))
+        cercania = self.por_id(datos, 'cercania')
+        for nodo, valor in nx.closeness_centrality(grafo).items():
+            self.assertAlmostEqual(cercania[nodo], valor, places=12)
+        # Por defecto cada componente conexa es una comunidad
+        comunidad = self.por_id(datos, 'comunidad')
+        for componente in nx.connected_components(grafo):
+            self.assertEqual(len({comunidad[nodo] for nodo in componente}), 1)
+        self.assertEqual(len(set(comunidad.values())), nx.number_connected_components(grafo))
+
+    def test_comunidades_dadas(self):
+        ids = sorted(self.servicio.usuarios)
+        particion = [set(ids[:10]), [self.servicio.usuarios[i] for i in ids[10:]]]
+        datos = ExportadorMetricas(self.servicio).calcular(('id', 'comunidad'), particion)
+        comunidad = self.por_id(datos, 'comunidad')
+        self.assertEqual({i for i in ids if comunidad[i] == 0}, set(ids[:10]))
+        self.assertEqual({i for i in ids if comunidad[i] == 1}, set(ids[10:]))
+
+    def test_csv_y_npz_coinciden(self):
+        ruta_csv = os.path.join(self.directorio, 'metricas.csv')
+        ruta_npz = os.path.join(self.directorio, 'metricas.npz')
+        columnas = ('id', 'grado', 'recomendaciones')
+        self.assertEqual(self.servicio.exportar_metricas(ruta_csv, columnas), 125)
+        self.assertEqual(self.servicio.exportar_metricas(ruta_npz, columnas), 125)
+        with open(ruta_csv, encoding='utf-8') as f:
+            filas = list(csv.reader(f))
+        self.assertEqual(filas[0], list(columnas))
+        with np.load(ruta_npz) as npz:
+            self.assertEqual(sorted(npz.files), sorted(columnas))
+            self.assertEqual([[int(valor) for valor in fila] for fila in filas[1:]],
+                             np.column_stack([npz[c] for c in columnas]).tolist())
+        self.assertFalse(os.path.exists(ruta_csv + '.tmp'))
+
+    def test_columna_desconocida(self):
+        with self.assertRaises(ValueError):
+            ExportadorMetricas(self.servicio).calcular(('id', 'edad'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de la importacion en bloque de redes externas
+"""
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+from services import importador as modulo_importador
+from services.importador import ImportadorRed
+from services.red_social_service import RedSocialService
+
+
+class TestImportadorRed(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.servicio = RedSocialService()
+        self.importador = ImportadorRed(self.servicio)
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def archivo(self, nombre, contenido):
+        ruta = os.path.join(self.directorio, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+
+    def aristas_externas(self):
+        """Conexiones del servicio expresadas con los ids externos"""
+        externos = {interno: externo for externo, interno in self.importador.ids.items()}
+        return {tuple(sorted((externos[a], externos[b]), key=str))
+                for a, b in self.servicio.grafo.edges()}
+
+    def test_encabezado_csv_y_deduplicacion(self):
+        ruta = self.archivo('red.csv', "source,target\n1,2\n2,1\n2,3\n1,2\n3,3\n12,3\n")
+        self.assertEqual(self.importador.importar_aristas(ruta), 6)
+        resumen = self.importador.confirmar()
+        self.assertEqual(self.aristas_externas(), {(1, 2), (12, 3), (2, 3)})
+        self.assertEqual((resumen['usuarios'], resumen['conexiones']), (4, 3))
+        self.assertEqual((resumen['descartadas'], resumen['duplicadas']), (1, 2))
+
+    def test_snap_con_comentarios_sin_encabezado(self):
+        ruta = self.archivo('red.txt', "# Directed graph\n# FromNodeId\tToNodeId\n5\t6\n6\t7\n")
+        self.assertEqual(self.importador.importar_aristas(ruta), 2)
+        self.importador.confirmar()
+        self.assertEqual(self.aristas_externas(), {(5, 6), (6, 7)})
+
+    def test_encabezado_en_tsv(self):
+        ruta = self.archivo('red.tsv', "FromNodeId\tToNodeId\n1\t2\n")
+        self.assertEqual(self.importador.importar_aristas(ruta), 1)
+        sin_detectar = self.archivo('otra.tsv', "1\t2\n")
+        self.assertEqual(self.importador.importar_aristas(sin_detectar, encabezado=False), 1)
+
+    def test_ids_de_texto_y_numericos(self):
+        ruta = self.archivo('red.csv', 'origen,destino\n"ana","luis"\nana,12\n"12",luis\n')
+        self.importador.importar_aristas(ruta)
+        self.importador.confirmar()
+        # "12" y 12 son el mismo usuario
+        self.assertEqual(len(self.servicio.usuarios), 3)
+        self.assertEqual(self.aristas_externas(), {(12, 'ana'), (12, 'luis'), ('ana', 'luis')})
+        self.assertEqual(self.servicio.usuarios[self.importador.ids['ana']].nombre, 'ana')
+
+    def test_usuarios_y_aristas(self):
+        usuarios = self.archivo('usuarios.csv',
+                                "id,nombre,edad,intereses\n7,Ana,30,cine;remo\n8,Luis,x,\n")
+        self.assertEqual(self.importador.importar_usuarios(usuarios), 2)
+        self.importador.importar_aristas(self.archivo('red.txt', "7 8\n8 9\n"))
+        self.importador.confirmar()
+        ana = self.servicio.usuarios[self.importador.ids[7]]
+        self.assertEqual((ana.nombre, ana.edad, ana.intereses), ("Ana", 30, ["cine", "remo"]))
+        self.assertEqual(self.servicio.usuarios[self.importador.ids[8]].edad, 0)
+        self.assertEqual(self.servicio.usuarios[self.importador.ids[9]].nombre, "9")
+        # Sin conexiones automaticas por intereses
+        self.assertEqual(self.aristas_externas(), {(7, 8), (8, 9)})
+
+    def test_comprimido_y_lineas_partidas_entre_bloques(self):
+        ruta = os.path.join(self.directorio, 'red.txt.gz')
+        with gzip.open(ruta, 'wt', encoding='utf-8') as f:
+            f.write(''.join(f"{i} {i + 1}\n" for i in range(1000, 1200)))
+        tamano = modulo_importador.TAMANO_BLOQUE
+        modulo_importador.TAMANO_BLOQUE = 7
+        try:
+            self.assertEqual(self.importador.importar_aristas(ruta), 200)
+        finally:
+            modulo_importador.TAMANO_BLOQUE = tamano
+        resumen = self.importador.confirmar()
+        self.assertEqual((resumen['usuarios'], resumen['conexiones']), (201, 200))
+
+    def test_usuario_creado_entre_lotes_conserva_su_id(self):
+        self.importador.importar_aristas(self.archivo('a.txt', "1 2\n2 3\n"))
+        self.importador.confirmar()
+        ana, _ = self.servicio.agregar_usuario('Ana')
+        self.importador.importar_aristas(self.archivo('b.txt', "10 11\n"))
+        self.importador.confirmar()
+        self.assertEqual(self.servicio.usuarios[ana.id].nombre, 'Ana')
+        self.assertEqual(len(self.servicio.usuarios), 6)
+        self.assertNotIn(ana.id, (self.importador.ids[10], self.importador.ids[11]))
+
+    def test_usuario_creado_antes_de_confirmar(self):
+        self.importador.importar_aristas(self.archivo('a.txt', "1 2\n"))
+        ana, _ = self.servicio.agregar_usuario('Ana')
+        self.importador.confirmar()
+        self.assertEqual(self.servicio.usuarios[ana.id].nombre, 'Ana')
+        self.assertEqual(len(self.servicio.usuarios), 3)
+
+
+class TestCargarMasivo(unittest.TestCase):
+    def test_rechaza_ids_existentes(self):
+        servicio = RedSocialService()
+        servicio.cargar_masivo([Usuario(1, "Ana"), Usuario(2, "Luis")], [1], [2])
+        with self.assertRaises(ValueError):
+            servicio.cargar_masivo([Usuario(2, "Otro")], [], [])
+        self.assertEqual(servicio.usuarios[2].nombre, "Luis")
+        servicio.cargar_masivo([Usuario(2, "Otro")], [], [], reemplazar=True)
+        self.assertEqual(servicio.usuarios[2].nombre, "Otro")
+
+
+if __name__ == "__main__":
+    unittest.main()
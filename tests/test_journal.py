@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del journal de cambios y del guardado en segundo plano
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.data_manager import DataManager
+from services.guardado import GuardadoEnSegundoPlano
+from services.journal import AGREGAR_CONEXION, AGREGAR_USUARIO, JournalCambios
+from services.red_social_service import RedSocialService
+
+
+class TestJournalCambios(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, 'cambios.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_registrar_y_leer(self):
+        journal = JournalCambios(self.ruta, sincronizar=False)
+        journal.registrar(AGREGAR_USUARIO, usuario={"id": 1, "nombre": "Ana"})
+        journal.registrar(AGREGAR_CONEXION, origen=1, destino=2)
+        journal.cerrar()
+        reabierto = JournalCambios(self.ruta, sincronizar=False)
+        self.assertEqual(reabierto.operaciones, 2)
+        self.assertEqual([r['op'] for r in reabierto.leer()], [AGREGAR_USUARIO, AGREGAR_CONEXION])
+
+    def test_linea_cortada_se_descarta_y_se_recorta(self):
+        journal = JournalCambios(self.ruta, sincronizar=False)
+        journal.registrar(AGREGAR_CONEXION, origen=1, destino=2)
+        journal.cerrar()
+        # Escritura interrumpida a mitad de una linea
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write('{"op": "agregar_conexion", "orig')
+        journal = JournalCambios(self.ruta, sincronizar=False)
+        self.assertEqual(journal.operaciones, 1)
+        journal.registrar(AGREGAR_CONEXION, origen=3, destino=4)
+        journal.cerrar()
+        self.assertEqual([(r['origen'], r['destino']) for r in journal.leer()], [(1, 2), (3, 4)])
+
+    def test_descartar_primeras(self):
+        journal = JournalCambios(self.ruta, sincronizar=False)
+        for destino in range(2, 6):
+            journal.registrar(AGREGAR_CONEXION, origen=1, destino=destino)
+        journal.descartar_primeras(3)
+        journal.registrar(AGREGAR_CONEXION, origen=1, destino=9)
+        journal.cerrar()
+        self.assertEqual(journal.operaciones, 2)
+        self.assertEqual([r['destino'] for r in journal.leer()], [5, 9])
+
+
+class TestReproducirJournal(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, 'cambios.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def abrir(self, **opciones):
+        servicio = RedSocialService(DataManager(self.directorio),
+                                    journal=JournalCambios(self.ruta, sincronizar=False), **opciones)
+        servicio.cargar_datos()
+        return servicio
+
+    def estado(self, servicio):
+        return ({u.id: (u.nombre, tuple(u.intereses)) for u in servicio.usuarios.values()},
+                sorted(tuple(sorted(arista)) for arista in servicio.grafo.edges()))
+
+    def test_recupera_los_cambios_sin_compactar(self):
+        servicio = self.abrir()
+        ana, _ = servicio.agregar_usuario("Ana", intereses=["remo"])
+        luis, _ = servicio.agregar_usuario("Luis", intereses=["remo"])
+        eva, _ = servicio.agregar_usuario("Eva", intereses=["golf"])
+        servicio.crear_conexion(eva.id, ana.id)
+        servicio.eliminar_conexion(ana.id, luis.id)
+        servicio.eliminar_usuario(luis.id)
+        esperado = self.estado(servicio)
+        # Cierre sin guardar: los datos solo estan en el journal
+        servicio.cerrar()
+        self.assertEqual(list(DataManager(self.directorio).iterar_usuarios()), [])
+
+        recuperado = self.abrir()
+        self.assertEqual(self.estado(recuperado), esperado)
+        self.assertEqual(recuperado.agregar_usuario("Sol")[0].id, eva.id + 1)
+        recuperado.cerrar()
+
+    def test_reproducir_sobre_datos_ya_compactados(self):
+        servicio = self.abrir()
+        servicio.agregar_usuario("Ana", intereses=["remo"])
+        servicio.agregar_usuario("Luis", intereses=["remo"])
+        esperado = self.estado(servicio)
+        # Compactacion interrumpida antes de vaciar el journal
+        DataManager(self.directorio).guardar_datos(*servicio._datos_completos())
+        servicio.cerrar()
+
+        recuperado = self.abrir()
+        self.assertEqual(self.estado(recuperado), esperado)
+        recuperado.cerrar()
+
+    def test_compacta_al_superar_el_umbral(self):
+        servicio = self.abrir(compactar_cada=3)
+        for nombre in ("Ana", "Luis"):
+            servicio.agregar_usuario(nombre)
+            servicio.guardar_datos()
+        self.assertEqual(len(list(DataManager(self.directorio).iterar_usuarios())), 0)
+        servicio.agregar_usuario("Eva")
+        servicio.guardar_datos()
+        self.assertEqual(len(list(DataManager(self.directorio).iterar_usuarios())), 3)
+        self.assertEqual(servicio.journal.operaciones, 0)
+        servicio.cerrar()
+
+
+class TestGuardadoConJournal(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.data_manager = DataManager(self.directorio)
+        self.journal = JournalCambios(os.path.join(self.directorio, 'cambios.journal'), sincronizar=False)
+        self.servicio = RedSocialService(self.data_manager, journal=self.journal)
+        self.servicio.cargar_datos()
+        self.guardado = GuardadoEnSegundoPlano(self.servicio)
+
+    def tearDown(self):
+        self.guardado.detener()
+        self.servicio.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def nombres_en_archivo(self):
+        return [u['nombre'] for u in self.data_manager.iterar_usuarios()]
+
+    def test_guardado_explicito_compacta(self):
+        self.servicio.compactar()
+        self.servicio.agregar_usuario('Ana')
+        self.guardado.solicitar()
+        self.guardado.esperar()
+        # El autoguardado solo sincroniza el journal
+        self.assertEqual(self.nombres_en_archivo(), [])
+        self.assertEqual(self.journal.operaciones, 1)
+        self.assertIsNotNone(self.guardado.solicitar(compactar=True))
+        self.guardado.esperar()
+        self.assertEqual(self.nombres_en_archivo(), ['Ana'])
+        self.assertEqual(self.journal.operaciones, 0)
+        self.assertIsNone(self.guardado.solicitar(compactar=True))
+
+
+class TestGuardadoEnSegundoPlano(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        # Directorio todavia inexistente: las escrituras fallan hasta crearlo
+        self.destino = os.path.join(self.directorio, 'datos')
+        self.servicio = RedSocialService(DataManager(self.destino))
+        self.guardado = GuardadoEnSegundoPlano(self.servicio)
+
+    def tearDown(self):
+        self.guardado.detener()
+        shutil.rmtree(self.directorio)
+
+    def test_escritura_fallida_deja_los_cambios_pendientes(self):
+        ana, _ = self.servicio.agregar_usuario("Ana")
+        escritura = self.guardado.solicitar()
+        self.assertFalse(self.servicio.hay_cambios_sin_guardar)
+        # Cambios hechos mientras se escribe
+        luis, _ = self.servicio.agregar_usuario("Luis")
+        self.guardado.esperar()
+        self.assertFalse(escritura.exito)
+        self.assertEqual(self.servicio.cambios_pendientes()[0], {ana.id, luis.id})
+
+        os.makedirs(self.destino)
+        self.guardado.solicitar()
+        self.assertTrue(self.guardado.esperar()[0].exito)
+        self.assertFalse(self.servicio.hay_cambios_sin_guardar)
+        self.assertEqual([u['nombre'] for u in DataManager(self.destino).iterar_usuarios()],
+                         ["Ana", "Luis"])
+        self.assertIsNone(self.guardado.solicitar())
+
+
+if __name__ == "__main__":
+    unittest.main()
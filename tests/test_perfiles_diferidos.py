@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests de los perfiles cargados bajo demanda
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.data_manager import DataManager
+from services.perfiles_diferidos import PerfilesDiferidos
+from services.red_social_service import RedSocialService
+from services.repositorio_sqlite import RepositorioSQLite
+from services.snapshot_binario import RepositorioSnapshot
+
+
+class TestPerfilesDiferidos(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_requiere_repositorio_con_indice(self):
+        with self.assertRaises(ValueError):
+            RedSocialService(DataManager(self.directorio), perfiles_diferidos=True)
+
+    def test_sqlite_lee_perfiles_bajo_demanda(self):
+        repositorio = RepositorioSQLite(os.path.join(self.directorio, 'red.db'))
+        repositorio.guardar_datos(
+            [{"id": 1, "nombre": "Ana", "edad": 30, "email": "", "intereses": ["python"], "amigos": [2]},
+             {"id": 2, "nombre": "Luis", "edad": 32, "email": "", "intereses": ["cine"], "amigos": []},
+             {"id": 3, "nombre": "Eva", "edad": 50, "email": "", "intereses": ["python"], "amigos": []}],
+            [])
+        servicio = RedSocialService(repositorio, perfiles_diferidos=True, capacidad_perfiles=2)
+        servicio.cargar_datos()
+        self.assertIsInstance(servicio.usuarios, PerfilesDiferidos)
+        self.assertEqual(sorted(servicio.usuarios[1].amigos), [2])
+        self.assertEqual([r['id'] for r in servicio.obtener_recomendaciones(1)], [3])
+        self.assertEqual(len(servicio.usuarios.en_memoria()), 2)
+
+    def test_snapshot_con_ediciones_y_guardado(self):
+        repositorio = RepositorioSnapshot(os.path.join(self.directorio, 'snapshot'))
+        repositorio.guardar_datos(
+            [{"id": i, "nombre": f"U{i}", "edad": 20, "email": "", "intereses": ["remo"], "amigos": []}
+             for i in range(1, 21)],
+            [{"origen": i, "destino": i + 1} for i in range(1, 20)])
+        servicio = RedSocialService(repositorio, perfiles_diferidos=True, capacidad_perfiles=5)
+        servicio.cargar_datos()
+        for usuario_id in range(1, 21):
+            self.assertEqual(servicio.usuarios[usuario_id].nombre, f"U{usuario_id}")
+        # La cache queda acotada aunque se hayan leido todos los perfiles
+        self.assertEqual(servicio.usuarios.estadisticas()['entradas'], 5)
+
+        nuevo, creadas = servicio.agregar_usuario("Nuevo", intereses=["remo"])
+        self.assertEqual((nuevo.id, creadas), (21, 20))
+        servicio.eliminar_usuario(3)
+        self.assertNotIn(3, servicio.usuarios)
+        self.assertEqual(sorted(servicio.usuarios[2].amigos), [1, 21])
+        self.assertTrue(servicio.guardar_datos())
+        repositorio.cerrar()
+
+        recargado = RedSocialService(RepositorioSnapshot(os.path.join(self.directorio, 'snapshot')))
+        recargado.cargar_datos()
+        self.assertEqual(len(recargado.usuarios), 20)
+        self.assertEqual(recargado.usuarios[21].nombre, "Nuevo")
+        self.assertEqual(recargado.grafo.number_of_edges(), servicio.grafo.number_of_edges())
+        recargado.data_manager.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del sistema de recomendaciones
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import networkx as nx
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+from services.data_manager import DataManager
+from services.recomendador import (RecomendacionAdamicAdar, RecomendacionJaccard,
+                                   RecomendacionPorIntereses, RecomendacionVecinosComunes,
+                                   RecomendacionVectorizada)
+from services.red_social_service import RedSocialService
+
+
+def servicio_con_grafo(grafo, intereses=(), **opciones):
+    """Servicio cuyos usuarios (ids nodo + 1) tienen exactamente las conexiones de grafo"""
+    servicio = RedSocialService(DataManager(), **opciones)
+    usuarios = [Usuario(nodo + 1, f"Usuario {nodo}", 20 + nodo % 30,
+                        intereses=[intereses[nodo % len(intereses)]] if intereses else [])
+                for nodo in sorted(grafo)]
+    aristas = list(grafo.edges())
+    servicio.cargar_masivo(usuarios, [u + 1 for u, _ in aristas], [v + 1 for _, v in aristas])
+    return servicio
+
+
+def vecinos_comunes(grafo, pares):
+    """Referencia con el formato de los indices de enlace de networkx"""
+    return ((u, v, len(list(nx.common_neighbors(grafo, u, v)))) for u, v in pares)
+
+
+class TestRecomendacionVectorizada(unittest.TestCase):
+    def setUp(self):
+        self.origen = Usuario(1, "Ana", 30, intereses=["python", "ai", "musica"])
+        self.candidatos = [
+            Usuario(2, "Luis", 32, intereses=["python", "ai"]),
+            Usuario(3, "Eva", 50, intereses=["musica", "cine", "arte"]),
+            Usuario(4, "Juan", 28, intereses=["ai"]),
+        ]
+        self.vectorizada = RecomendacionVectorizada()
+        self.referencia = RecomendacionPorIntereses()
+
+    def comparar(self):
+        esperado = self.referencia.seleccionar_mejores(self.origen, self.candidatos, 10)
+        obtenido = self.vectorizada.seleccionar_mejores(self.origen, self.candidatos, 10)
+        self.assertEqual([(u.id, s) for u, s in obtenido], [(u.id, s) for u, s in esperado])
+        return obtenido
+
+    def test_coincide_con_intereses(self):
+        self.comparar()
+
+    def test_editar_intereses_en_el_mismo_objeto(self):
+        antes = dict((u.id, s) for u, s in self.comparar())
+        self.candidatos[0].intereses = ["zzz"]
+        self.candidatos[2].intereses = ["python", "ai", "musica"]
+        despues = dict((u.id, s) for u, s in self.comparar())
+        self.assertNotIn(2, despues)
+        self.assertGreater(despues[4], antes[4])
+
+    def test_editar_edad_en_el_mismo_objeto(self):
+        self.comparar()
+        self.candidatos[1].edad = 33
+        self.assertEqual(dict((u.id, s) for u, s in self.comparar())[3], 1.8)
+
+
+class TestEstrategiasGrafo(unittest.TestCase):
+    def setUp(self):
+        self.grafo = nx.gnm_random_graph(80, 240, seed=11)
+        self.servicio = servicio_con_grafo(self.grafo)
+
+    def comparar(self, estrategia, referencia):
+        servicio = self.servicio
+        estrategia.preparar(servicio.grafo, servicio.version, servicio.adyacencia)
+        for nodo in self.grafo:
+            usuario = servicio.usuarios[nodo + 1]
+            candidatos = estrategia.generar_candidatos(usuario, servicio.usuarios)
+            a_dos_saltos = {otro + 1 for otro, distancia in
+                            nx.single_source_shortest_path_length(self.grafo, nodo, cutoff=2).items()
+                            if distancia == 2}
+            self.assertEqual({c.id for c in candidatos}, a_dos_saltos)
+            pares = [(nodo, candidato.id - 1) for candidato in candidatos]
+            esperados = {v + 1: score for _, v, score in referencia(self.grafo, pares)}
+            for candidato in candidatos:
+                self.assertAlmostEqual(estrategia.calcular_score(usuario, candidato),
+                                       esperados[candidato.id], places=12)
+            mejores = estrategia.seleccionar_mejores(usuario, candidatos, 5)
+            for (_, score), esperado in zip(mejores, sorted(esperados.values(), reverse=True)[:5]):
+                self.assertAlmostEqual(score, esperado, places=12)
+            self.assertEqual(len(mejores), min(5, len(candidatos)))
+
+    def test_vecinos_comunes(self):
+        self.comparar(RecomendacionVecinosComunes(), vecinos_comunes)
+
+    def test_adamic_adar(self):
+        self.comparar(RecomendacionAdamicAdar(), nx.adamic_adar_index)
+
+    def test_jaccard(self):
+        self.comparar(RecomendacionJaccard(), nx.jaccard_coefficient)
+
+    def test_sigue_las_ediciones_del_servicio(self):
+        estrategia = RecomendacionVecinosComunes()
+        self.servicio.recomendador.cambiar_estrategia(estrategia)
+        self.servicio.obtener_recomendaciones(1)
+        vecino = next(iter(self.grafo[0]))
+        for otro in list(self.grafo[vecino]):
+            self.servicio.eliminar_conexion(vecino + 1, otro + 1)
+            self.grafo.remove_edge(vecino, otro)
+        self.servicio.eliminar_usuario(80)
+        self.grafo.remove_node(79)
+        self.comparar(estrategia, vecinos_comunes)
+
+
+class TestCacheRecomendaciones(unittest.TestCase):
+    """Con cache y sin cache las recomendaciones deben coincidir tras cada edicion"""
+
+    def editar_y_comparar(self, estrategia):
+        grafo = nx.gnm_random_graph(40, 70, seed=2)
+        intereses = ["remo", "vela", "golf", "jazz"]
+        con_cache = servicio_con_grafo(grafo, intereses)
+        sin_cache = servicio_con_grafo(grafo, intereses, capacidad_cache_recomendaciones=0)
+        for servicio in (con_cache, sin_cache):
+            servicio.recomendador.cambiar_estrategia(estrategia())
+        azar = random.Random(5)
+        for _ in range(60):
+            accion = azar.random()
+            ids = sorted(con_cache.usuarios)
+            a, b = azar.sample(ids, 2)
+            interes = azar.choice(intereses)
+            for servicio in (con_cache, sin_cache):
+                if accion < 0.4:
+                    servicio.crear_conexion(a, b)
+                elif accion < 0.8:
+                    vecinos = sorted(servicio.grafo.adj[a])
+                    if vecinos:
+                        servicio.eliminar_conexion(a, vecinos[0])
+                elif accion < 0.9:
+                    servicio.eliminar_usuario(a)
+                else:
+                    servicio.agregar_usuario("Nuevo", 30, intereses=[interes])
+            for usuario_id in sorted(con_cache.usuarios):
+                self.assertEqual(con_cache.obtener_recomendaciones(usuario_id),
+                                 sin_cache.obtener_recomendaciones(usuario_id))
+        self.assertGreater(con_cache.estadisticas_cache_recomendaciones()['aciertos'], 0)
+
+    def test_intereses(self):
+        self.editar_y_comparar(RecomendacionPorIntereses)
+
+    def test_vecinos_comunes(self):
+        self.editar_y_comparar(RecomendacionVecinosComunes)
+
+    def test_cambio_de_estrategia(self):
+        servicio = servicio_con_grafo(nx.path_graph(4))
+        self.assertEqual(servicio.obtener_recomendaciones(1), [])
+        servicio.recomendador.cambiar_estrategia(RecomendacionVecinosComunes())
+        self.assertEqual([r['id'] for r in servicio.obtener_recomendaciones(1)], [3])
+
+
+class TestRecomendacionMasiva(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.servicio = servicio_con_grafo(nx.gnm_random_graph(60, 90, seed=4),
+                                           ["remo", "vela", "golf", "jazz", "cine"])
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def comparar(self, workers):
+        ruta = os.path.join(self.directorio, f"recomendaciones_{workers}.jsonl")
+        avances = []
+        procesados = self.servicio.generar_recomendaciones_masivas(
+            ruta, workers=workers, progreso=lambda hechos, total: avances.append((hechos, total)))
+        self.assertEqual(procesados, 60)
+        self.assertEqual(avances[-1], (60, 60))
+        with open(ruta, encoding='utf-8') as f:
+            lineas = [json.loads(linea) for linea in f]
+        self.assertEqual([linea['id'] for linea in lineas], sorted(self.servicio.usuarios))
+        for linea in lineas:
+            esperadas = self.servicio.obtener_recomendaciones(linea['id'])
+            self.assertEqual([(r['id'], r['score']) for r in linea['recomendaciones']],
+                             [(r['id'], r['score']) for r in esperadas])
+
+    def test_sin_pool(self):
+        self.comparar(1)
+
+    def test_con_pool(self):
+        self.comparar(2)
+
+    def test_estrategia_de_grafo(self):
+        self.servicio.recomendador.cambiar_estrategia(RecomendacionAdamicAdar())
+        self.comparar(2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del servicio de red social
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario
+from services.data_manager import DataManager
+from services.recomendador import RecomendacionVectorizada
+from services.red_social_service import RedSocialService
+
+
+class TestRecargarCambios(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.escribir([
+            {"id": 1, "nombre": "Ana", "edad": 30, "intereses": ["python", "ai"], "amigos": []},
+            {"id": 2, "nombre": "Luis", "edad": 32, "intereses": ["python"], "amigos": []},
+            {"id": 3, "nombre": "Eva", "edad": 50, "intereses": ["cine"], "amigos": []},
+        ], [(1, 2)])
+        self.servicio = RedSocialService(DataManager(self.directorio))
+        self.servicio.cargar_datos()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def escribir(self, usuarios, conexiones):
+        with open(os.path.join(self.directorio, 'usuarios.json'), 'w', encoding='utf-8') as f:
+            json.dump({"usuarios": usuarios}, f)
+        with open(os.path.join(self.directorio, 'conexiones.json'), 'w', encoding='utf-8') as f:
+            json.dump({"conexiones": [{"origen": origen, "destino": destino}
+                                      for origen, destino in conexiones]}, f)
+
+    def recomendados(self, usuario_id):
+        return [r['id'] for r in self.servicio.obtener_recomendaciones(usuario_id)]
+
+    def test_perfil_modificado_con_estrategia_vectorizada(self):
+        self.servicio.recomendador.cambiar_estrategia(RecomendacionVectorizada())
+        self.assertEqual(self.recomendados(1), [])
+        eva = self.servicio.usuarios[3]
+        self.escribir([
+            {"id": 1, "nombre": "Ana", "edad": 30, "intereses": ["python", "ai"], "amigos": []},
+            {"id": 2, "nombre": "Luis", "edad": 32, "intereses": ["python"], "amigos": []},
+            {"id": 3, "nombre": "Eva", "edad": 51, "intereses": ["ai", "cine"], "amigos": []},
+        ], [(1, 2), (2, 3)])
+        resumen = self.servicio.recargar_cambios()
+        self.assertEqual(resumen['usuarios_modificados'], 1)
+        self.assertEqual(resumen['conexiones_agregadas'], 1)
+        # El perfil se actualiza en el mismo objeto
+        self.assertIs(self.servicio.usuarios[3], eva)
+        self.assertEqual(self.recomendados(1), [3])
+
+    def test_conexiones_con_ids_fuera_de_32_bits(self):
+        grande = 2**33 + 1
+        usuarios = [
+            {"id": 1, "nombre": "Ana", "edad": 30, "intereses": ["python"], "amigos": []},
+            {"id": 2, "nombre": "Luis", "edad": 32, "intereses": ["python"], "amigos": []},
+            {"id": grande, "nombre": "Eva", "edad": 50, "intereses": ["cine"], "amigos": []},
+        ]
+        self.escribir(usuarios, [(1, 2), (1, grande)])
+        resumen = self.servicio.recargar_cambios()
+        self.assertEqual(resumen['usuarios_agregados'], 1)
+        self.assertEqual(resumen['conexiones_agregadas'], 1)
+        self.assertTrue(self.servicio.grafo.has_edge(1, grande))
+        self.escribir(usuarios, [(2, grande)])
+        resumen = self.servicio.recargar_cambios()
+        self.assertEqual((resumen['conexiones_agregadas'], resumen['conexiones_eliminadas']), (1, 2))
+        self.assertEqual(sorted(self.servicio.grafo.edges()), [(2, grande)])
+
+
+class TestCargaMasiva(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_carga_valida_y_sin_duplicados(self):
+        usuarios = [
+            {"id": 1, "nombre": "Ana", "edad": 30, "intereses": ["python"], "amigos": [2, 9]},
+            {"id": 2, "nombre": "Luis", "edad": 32, "intereses": ["cine"], "amigos": [1]},
+            {"id": 5, "nombre": "Eva", "edad": 50, "intereses": ["python"], "amigos": [5]},
+            {"id": 7, "nombre": "Sol", "edad": 22, "intereses": [], "amigos": []},
+        ]
+        conexiones = [(2, 1), (1, 2), (5, 7), (7, 5), (7, 7), (2, 8)]
+        with open(os.path.join(self.directorio, 'usuarios.json'), 'w', encoding='utf-8') as f:
+            json.dump({"usuarios": usuarios}, f)
+        with open(os.path.join(self.directorio, 'conexiones.json'), 'w', encoding='utf-8') as f:
+            json.dump({"conexiones": [{"origen": o, "destino": d} for o, d in conexiones]}, f)
+        servicio = RedSocialService(DataManager(self.directorio))
+        servicio.cargar_datos()
+
+        # Se descartan lazos, duplicados en ambos sentidos e ids inexistentes
+        self.assertEqual(sorted(tuple(sorted(a)) for a in servicio.grafo.edges()), [(1, 2), (5, 7)])
+        self.assertEqual(sorted(servicio.usuarios[7].amigos), [5])
+        self.assertTrue(servicio.usuarios[1].vinculado_a_grafo)
+        self.assertEqual(servicio.obtener_estadisticas()['num_conexiones'], 2)
+        self.assertFalse(servicio.hay_cambios_sin_guardar)
+        nuevo, creadas = servicio.agregar_usuario("Nuevo", intereses=["python"])
+        self.assertEqual((nuevo.id, creadas), (8, 2))
+
+    def test_rechaza_ids_repetidos_en_la_misma_carga(self):
+        servicio = RedSocialService(DataManager(self.directorio))
+        servicio.cargar_masivo([Usuario(1, "Ana")], [], [])
+        with self.assertRaises(ValueError):
+            servicio.cargar_masivo([Usuario(1, "Otra")], [], [])
+        self.assertEqual(servicio.usuarios[1].nombre, "Ana")
+
+
+class TestEdicion(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.servicio = RedSocialService(DataManager(self.directorio))
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_conexiones_automaticas_por_intereses(self):
+        intereses = [["python", "cine"], ["cine"], ["jazz"], ["PYTHON", "jazz"], []]
+        usuarios = [self.servicio.agregar_usuario(f"Usuario {i}", intereses=lista)[0]
+                    for i, lista in enumerate(intereses)]
+        # Mismo resultado que comparar todos los pares
+        esperadas = {(a.id, b.id) for a in usuarios for b in usuarios
+                     if a.id < b.id and a.tiene_interes_comun(b)}
+        self.assertEqual({tuple(sorted(arista)) for arista in self.servicio.grafo.edges()}, esperadas)
+
+        self.servicio.eliminar_usuario(usuarios[0].id)
+        nuevo, creadas = self.servicio.agregar_usuario("Nuevo", intereses=["python"])
+        self.assertEqual(creadas, 1)
+        self.assertEqual(list(nuevo.amigos), [usuarios[3].id])
+
+    def test_amigos_son_la_adyacencia_del_grafo(self):
+        ana, _ = self.servicio.agregar_usuario("Ana", intereses=["remo"])
+        luis, _ = self.servicio.agregar_usuario("Luis", intereses=["vela"])
+        eva, _ = self.servicio.agregar_usuario("Eva", intereses=["golf"])
+        self.assertTrue(self.servicio.crear_conexion(ana.id, luis.id))
+        self.assertTrue(self.servicio.crear_conexion(ana.id, eva.id))
+        self.assertFalse(self.servicio.crear_conexion(luis.id, ana.id))
+        self.assertEqual(sorted(ana.amigos), [luis.id, eva.id])
+        self.assertEqual(list(luis.amigos), [ana.id])
+        # Las aristas no duplican datos de los usuarios
+        self.assertEqual(self.servicio.grafo.edges[ana.id, luis.id], {})
+
+        self.servicio.eliminar_conexion(ana.id, eva.id)
+        self.assertEqual(list(eva.amigos), [])
+        self.servicio.eliminar_usuario(ana.id)
+        self.assertEqual(list(luis.amigos), [])
+        # El usuario eliminado conserva una copia de sus amistades
+        self.assertFalse(ana.vinculado_a_grafo)
+        self.assertEqual(list(ana.amigos), [luis.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del directorio de datos fragmentado
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.red_social_service import RedSocialService
+from services.repositorio_fragmentado import ARCHIVO_MANIFIESTO, RepositorioFragmentado
+
+
+def usuario(usuario_id, amigos=()):
+    return {"id": usuario_id, "nombre": f"U{usuario_id}", "edad": 20, "email": "",
+            "intereses": [], "amigos": list(amigos)}
+
+
+class TestRepositorioFragmentado(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.repositorio = RepositorioFragmentado(self.directorio, usuarios_por_fragmento=10, workers=1)
+        # Tres fragmentos: ids 1-9, 10-19 y 20-29
+        self.usuarios = [usuario(i) for i in (1, 5, 12, 15, 27)]
+        self.usuarios[0]["amigos"] = [27]
+        self.conexiones = [{"origen": 15, "destino": 5}, {"origen": 12, "destino": 15}]
+        self.assertTrue(self.repositorio.guardar_datos(self.usuarios, self.conexiones))
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def manifiesto(self):
+        with open(os.path.join(self.directorio, ARCHIVO_MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+
+    def reescritos(self, antes):
+        despues = self.mtimes()
+        return [indice for indice in antes if indice in despues and antes[indice] != despues[indice]]
+
+    def mtimes(self):
+        return {indice: os.stat(self.repositorio._data_manager(indice).archivo_usuarios).st_mtime_ns
+                for indice in self.repositorio.fragmentos()}
+
+    def test_manifiesto(self):
+        fragmentos = self.manifiesto()["fragmentos"]
+        self.assertEqual(sorted(fragmentos), ["0", "1", "2"])
+        # Una conexion pertenece al fragmento de su extremo menor
+        self.assertEqual({indice: (datos["usuarios"], datos["conexiones"])
+                          for indice, datos in fragmentos.items()},
+                         {"0": (2, 2), "1": (2, 1), "2": (1, 0)})
+        self.assertEqual(self.repositorio.rango_particion("1"), (10, 20))
+
+    def test_solo_reescribe_los_fragmentos_cambiados(self):
+        antes = self.mtimes()
+        particiones = self.repositorio.particiones()
+        self.usuarios[2]["nombre"] = "Cambiado"
+        self.assertTrue(self.repositorio.guardar_datos(self.usuarios, self.conexiones))
+        self.assertEqual(self.reescritos(antes), [1])
+        cambiadas = self.repositorio.particiones()
+        self.assertEqual([clave for clave in cambiadas if cambiadas[clave] != particiones[clave]], ["1"])
+
+    def test_guardar_cambios(self):
+        antes = self.mtimes()
+        self.assertTrue(self.repositorio.guardar_cambios([usuario(13)], [27], [(13, 12)], []))
+        self.assertEqual(self.reescritos(antes), [1])
+        # El fragmento 2 quedo vacio y sale del manifiesto
+        self.assertEqual(self.repositorio.fragmentos(), [0, 1])
+        self.assertEqual(sorted(u['id'] for u in self.repositorio.iterar_usuarios()), [1, 5, 12, 13, 15])
+
+    def test_recarga_en_paralelo(self):
+        paralelo = RepositorioFragmentado(self.directorio, workers=2)
+        self.assertEqual(paralelo.usuarios_por_fragmento, 10)
+        servicio = RedSocialService(paralelo)
+        servicio.cargar_datos()
+        self.assertEqual(sorted(servicio.usuarios), [1, 5, 12, 15, 27])
+        self.assertEqual(sorted(tuple(sorted(a)) for a in servicio.grafo.edges()),
+                         [(1, 27), (5, 15), (12, 15)])
+        self.assertEqual(paralelo.obtener_usuario(12)["nombre"], "U12")
+        self.assertIsNone(paralelo.obtener_usuario(40))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del backend SQLite y del guardado incremental
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services.data_manager import DataManager, RepositorioIncremental
+from services.red_social_service import RedSocialService
+from services.repositorio_sqlite import RepositorioSQLite
+
+
+USUARIOS = [
+    {"id": 1, "nombre": "Ana", "edad": 30, "email": "ana@correo.com", "intereses": ["python", "cine"], "amigos": [2]},
+    {"id": 2, "nombre": "Luis", "edad": 32, "email": "", "intereses": ["cine"], "amigos": []},
+    {"id": 3, "nombre": "Eva", "edad": 50, "email": "", "intereses": [], "amigos": []},
+]
+
+
+class TestRepositorioSQLite(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, 'red.db')
+        self.repositorio = RepositorioSQLite(self.ruta)
+
+    def tearDown(self):
+        self.repositorio.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_ida_y_vuelta(self):
+        self.assertTrue(self.repositorio.guardar_datos(USUARIOS, [{"origen": 3, "destino": 2}]))
+        leidos = {u['id']: u for u in self.repositorio.iterar_usuarios()}
+        self.assertEqual(leidos[1]['intereses'], ["python", "cine"])
+        self.assertEqual(leidos[1]['email'], "ana@correo.com")
+        self.assertEqual(sorted(leidos[2]['amigos']), [1, 3])
+        self.assertEqual(sorted((c['origen'], c['destino']) for c in self.repositorio.iterar_conexiones()),
+                         [(1, 2), (2, 3)])
+        self.assertEqual(self.repositorio.obtener_usuario(3)['nombre'], "Eva")
+        self.assertIsNone(self.repositorio.obtener_usuario(4))
+
+    def test_guardar_cambios(self):
+        self.repositorio.guardar_datos(USUARIOS, [])
+        nuevo = {"id": 4, "nombre": "Sol", "edad": 22, "email": "", "intereses": ["cine"], "amigos": []}
+        self.assertTrue(self.repositorio.guardar_cambios([nuevo], [3], [(2, 4)], [(1, 2)]))
+        self.assertEqual(sorted(u['id'] for u in self.repositorio.iterar_usuarios()), [1, 2, 4])
+        self.assertEqual(list(self.repositorio.iterar_conexiones()), [{"origen": 2, "destino": 4}])
+
+    def test_servicio_guarda_solo_lo_modificado(self):
+        self.repositorio.guardar_datos(USUARIOS, [])
+        servicio = RedSocialService(self.repositorio)
+        servicio.cargar_datos()
+        usuario, _ = servicio.agregar_usuario("Sol", 22, intereses=["jazz"])
+        servicio.crear_conexion(usuario.id, 3)
+        servicio.eliminar_usuario(2)
+        self.assertTrue(servicio.guardar_datos())
+
+        otro = RedSocialService(RepositorioSQLite(self.ruta))
+        otro.cargar_datos()
+        self.assertEqual(sorted(otro.usuarios), [1, 3, usuario.id])
+        self.assertEqual(sorted(otro.usuarios[3].amigos), [usuario.id])
+        self.assertEqual(list(otro.usuarios[1].amigos), [])
+        otro.data_manager.cerrar()
+
+    def test_solo_los_repositorios_incrementales_guardan_cambios(self):
+        self.assertIsInstance(self.repositorio, RepositorioIncremental)
+        self.assertFalse(hasattr(DataManager(self.directorio), 'guardar_cambios'))
+
+
+if __name__ == "__main__":
+    unittest.main()
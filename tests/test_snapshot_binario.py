@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del snapshot binario mapeado en memoria
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from services import snapshot_binario
+from services.red_social_service import RedSocialService
+from services.snapshot_binario import RepositorioSnapshot
+
+
+def red_de_prueba():
+    usuarios = [{"id": i, "nombre": f"Usuario {i}", "edad": 20 + i, "email": f"u{i}@correo.com",
+                 "intereses": ["python", "cine"][:i % 3], "amigos": []} for i in range(1, 8)]
+    usuarios[0]["amigos"] = [2, 3]
+    conexiones = [{"origen": 3, "destino": 4}, {"origen": 5, "destino": 4}, {"origen": 2, "destino": 1}]
+    return usuarios, conexiones
+
+
+class TestRepositorioSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.repositorio = RepositorioSnapshot(self.directorio)
+
+    def tearDown(self):
+        self.repositorio.cerrar()
+        shutil.rmtree(self.directorio)
+
+    def test_ida_y_vuelta(self):
+        usuarios, conexiones = red_de_prueba()
+        self.assertTrue(self.repositorio.guardar_datos(usuarios, conexiones))
+        leidos = {u['id']: u for u in self.repositorio.iterar_usuarios()}
+        self.assertEqual(leidos[1]['nombre'], "Usuario 1")
+        self.assertEqual(leidos[2]['intereses'], ["python", "cine"])
+        self.assertEqual(sorted(leidos[4]['amigos']), [3, 5])
+        self.assertEqual(sorted((c['origen'], c['destino']) for c in self.repositorio.iterar_conexiones()),
+                         [(1, 2), (1, 3), (3, 4), (4, 5)])
+        self.assertEqual(self.repositorio.obtener_usuario(3)['amigos'], [1, 4])
+        self.assertIsNone(self.repositorio.obtener_usuario(99))
+
+    def test_bloques_sin_amigos(self):
+        usuarios, conexiones = red_de_prueba()
+        self.repositorio.guardar_datos(usuarios, conexiones)
+        por_bloque = snapshot_binario.USUARIOS_POR_BLOQUE
+        snapshot_binario.USUARIOS_POR_BLOQUE = 3
+        try:
+            bloques = list(self.repositorio.iterar_bloques())
+        finally:
+            snapshot_binario.USUARIOS_POR_BLOQUE = por_bloque
+        self.assertEqual([len(registros) for registros, _, _ in bloques], [3, 3, 1])
+        self.assertFalse(any('amigos' in r for registros, _, _ in bloques for r in registros))
+        # Cada conexion llega una sola vez, en el ultimo bloque
+        self.assertEqual([len(origenes) for _, origenes, _ in bloques], [0, 0, 4])
+
+    def test_carga_del_servicio(self):
+        usuarios, conexiones = red_de_prueba()
+        self.repositorio.guardar_datos(usuarios, conexiones)
+        servicio = RedSocialService(self.repositorio)
+        servicio.cargar_datos()
+        self.assertEqual(len(servicio.usuarios), 7)
+        self.assertEqual(servicio.grafo.number_of_edges(), 4)
+        self.assertEqual(sorted(servicio.usuarios[4].amigos), [3, 5])
+
+    def test_publica_generacion_nueva(self):
+        usuarios, conexiones = red_de_prueba()
+        self.repositorio.guardar_datos(usuarios, conexiones)
+        self.repositorio.guardar_datos(usuarios[:2], [])
+        generaciones = [e for e in os.listdir(self.directorio) if e.startswith('generacion_')]
+        self.assertEqual(generaciones, ['generacion_000002'])
+        otro = RepositorioSnapshot(self.directorio)
+        self.assertEqual([u['id'] for u in otro.iterar_usuarios()], [1, 2])
+        self.assertEqual(list(otro.iterar_conexiones()), [{"origen": 1, "destino": 2}])
+        otro.cerrar()
+
+    def test_generacion_a_medio_escribir_no_se_publica(self):
+        usuarios, conexiones = red_de_prueba()
+        self.repositorio.guardar_datos(usuarios, conexiones)
+        # Restos de un guardado interrumpido antes de reemplazar el manifiesto
+        os.makedirs(os.path.join(self.directorio, 'generacion_000002'))
+        otro = RepositorioSnapshot(self.directorio)
+        self.assertEqual(len(otro), 7)
+        otro.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Tests del modelo Usuario
+"""
+import os
+import pickle
+import sys
+import unittest
+
+import networkx as nx
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from models.usuario import Usuario, depurar_conjuntos_intereses, id_interes, nombre_interes
+
+
+class TestUsuario(unittest.TestCase):
+    def test_crear_usuario(self):
+        usuario = Usuario(1, "Juan", 25, "juan@email.com", ["Python", "AI"])
+        self.assertEqual(usuario.nombre, "Juan")
+        self.assertEqual(usuario.edad, 25)
+        self.assertEqual(usuario.intereses, ["python", "ai"])
+
+    def test_slots_sin_dict(self):
+        usuario = Usuario(1, "Juan")
+        self.assertFalse(hasattr(usuario, '__dict__'))
+        with self.assertRaises(AttributeError):
+            usuario.apodo = "Juancho"
+
+    def test_conjuntos_de_intereses_compartidos(self):
+        ana = Usuario(1, "Ana", intereses=["Cine", "python"])
+        luis = Usuario(2, "Luis", intereses=["python", "cine", "python"])
+        self.assertIs(ana.ids_intereses, luis.ids_intereses)
+        self.assertIs(ana.intereses_set, luis.intereses_set)
+        self.assertEqual(ana.intereses_set, {"cine", "python"})
+        self.assertEqual(luis.num_intereses, 3)
+        self.assertEqual(nombre_interes(id_interes("PYTHON")), "python")
+
+    def test_intereses_comunes(self):
+        ana = Usuario(1, "Ana", intereses=["cine", "python"])
+        luis = Usuario(2, "Luis", intereses=["python", "jazz"])
+        eva = Usuario(3, "Eva", intereses=["teatro"])
+        self.assertTrue(ana.tiene_interes_comun(luis))
+        self.assertFalse(ana.tiene_interes_comun(eva))
+        self.assertEqual(ana.intereses_comunes(luis), {"python"})
+
+    def test_editar_intereses_recalcula_el_conjunto(self):
+        usuario = Usuario(1, "Ana", intereses=["cine"])
+        usuario.intereses = ["Jazz"]
+        self.assertEqual(usuario.intereses_set, {"jazz"})
+        self.assertEqual(usuario.ids_intereses, {id_interes("jazz")})
+
+    def test_depurar_conserva_los_conjuntos_en_uso(self):
+        usuario = Usuario(1, "Ana", intereses=["ajedrez", "remo"])
+        Usuario(2, "Luis", intereses=["ajedrez", "vela"])
+        depurar_conjuntos_intereses([usuario])
+        otro = Usuario(3, "Eva", intereses=["remo", "ajedrez"])
+        self.assertIs(otro.ids_intereses, usuario.ids_intereses)
+
+    def test_igualdad_por_contenido(self):
+        datos = {"id": 1, "nombre": "Ana", "edad": 30, "email": "ana@correo.com",
+                 "intereses": ["cine"], "amigos": [2, 3]}
+        self.assertEqual(Usuario.from_dict(datos), Usuario.from_dict(dict(datos)))
+        self.assertNotEqual(Usuario.from_dict(datos), Usuario.from_dict(dict(datos, edad=31)))
+        self.assertNotEqual(Usuario.from_dict(datos), datos)
+        with self.assertRaises(TypeError):
+            hash(Usuario.from_dict(datos))
+
+    def test_dict_y_pickle_ida_y_vuelta(self):
+        datos = {"id": 7, "nombre": "Ana", "edad": 30, "email": "",
+                 "intereses": ["cine", "python"], "amigos": [2]}
+        usuario = Usuario.from_dict(datos)
+        self.assertEqual(usuario.to_dict(), datos)
+        copia = pickle.loads(pickle.dumps(usuario))
+        self.assertEqual(copia, usuario)
+        self.assertIs(copia.ids_intereses, usuario.ids_intereses)
+
+
+class TestAmigos(unittest.TestCase):
+    def test_amigos_sin_duplicados_en_orden(self):
+        usuario = Usuario(1, "Ana", amigos=[3, 2, 3])
+        usuario.agregar_amigo(5)
+        usuario.agregar_amigo(2)
+        self.assertEqual(list(usuario.amigos), [3, 2, 5])
+        self.assertIn(5, usuario.amigos)
+        usuario.remover_amigo(3)
+        usuario.remover_amigo(9)
+        self.assertEqual(list(usuario.amigos), [2, 5])
+
+    def test_vinculado_al_grafo(self):
+        grafo = nx.Graph([(1, 2)])
+        usuario = Usuario(1, "Ana", amigos=[7])
+        usuario.vincular_adyacencia(grafo.adj[1])
+        self.assertTrue(usuario.vinculado_a_grafo)
+        self.assertEqual(list(usuario.amigos), [2])
+        grafo.add_edge(1, 3)
+        self.assertEqual(sorted(usuario.amigos), [2, 3])
+        with self.assertRaises(TypeError):
+            usuario.agregar_amigo(4)
+        self.assertEqual(usuario.to_dict()["amigos"], [2, 3])
+
+    def test_desvincular_copia_las_amistades(self):
+        grafo = nx.Graph([(1, 2)])
+        usuario = Usuario(1, "Ana")
+        usuario.vincular_adyacencia(grafo.adj[1])
+        usuario.desvincular_adyacencia()
+        grafo.remove_edge(1, 2)
+        self.assertFalse(usuario.vinculado_a_grafo)
+        self.assertEqual(list(usuario.amigos), [2])
+        usuario.agregar_amigo(4)
+        self.assertEqual(list(usuario.amigos), [2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()